@@ -0,0 +1,35 @@
+"""add users (created_at, id) index for keyset pagination
+
+Revision ID: 20261017_0002
+Revises: 20240620_0001
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_0002"
+down_revision: str | None = "20240620_0001"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Build the index without locking writes on large tables.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_created_at_id",
+            "users",
+            ["created_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_created_at_id", table_name="users", postgresql_concurrently=True
+        )
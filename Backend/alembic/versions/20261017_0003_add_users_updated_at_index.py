@@ -0,0 +1,30 @@
+"""add users updated_at index for cheap list validators
+
+Revision ID: 20261017_0003
+Revises: 20261017_0002
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_0003"
+down_revision: str | None = "20261017_0002"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # max(updated_at) backs the ETag of GET /users/ and becomes an index probe.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_updated_at", "users", ["updated_at"], postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_users_updated_at", table_name="users", postgresql_concurrently=True)
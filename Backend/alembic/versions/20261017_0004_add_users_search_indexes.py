@@ -0,0 +1,58 @@
+"""add users search indexes
+
+Revision ID: 20261017_0004
+Revises: 20261017_0003
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_0004"
+down_revision: str | None = "20261017_0003"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+SEARCHED_COLUMNS = ("email", "full_name")
+
+
+def upgrade() -> None:
+    is_postgres = op.get_context().dialect.name == "postgresql"
+    if is_postgres:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        for column in SEARCHED_COLUMNS:
+            lowered = sa.func.lower(sa.column(column)).label(f"{column}_lower")
+            # text_pattern_ops lets ``lower(col) LIKE 'term%'`` use the btree
+            # regardless of the database collation.
+            op.create_index(
+                f"ix_users_{column}_lower",
+                "users",
+                [lowered],
+                postgresql_ops={f"{column}_lower": "text_pattern_ops"},
+                postgresql_concurrently=True,
+            )
+            if is_postgres:
+                # Trigram GIN indexes serve ``LIKE '%term%'`` substring searches.
+                op.create_index(
+                    f"ix_users_{column}_trgm",
+                    "users",
+                    [lowered],
+                    postgresql_using="gin",
+                    postgresql_ops={f"{column}_lower": "gin_trgm_ops"},
+                    postgresql_concurrently=True,
+                )
+
+
+def downgrade() -> None:
+    is_postgres = op.get_context().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for column in SEARCHED_COLUMNS:
+            if is_postgres:
+                op.drop_index(f"ix_users_{column}_trgm", table_name="users", postgresql_concurrently=True)
+            op.drop_index(f"ix_users_{column}_lower", table_name="users", postgresql_concurrently=True)
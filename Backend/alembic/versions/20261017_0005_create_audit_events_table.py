@@ -0,0 +1,41 @@
+"""create audit_events table
+
+Revision ID: 20261017_0005
+Revises: 20261017_0004
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "20261017_0005"
+down_revision: str | None = "20261017_0004"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "audit_events",
+        sa.Column("id", sa.dialects.postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("action", sa.String(length=64), nullable=False),
+        sa.Column("actor", sa.String(length=255), nullable=True),
+        sa.Column("subject", sa.String(length=255), nullable=True),
+        sa.Column("ip", sa.String(length=45), nullable=True),
+        sa.Column("details", sa.JSON().with_variant(sa.dialects.postgresql.JSONB(), "postgresql"), nullable=True),
+    )
+    op.create_index("ix_audit_events_occurred_at_id", "audit_events", ["occurred_at", "id"])
+    op.create_index("ix_audit_events_action_occurred_at", "audit_events", ["action", "occurred_at"])
+    op.create_index("ix_audit_events_actor_occurred_at", "audit_events", ["actor", "occurred_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_audit_events_actor_occurred_at", table_name="audit_events")
+    op.drop_index("ix_audit_events_action_occurred_at", table_name="audit_events")
+    op.drop_index("ix_audit_events_occurred_at_id", table_name="audit_events")
+    op.drop_table("audit_events")
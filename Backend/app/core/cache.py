@@ -0,0 +1,72 @@
+"""Small in-process caching helpers."""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded LRU cache whose entries expire after a TTL or an explicit deadline.
+
+    Deadlines are wall-clock timestamps so callers can align them with values
+    such as a JWT ``exp`` claim.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V, *, expires_at: float | None = None) -> None:
+        if self.max_entries <= 0:
+            return
+        now = self._clock()
+        if expires_at is None:
+            if self.ttl is None:
+                raise ValueError("An expiry is required when the cache has no default TTL")
+            expires_at = now + self.ttl
+        elif self.ttl is not None:
+            expires_at = min(expires_at, now + self.ttl)
+        if expires_at <= now:
+            return
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List
+from typing import List, Literal
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -15,22 +15,130 @@ class Settings(BaseSettings):
 
     cors_allow_credentials: bool = True
 
+    # Production launcher (python -m app.serve); workers default to one per core.
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int | None = None
+    server_kind: Literal["auto", "gunicorn", "uvicorn"] = "auto"
+    server_backlog: int = 2048
+    server_keepalive_seconds: int = 5
+    server_graceful_timeout_seconds: int = 30
+    server_max_requests: int = 0
+    server_max_requests_jitter: int = 0
+    server_forwarded_allow_ips: str = "127.0.0.1"
+    server_access_log: bool = False
+
     database_url: str = (
         "postgresql+asyncpg://postgres:postgres@db:5432/postgres"
     )
+    db_echo: bool = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = False
+    # None keeps asyncpg's default; use 0 behind PgBouncer in transaction mode.
+    db_statement_cache_size: int | None = None
+
+    # Comma separated read replica DSNs; empty routes all reads to the primary.
+    database_replica_urls: List[str] | str = []
+    replica_routing: Literal["round_robin", "least_loaded"] = "round_robin"
+    read_your_writes_seconds: float = 5.0
+    # Above this many planner-estimated matches, X-Total-Count on GET /users/
+    # reports the Postgres estimate instead of counting every row.
+    users_exact_count_threshold: int = 10_000
 
     redis_url: str | None = "redis://redis:6379/0"
 
+    metrics_enabled: bool = True
+    # Serve JSON with orjson and precompiled user serializers instead of the
+    # default response_model validation and jsonable_encoder pass.
+    fast_json_responses: bool = False
+
+    # Per-request profiling (see app/core/profiling.py). Off installs nothing;
+    # when on, requests are profiled if sampled or sent with X-Profile-Token.
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_sample_interval_seconds: float = 0.001
+    profiling_max_seconds: float = 30.0
+    profiling_max_profiles: int = 50
+    profiling_token_ttl_seconds: int = 3600
+    # Signs X-Profile-Token values; empty falls back to jwt_secret_key.
+    profiling_secret: str = ""
+
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    readiness_interval_seconds: float = 5.0
+    readiness_timeout_seconds: float = 2.0
+
     access_token_expire_minutes: int = 15
     refresh_token_expire_minutes: int = 60 * 24 * 7
 
     jwt_secret_key: str = "change-me"
     jwt_refresh_secret_key: str = "change-me-refresh"
     jwt_algorithm: str = "HS256"
+    # Comma separated PEM files for RS256/ES256 access tokens; the first one
+    # signs. Empty keeps HS256 with jwt_secret_key.
+    jwt_private_key_files: List[str] | str = []
+    jwks_cache_max_age_seconds: int = 300
+    token_cache_max_entries: int = 10_000
+    refresh_token_store: Literal["memory", "redis"] = "memory"
+
+    rate_limit_enabled: bool = True
+    rate_limit_backend: Literal["memory", "redis"] = "memory"
+    auth_rate_limit_window_seconds: int = 60
+    auth_rate_limit_per_ip: int = 30
+    auth_rate_limit_per_email: int = 10
+
+    password_hash_executor: Literal["thread", "process"] = "thread"
+    password_hash_workers: int | None = None
+    password_hash_max_queue: int = 64
+
+    principal_cache_ttl_seconds: int = 30
+    principal_cache_max_entries: int = 10_000
+    principal_cache_redis: bool = False
+
+    email_backend: Literal["console", "smtp"] = "console"
+    email_sender: str = "noreply@example.com"
+    smtp_host: str = "localhost"
+    smtp_port: int = 587
+    smtp_username: str | None = None
+    smtp_password: str | None = None
+    smtp_starttls: bool = True
+    smtp_timeout_seconds: float = 10.0
+    email_queue_backend: Literal["memory", "redis"] = "memory"
+    email_queue_max_size: int = 10_000
+    email_queue_lease_seconds: float = 30.0
+    email_workers: int = 2
+    email_batch_size: int = 50
+    email_max_attempts: int = 5
+    email_retry_backoff_seconds: float = 2.0
+    email_retry_backoff_max_seconds: float = 300.0
+    email_shutdown_timeout_seconds: float = 5.0
+
+    audit_enabled: bool = True
+    audit_buffer_max_events: int = 10_000
+    audit_batch_size: int = 500
+    audit_flush_interval_seconds: float = 1.0
+    audit_write_max_attempts: int = 5
+    audit_retry_backoff_max_seconds: float = 30.0
+    audit_shutdown_timeout_seconds: float = 5.0
+
+    user_changes_backend: Literal["memory", "redis"] = "memory"
+    user_changes_history_size: int = 1000
+    user_changes_heartbeat_seconds: float = 15.0
+    user_changes_max_stream_seconds: float = 300.0
+
+    bulk_import_batch_size: int = 1000
+    bulk_import_use_copy: bool = True
+    users_batch_max_operations: int = 10_000
 
-    @field_validator("backend_cors_origins", mode="before")
+    @field_validator("backend_cors_origins", "database_replica_urls", "jwt_private_key_files", mode="before")
     @classmethod
-    def split_cors_origins(cls, value: List[str] | str) -> List[str]:
+    def split_comma_separated(cls, value: List[str] | str) -> List[str]:
         if isinstance(value, str):
             stripped = value.strip()
             if not stripped:
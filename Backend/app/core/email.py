@@ -1,10 +1,32 @@
 """Email utilities.
 
-This module intentionally contains a stub to make it easy to integrate
-transactional email services later.
+Messages are built here and handed to an ``AsyncEmailBackend`` in batches by
+the dispatcher in ``app.core.email_queue``, so request handlers never wait on
+SMTP. Blocking ``smtplib`` calls run in a worker thread.
 """
 
-from typing import Protocol
+import asyncio
+import logging
+import smtplib
+import uuid
+from dataclasses import dataclass, field
+from email.message import EmailMessage as MIMEMessage
+from typing import Protocol, Sequence
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmailMessage:
+    subject: str
+    recipient: str
+    body: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    # Set by durable queues to acknowledge the exact payload that was dequeued.
+    receipt: str | None = field(default=None, compare=False, repr=False)
 
 
 class EmailBackend(Protocol):
@@ -12,11 +34,104 @@ class EmailBackend(Protocol):
         ...
 
 
+class AsyncEmailBackend(Protocol):
+    async def send_batch(self, messages: Sequence[EmailMessage]) -> list[EmailMessage]:
+        """Deliver ``messages`` and return the ones that failed and may be retried."""
+        ...
+
+
 class ConsoleEmailBackend:
     """Simple backend that prints emails to the console."""
 
     def send(self, *, subject: str, recipient: str, body: str) -> None:  # pragma: no cover
         print(f"Sending email to {recipient}: {subject}\n{body}")
 
+    async def send_batch(self, messages: Sequence[EmailMessage]) -> list[EmailMessage]:  # pragma: no cover
+        for message in messages:
+            self.send(subject=message.subject, recipient=message.recipient, body=message.body)
+        return []
+
+
+class SMTPEmailBackend:
+    """Sends each batch over a single SMTP session in a worker thread."""
+
+    def __init__(
+        self,
+        *,
+        host: str,
+        port: int,
+        sender: str,
+        username: str | None = None,
+        password: str | None = None,
+        starttls: bool = False,
+        timeout: float = 10.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def _mime(self, message: EmailMessage) -> MIMEMessage:
+        mime = MIMEMessage()
+        mime["From"] = self.sender
+        mime["To"] = message.recipient
+        mime["Subject"] = message.subject
+        mime["Message-ID"] = f"<{message.id}@{self.sender.rpartition('@')[2] or 'localhost'}>"
+        mime.set_content(message.body)
+        return mime
+
+    def _send_batch_sync(self, messages: Sequence[EmailMessage]) -> list[EmailMessage]:
+        failed: list[EmailMessage] = []
+        done = 0
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as client:
+                if self.starttls:
+                    client.starttls()
+                if self.username:
+                    client.login(self.username, self.password or "")
+                for message in messages:
+                    try:
+                        client.send_message(self._mime(message))
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused):
+                        failed.append(message)
+                    done += 1
+        except (smtplib.SMTPException, OSError):
+            if not done:
+                raise
+            # The session broke mid-batch: messages the server already accepted
+            # must not be sent again, so only the rest are retried.
+            logger.warning("SMTP session failed after %d of %d messages", done, len(messages), exc_info=True)
+            return failed + list(messages[done:])
+        return failed
+
+    async def send_batch(self, messages: Sequence[EmailMessage]) -> list[EmailMessage]:
+        return await asyncio.to_thread(self._send_batch_sync, messages)
+
+
+def build_email_backend() -> AsyncEmailBackend:
+    if settings.email_backend == "smtp":
+        return SMTPEmailBackend(
+            host=settings.smtp_host,
+            port=settings.smtp_port,
+            sender=settings.email_sender,
+            username=settings.smtp_username,
+            password=settings.smtp_password,
+            starttls=settings.smtp_starttls,
+            timeout=settings.smtp_timeout_seconds,
+        )
+    return ConsoleEmailBackend()
+
+
+def welcome_email(recipient: str, full_name: str | None = None) -> EmailMessage:
+    greeting = f"Hi {full_name}," if full_name else "Hi,"
+    return EmailMessage(
+        subject=f"Welcome to {settings.project_name}",
+        recipient=recipient,
+        body=f"{greeting}\n\nYour account has been created. You can now sign in with {recipient}.\n",
+    )
+
 
 default_email_backend = ConsoleEmailBackend()
@@ -0,0 +1,443 @@
+"""Background delivery of outbound email.
+
+Handlers enqueue messages and return immediately; worker tasks started from the
+application lifespan drain the queue in batches, retry failed deliveries with
+exponential backoff and drop a message once it runs out of attempts.
+
+The in-memory queue is lost on restart. The Redis queue keeps messages in a
+ready list, a delayed sorted set and one in-flight list per process. Each
+process holds a lease on its in-flight list that a heartbeat renews; once a
+lease expires, because its process stopped or died, the next heartbeat of any
+other process puts that list back on the ready list. Delivery is at-least-once
+across restarts without every new worker re-sending what the others are
+sending.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Protocol, Sequence
+
+from app.core.config import settings
+from app.core.email import AsyncEmailBackend, EmailMessage, build_email_backend
+from app.core.metrics import registry
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+emails_total = registry.counter(
+    "emails_total",
+    "Outbound email delivery attempts by outcome.",
+    ["outcome"],
+)
+email_batch_duration_seconds = registry.histogram(
+    "email_batch_duration_seconds",
+    "Time spent delivering one batch of email.",
+)
+
+
+class EmailQueue(Protocol):
+    async def put(self, message: EmailMessage) -> None:
+        ...
+
+    async def get_batch(self, max_size: int) -> list[EmailMessage]:
+        """Wait for messages and return up to ``max_size``; may return an empty list."""
+        ...
+
+    async def ack(self, messages: Sequence[EmailMessage]) -> None:
+        """Forget messages that were delivered or given up on."""
+        ...
+
+    async def retry(self, message: EmailMessage, delay: float) -> None:
+        """Schedule another attempt; this also takes the message out of flight, so it is not acked."""
+        ...
+
+    async def recover(self) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+    def pending(self) -> int:
+        """Messages ready for delivery that only live in this process."""
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class InMemoryEmailQueue:
+    def __init__(self, *, max_size: int = 10_000) -> None:
+        self.max_size = max_size
+        self._queue: asyncio.Queue[EmailMessage] = asyncio.Queue()
+        self._delayed: set[asyncio.TimerHandle] = set()
+
+    def _put_nowait(self, message: EmailMessage) -> None:
+        if self._queue.qsize() >= self.max_size:
+            emails_total.inc(outcome="dropped")
+            logger.warning("Email queue is full, dropping message %s to %s", message.id, message.recipient)
+            return
+        self._queue.put_nowait(message)
+
+    async def put(self, message: EmailMessage) -> None:
+        self._put_nowait(message)
+
+    async def get_batch(self, max_size: int) -> list[EmailMessage]:
+        batch = [await self._queue.get()]
+        while len(batch) < max_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def ack(self, messages: Sequence[EmailMessage]) -> None:
+        return None
+
+    async def retry(self, message: EmailMessage, delay: float) -> None:
+        def requeue() -> None:
+            self._delayed.discard(handle)
+            self._put_nowait(message)
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._delayed.add(handle)
+
+    async def recover(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def __len__(self) -> int:
+        return self._queue.qsize() + len(self._delayed)
+
+    def clear(self) -> None:
+        for handle in self._delayed:
+            handle.cancel()
+        self._delayed.clear()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+
+# Move every delayed message whose retry time has passed onto the ready list.
+_PROMOTE_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, payload in ipairs(due) do
+  redis.call('ZREM', KEYS[1], payload)
+  redis.call('LPUSH', KEYS[2], payload)
+end
+return #due
+"""
+
+# Requeue the in-flight list of a consumer whose lease has expired.
+_RECLAIM_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  return 0
+end
+local moved = 0
+while redis.call('RPOPLPUSH', KEYS[2], KEYS[3]) do
+  moved = moved + 1
+end
+redis.call('SREM', KEYS[4], ARGV[1])
+return moved
+"""
+
+
+class RedisEmailQueue:
+    def __init__(
+        self,
+        *,
+        fallback: InMemoryEmailQueue,
+        prefix: str = "email:",
+        block_seconds: float = 1.0,
+        lease_seconds: float = 30.0,
+    ) -> None:
+        self.fallback = fallback
+        self.prefix = prefix
+        self.consumer = uuid.uuid4().hex
+        self.ready_key = prefix + "ready"
+        self.delayed_key = prefix + "delayed"
+        self.consumers_key = prefix + "consumers"
+        self.processing_key = self._processing_key(self.consumer)
+        self.lease_key = self._lease_key(self.consumer)
+        self.block_seconds = block_seconds
+        self.lease_seconds = lease_seconds
+        self._heartbeat: asyncio.Task | None = None
+
+    def _processing_key(self, consumer: str) -> str:
+        return f"{self.prefix}processing:{consumer}"
+
+    def _lease_key(self, consumer: str) -> str:
+        return f"{self.prefix}lease:{consumer}"
+
+    @staticmethod
+    def _dump(message: EmailMessage) -> str:
+        return json.dumps(
+            {
+                "id": message.id,
+                "subject": message.subject,
+                "recipient": message.recipient,
+                "body": message.body,
+                "attempts": message.attempts,
+            },
+            sort_keys=True,
+        )
+
+    @staticmethod
+    def _load(payload: str) -> EmailMessage:
+        return EmailMessage(**json.loads(payload), receipt=payload)
+
+    async def put(self, message: EmailMessage) -> None:
+        redis = get_redis()
+        if redis is None:
+            await self.fallback.put(message)
+            return
+        try:
+            await redis.lpush(self.ready_key, self._dump(message))
+        except Exception:
+            logger.warning("Redis email queue unavailable, queueing in memory", exc_info=True)
+            await self.fallback.put(message)
+
+    async def get_batch(self, max_size: int) -> list[EmailMessage]:
+        if self.fallback.pending():
+            return await self.fallback.get_batch(max_size)
+        redis = get_redis()
+        if redis is None:
+            return await self.fallback.get_batch(max_size)
+        try:
+            await redis.eval(_PROMOTE_DUE_SCRIPT, 2, self.delayed_key, self.ready_key, time.time())
+            payload = await redis.blmove(
+                self.ready_key, self.processing_key, self.block_seconds, "RIGHT", "LEFT"
+            )
+            if payload is None:
+                return []
+            payloads = [payload]
+            while len(payloads) < max_size:
+                payload = await redis.lmove(self.ready_key, self.processing_key, "RIGHT", "LEFT")
+                if payload is None:
+                    break
+                payloads.append(payload)
+        except Exception:
+            logger.warning("Redis email queue unavailable", exc_info=True)
+            await asyncio.sleep(self.block_seconds)
+            return []
+        return [self._load(payload) for payload in payloads]
+
+    async def ack(self, messages: Sequence[EmailMessage]) -> None:
+        receipts = [message.receipt for message in messages if message.receipt is not None]
+        redis = get_redis()
+        if not receipts or redis is None:
+            return
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for receipt in receipts:
+                    pipe.lrem(self.processing_key, 1, receipt)
+                await pipe.execute()
+        except Exception:
+            # Unacked messages stay in flight and are sent again once this
+            # worker's lease lapses: a duplicate rather than a loss.
+            logger.warning("Could not acknowledge %d email messages in Redis", len(receipts), exc_info=True)
+
+    async def retry(self, message: EmailMessage, delay: float) -> None:
+        redis = get_redis()
+        if redis is None or message.receipt is None:
+            await self.fallback.retry(message, delay)
+            return
+        try:
+            # Schedule the retry and leave flight in one step, so a crash in
+            # between can neither lose the message nor send it twice.
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.zadd(self.delayed_key, {self._dump(message): time.time() + delay})
+                pipe.lrem(self.processing_key, 1, message.receipt)
+                await pipe.execute()
+        except Exception:
+            # The receipt is kept, so the in-flight copy is acked once the
+            # in-memory retry is delivered or given up on.
+            logger.warning("Redis email queue unavailable, retrying in memory", exc_info=True)
+            await self.fallback.retry(message, delay)
+
+    async def _renew_lease(self, redis) -> None:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.set(self.lease_key, "1", px=int(self.lease_seconds * 1000))
+            pipe.sadd(self.consumers_key, self.consumer)
+            await pipe.execute()
+
+    async def _reclaim_expired(self, redis) -> int:
+        recovered = 0
+        for consumer in await redis.smembers(self.consumers_key):
+            if consumer == self.consumer:
+                continue
+            recovered += await redis.eval(
+                _RECLAIM_SCRIPT,
+                4,
+                self._lease_key(consumer),
+                self._processing_key(consumer),
+                self.ready_key,
+                self.consumers_key,
+                consumer,
+            )
+        if recovered:
+            logger.info("Requeued %d email messages left in flight by stopped workers", recovered)
+        return recovered
+
+    async def _keep_lease(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            redis = get_redis()
+            if redis is None:
+                continue
+            try:
+                await self._renew_lease(redis)
+                await self._reclaim_expired(redis)
+            except Exception:
+                logger.warning("Could not renew the email queue lease in Redis", exc_info=True)
+
+    async def recover(self) -> None:
+        """Take a lease on this process's in-flight list and requeue those of expired leases."""
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await self._renew_lease(redis)
+            await self._reclaim_expired(redis)
+        except Exception:
+            logger.warning("Could not recover in-flight email from Redis", exc_info=True)
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._keep_lease(), name="email-queue-lease")
+
+    async def close(self) -> None:
+        task, self._heartbeat = self._heartbeat, None
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            # Anything still in flight is handed to the other workers right away.
+            await redis.delete(self.lease_key)
+        except Exception:
+            logger.warning("Could not release the email queue lease in Redis", exc_info=True)
+
+    def pending(self) -> int:
+        return self.fallback.pending()
+
+    def __len__(self) -> int:
+        return len(self.fallback)
+
+    def clear(self) -> None:
+        self.fallback.clear()
+
+
+class EmailDispatcher:
+    def __init__(
+        self,
+        queue: EmailQueue,
+        backend: AsyncEmailBackend,
+        *,
+        workers: int = 2,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        backoff_seconds: float = 2.0,
+        max_backoff_seconds: float = 300.0,
+    ) -> None:
+        self.queue = queue
+        self.backend = backend
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._tasks: list[asyncio.Task] = []
+        self._in_flight = 0
+
+    async def enqueue(self, message: EmailMessage) -> None:
+        await self.queue.put(message)
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.max_backoff_seconds, self.backoff_seconds * 2 ** (attempts - 1))
+
+    async def deliver(self, batch: list[EmailMessage]) -> None:
+        started = time.perf_counter()
+        try:
+            failed = await self.backend.send_batch(batch)
+        except Exception:
+            logger.warning("Email batch of %d failed", len(batch), exc_info=True)
+            failed = list(batch)
+        email_batch_duration_seconds.observe(time.perf_counter() - started)
+
+        failed_ids = {id(message) for message in failed}
+        done = [message for message in batch if id(message) not in failed_ids]
+        emails_total.inc(len(done), outcome="sent")
+        for message in failed:
+            message.attempts += 1
+            if message.attempts >= self.max_attempts:
+                emails_total.inc(outcome="dropped")
+                logger.error(
+                    "Giving up on email %s to %s after %d attempts", message.id, message.recipient, message.attempts
+                )
+                done.append(message)
+                continue
+            emails_total.inc(outcome="retried")
+            await self.queue.retry(message, self.backoff(message.attempts))
+        await self.queue.ack(done)
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self.queue.get_batch(self.batch_size)
+            if not batch:
+                continue
+            self._in_flight += 1
+            try:
+                await self.deliver(batch)
+            except Exception:
+                logger.exception("Email worker failed to process a batch")
+            finally:
+                self._in_flight -= 1
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        await self.queue.recover()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"email-worker-{index}") for index in range(self.workers)
+        ]
+
+    async def stop(self, *, timeout: float = 5.0) -> None:
+        """Let workers drain what is ready for up to ``timeout`` seconds, then cancel them."""
+        deadline = time.monotonic() + timeout
+        while self._tasks and (self._in_flight or self.queue.pending()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.queue.close()
+        if len(self.queue):
+            logger.warning("Shutting down with %d undelivered email messages in memory", len(self.queue))
+
+
+def build_email_dispatcher() -> EmailDispatcher:
+    memory = InMemoryEmailQueue(max_size=settings.email_queue_max_size)
+    queue: EmailQueue = memory
+    if settings.email_queue_backend == "redis":
+        queue = RedisEmailQueue(fallback=memory, lease_seconds=settings.email_queue_lease_seconds)
+    return EmailDispatcher(
+        queue,
+        build_email_backend(),
+        workers=settings.email_workers,
+        batch_size=settings.email_batch_size,
+        max_attempts=settings.email_max_attempts,
+        backoff_seconds=settings.email_retry_backoff_seconds,
+        max_backoff_seconds=settings.email_retry_backoff_max_seconds,
+    )
+
+
+email_dispatcher = build_email_dispatcher()
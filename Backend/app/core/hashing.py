@@ -0,0 +1,144 @@
+"""Bounded executor for CPU-heavy password hashing.
+
+Argon2 deliberately burns CPU and memory, so running it inline inside an async
+handler stalls the event loop for every other request on the worker. The pool
+below moves the work onto a dedicated thread or process executor, caps how many
+jobs may wait for it and records how long jobs queue and run.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Literal, TypeVar
+
+from app.core.metrics import registry
+from app.core.profiling import record_span
+
+T = TypeVar("T")
+
+ExecutorKind = Literal["thread", "process"]
+
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+hash_queue_wait_seconds = registry.histogram(
+    "password_hash_queue_wait_seconds",
+    "Time password hashing jobs spent waiting for a free executor slot.",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+hash_duration_seconds = registry.histogram(
+    "password_hash_duration_seconds",
+    "Time spent computing or verifying a password hash.",
+    ["operation"],
+    buckets=HASH_BUCKETS,
+)
+hash_pending = registry.gauge(
+    "password_hash_pending",
+    "Password hashing jobs currently queued or running.",
+)
+hash_rejected_total = registry.counter(
+    "password_hash_rejected_total",
+    "Password hashing jobs rejected because the pool was saturated.",
+    ["operation"],
+)
+
+
+class PasswordHashPoolSaturated(Exception):
+    """Raised when the hashing pool has no room for another job."""
+
+
+def _timed_call(fn: Callable[..., T], *args: Any) -> tuple[float, float, T]:
+    # Wall-clock timestamps so the measurement also works across processes.
+    started = time.time()
+    result = fn(*args)
+    return started, time.time(), result
+
+
+def default_worker_count() -> int:
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+class PasswordHashPool:
+    def __init__(
+        self,
+        *,
+        kind: ExecutorKind = "thread",
+        max_workers: int | None = None,
+        max_queue: int = 64,
+    ) -> None:
+        self.kind = kind
+        self.max_workers = max_workers or default_worker_count()
+        self.max_queue = max(0, max_queue)
+        self._executor: Executor | None = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def run(self, operation: str, fn: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.capacity:
+            hash_rejected_total.inc(operation=operation)
+            raise PasswordHashPoolSaturated("Password hashing capacity exhausted")
+        return await self._submit(operation, fn, *args)
+
+    async def map(self, operation: str, fn: Callable[..., T], items: Iterable[Any]) -> list[T]:
+        """Run ``fn`` over ``items`` for bulk jobs.
+
+        Bulk callers wait for a free worker instead of being rejected, but never
+        hold more than ``max_workers`` jobs in flight, so interactive requests
+        still find room in the queue.
+        """
+        slots = asyncio.Semaphore(self.max_workers)
+
+        async def bounded(item: Any) -> T:
+            async with slots:
+                return await self._submit(operation, fn, item)
+
+        return list(await asyncio.gather(*(bounded(item) for item in items)))
+
+    async def _submit(self, operation: str, fn: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        hash_pending.inc()
+        submitted = time.time()
+        submitted_counter = time.perf_counter()
+        try:
+            started, finished, result = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, *args
+            )
+        finally:
+            self._pending -= 1
+            hash_pending.dec()
+
+        waited = max(0.0, started - submitted)
+        hash_queue_wait_seconds.observe(waited, operation=operation)
+        hash_duration_seconds.observe(max(0.0, finished - started), operation=operation)
+        record_span(
+            "password_hash",
+            operation,
+            submitted_counter,
+            time.perf_counter() - submitted_counter,
+            f"waited {waited * 1000:.1f} ms for a worker",
+        )
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
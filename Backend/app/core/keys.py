@@ -0,0 +1,115 @@
+"""Asymmetric signing keys for access tokens.
+
+Keys are PEM files listed in ``JWT_PRIVATE_KEY_FILES``. The first key signs new
+tokens; every listed key verifies tokens and is published at
+``/.well-known/jwks.json``, so a key can be published before it starts signing
+and kept until the last token it signed has expired. Files may hold public keys
+only, for retired keys whose private half has been destroyed.
+
+Each token names its key in the ``kid`` header (the RFC 7638 thumbprint). PEMs
+are parsed once at startup into key objects, so verification never re-parses.
+"""
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from app.core.conditional import make_etag
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from jose.backends.base import Key
+
+_EC_ALGORITHMS = {"secp256r1": "ES256", "secp384r1": "ES384", "secp521r1": "ES512"}
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y")}
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    algorithm: str
+    public_key: "Key"
+    private_key: "Key | None"
+    jwk: dict[str, Any]
+
+
+def _algorithm_for(key: Any) -> str:
+    from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, rsa
+
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        try:
+            return _EC_ALGORITHMS[key.curve.name]
+        except KeyError:
+            raise ValueError(f"Unsupported elliptic curve {key.curve.name}") from None
+    eddsa_types = (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey, ed448.Ed448PrivateKey, ed448.Ed448PublicKey)
+    if isinstance(key, eddsa_types):
+        raise ValueError("EdDSA keys are not supported by python-jose; use an RSA or EC key")
+    raise ValueError(f"Unsupported key type {type(key).__name__}")
+
+
+def _thumbprint(public_jwk: dict[str, Any]) -> str:
+    members = {name: public_jwk[name] for name in _THUMBPRINT_MEMBERS[public_jwk["kty"]]}
+    canonical = json.dumps(members, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(hashlib.sha256(canonical).digest()).rstrip(b"=").decode()
+
+
+def load_signing_key(pem: bytes) -> SigningKey:
+    # Only deployments that configure key files pay for importing cryptography.
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+    from jose import jwk
+
+    try:
+        parsed, is_private = load_pem_private_key(pem, password=None), True
+    except ValueError:
+        parsed, is_private = load_pem_public_key(pem), False
+    algorithm = _algorithm_for(parsed)
+
+    private_key = jwk.construct(pem, algorithm) if is_private else None
+    public_key = private_key.public_key() if private_key is not None else jwk.construct(pem, algorithm)
+
+    public_jwk = {name: value for name, value in public_key.to_dict().items() if name != "alg"}
+    kid = _thumbprint(public_jwk)
+    return SigningKey(
+        kid=kid,
+        algorithm=algorithm,
+        public_key=public_key,
+        private_key=private_key,
+        jwk={**public_jwk, "kid": kid, "alg": algorithm, "use": "sig"},
+    )
+
+
+class KeyRing:
+    def __init__(self, keys: list[SigningKey]) -> None:
+        if keys and keys[0].private_key is None:
+            raise ValueError("The first JWT key signs tokens and must include its private key")
+        self.keys = keys
+        self._by_kid = {key.kid: key for key in keys}
+        self.jwks = {"keys": [key.jwk for key in keys]}
+        self.jwks_json = json.dumps(self.jwks, separators=(",", ":")).encode()
+        self.jwks_etag = make_etag(self.jwks_json.decode())
+
+    def __bool__(self) -> bool:
+        return bool(self.keys)
+
+    @property
+    def active(self) -> SigningKey:
+        return self.keys[0]
+
+    @property
+    def algorithms(self) -> list[str]:
+        return sorted({key.algorithm for key in self.keys})
+
+    def get(self, kid: str | None) -> SigningKey | None:
+        return self._by_kid.get(kid) if kid else None
+
+    @classmethod
+    def from_files(cls, paths: list[str]) -> "KeyRing":
+        return cls([load_signing_key(Path(path).read_bytes()) for path in paths])
+
+
+key_ring = KeyRing.from_files(settings.jwt_private_key_files)
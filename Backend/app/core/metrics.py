@@ -0,0 +1,243 @@
+"""In-process metrics primitives.
+
+Counters, gauges and histograms live in memory for the lifetime of the worker
+process. They are deliberately dependency free so they can be recorded from
+hot paths without measurable overhead.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Iterable
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+LabelValues = tuple[str, ...]
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[tuple[LabelValues, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[tuple[LabelValues, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+
+@dataclass
+class HistogramSnapshot:
+    buckets: tuple[float, ...]
+    counts: list[int]
+    count: int = 0
+    sum: float = 0.0
+
+
+@dataclass
+class _HistogramState:
+    counts: list[int]
+    count: int = 0
+    sum: float = 0.0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._states: dict[LabelValues, _HistogramState] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = _HistogramState(counts=[0] * (len(self.buckets) + 1))
+            state.counts[index] += 1
+            state.count += 1
+            state.sum += value
+
+    def snapshot(self, **labels: str) -> HistogramSnapshot:
+        key = self._key(labels)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return HistogramSnapshot(buckets=self.buckets, counts=[0] * (len(self.buckets) + 1))
+            return HistogramSnapshot(
+                buckets=self.buckets, counts=list(state.counts), count=state.count, sum=state.sum
+            )
+
+    def samples(self) -> list[tuple[LabelValues, HistogramSnapshot]]:
+        with self._lock:
+            return [
+                (
+                    key,
+                    HistogramSnapshot(
+                        buckets=self.buckets, counts=list(state.counts), count=state.count, sum=state.sum
+                    ),
+                )
+                for key, state in self._states.items()
+            ]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+        self._lock = Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different shape")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes gauges right before they are read."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> list[_Metric]:
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            collector()
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for metric in self.collect():
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                for values, snapshot in metric.samples():
+                    cumulative = 0
+                    for bound, count in zip((*snapshot.buckets, float("inf")), snapshot.counts):
+                        cumulative += count
+                        labels = _format_labels(
+                            (*metric.labelnames, "le"), (*values, _format_value(bound))
+                        )
+                        lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                    labels = _format_labels(metric.labelnames, values)
+                    lines.append(f"{metric.name}_sum{labels} {_format_value(snapshot.sum)}")
+                    lines.append(f"{metric.name}_count{labels} {snapshot.count}")
+            else:
+                for values, value in metric.samples():  # type: ignore[attr-defined]
+                    labels = _format_labels(metric.labelnames, values)
+                    lines.append(f"{metric.name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
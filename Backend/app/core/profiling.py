@@ -0,0 +1,214 @@
+"""Opt-in profiles of individual requests.
+
+A request is profiled when it carries a valid ``X-Profile-Token`` or is picked
+by ``profiling_sample_rate``. While it runs, a sampler thread records the event
+loop thread's stack every ``profiling_sample_interval_seconds``, and the SQL and
+password hashing hooks add timed spans to the request's profile. Finished
+profiles go into a bounded in-memory ring buffer that superusers read through
+``/profiles``.
+
+One request per worker is profiled at a time; others that ask while the
+sampler is busy run unprofiled. The stack samples cover everything the event
+loop did meanwhile, so concurrent requests can show up in them, while spans
+belong to the profiled request only. With profiling off the middleware is not
+installed and the hooks cost one context variable lookup.
+"""
+
+import hashlib
+import hmac
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import FrameType
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+MAX_SPANS = 1000
+MAX_SPAN_DETAIL = 500
+
+profiles_total = registry.counter(
+    "profiles_total",
+    "Requests that asked to be profiled, by trigger and outcome.",
+    ["trigger", "outcome"],
+)
+
+
+@dataclass
+class Span:
+    kind: str
+    name: str
+    start: float
+    duration: float
+    detail: str | None = None
+
+
+@dataclass
+class RequestProfile:
+    trigger: str
+    method: str
+    path: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started: float = field(default_factory=time.perf_counter)
+    route: str | None = None
+    status: int | None = None
+    duration: float = 0.0
+    spans: list[Span] = field(default_factory=list)
+    spans_dropped: int = 0
+    samples: Counter[str] = field(default_factory=Counter)
+    truncated: bool = False
+    closed: bool = False
+
+    def add_span(self, kind: str, name: str, started: float, duration: float, detail: str | None = None) -> None:
+        """Record a span that began at ``started`` (a ``time.perf_counter`` value)."""
+        if self.closed:
+            return  # e.g. queries made while a finished response keeps streaming
+        if len(self.spans) >= MAX_SPANS:
+            self.spans_dropped += 1
+            return
+        if detail is not None:
+            detail = detail[:MAX_SPAN_DETAIL]
+        self.spans.append(Span(kind, name, started - self.started, duration, detail))
+
+    def span_seconds(self, kind: str) -> float:
+        return sum(span.duration for span in self.spans if span.kind == kind)
+
+    def span_count(self, kind: str) -> int:
+        return sum(1 for span in self.spans if span.kind == kind)
+
+    def folded(self) -> str:
+        """Stack samples in the folded format read by flame graph tools."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+current_profile: ContextVar[RequestProfile | None] = ContextVar("current_profile", default=None)
+
+
+def record_span(kind: str, name: str, started: float, duration: float, detail: str | None = None) -> None:
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add_span(kind, name, started, duration, detail)
+
+
+def _frame_name(frame: FrameType) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+def _fold(frame: FrameType | None) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Samples one thread's stack from a background thread until stopped."""
+
+    def __init__(self, profile: RequestProfile, *, interval: float, max_seconds: float) -> None:
+        self.profile = profile
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.target = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stopped.wait(self.interval):
+            if time.monotonic() >= deadline:
+                self.profile.truncated = True
+                return
+            frame = sys._current_frames().get(self.target)
+            if frame is not None:
+                self.profile.samples[_fold(frame)] += 1
+
+
+class Profiler:
+    def __init__(
+        self,
+        *,
+        max_profiles: int = 50,
+        sample_rate: float = 0.0,
+        interval: float = 0.001,
+        max_seconds: float = 30.0,
+        secret: str = "",
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._secret = secret.encode()
+        self._profiles: deque[RequestProfile] = deque(maxlen=max_profiles)
+        self._busy = threading.Lock()
+
+    def _signature(self, expires: str) -> str:
+        return hmac.new(self._secret, f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+
+    def create_token(self, ttl_seconds: int) -> tuple[str, int]:
+        """Return a header token accepted until the returned Unix time."""
+        expires = int(time.time()) + ttl_seconds
+        return f"{expires}.{self._signature(str(expires))}", expires
+
+    def verify_token(self, token: str) -> bool:
+        expires, _, signature = token.partition(".")
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        return hmac.compare_digest(signature, self._signature(expires))
+
+    def begin(self, trigger: str, method: str, path: str) -> StackSampler | None:
+        """Start sampling for a request, or return ``None`` if another one holds the sampler."""
+        if not self._busy.acquire(blocking=False):
+            profiles_total.inc(trigger=trigger, outcome="busy")
+            return None
+        sampler = StackSampler(
+            RequestProfile(trigger=trigger, method=method, path=path),
+            interval=self.interval,
+            max_seconds=self.max_seconds,
+        )
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: StackSampler, *, route: str, status: int) -> RequestProfile:
+        try:
+            sampler.stop()
+        finally:
+            self._busy.release()
+        profile = sampler.profile
+        profile.closed = True
+        profile.duration = time.perf_counter() - profile.started
+        profile.route = route
+        profile.status = status
+        self._profiles.append(profile)
+        profiles_total.inc(trigger=profile.trigger, outcome="recorded")
+        return profile
+
+    def profiles(self) -> list[RequestProfile]:
+        return list(reversed(self._profiles))
+
+    def get(self, profile_id: str) -> RequestProfile | None:
+        return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+
+profiler = Profiler(
+    max_profiles=settings.profiling_max_profiles,
+    sample_rate=settings.profiling_sample_rate,
+    interval=settings.profiling_sample_interval_seconds,
+    max_seconds=settings.profiling_max_seconds,
+    secret=settings.profiling_secret or settings.jwt_secret_key,
+)
@@ -0,0 +1,112 @@
+"""Sliding-window rate limiting.
+
+Each key may be hit ``limit`` times within any ``window`` seconds. The Redis
+backend shares counters across workers using a sorted set per key; the
+in-memory backend serves single-node deployments and tests, and also takes over
+whenever Redis is unreachable so a Redis outage never locks users out.
+"""
+
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Protocol
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+rate_limited_total = registry.counter(
+    "rate_limited_total",
+    "Requests rejected by the rate limiter.",
+    ["scope"],
+)
+
+# Atomically drop hits older than the window, then record this hit if there is
+# room. Returns 0 when allowed, otherwise the milliseconds until a slot frees up.
+_SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) < limit then
+  redis.call('ZADD', key, now, ARGV[4])
+  redis.call('PEXPIRE', key, window)
+  return 0
+end
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+return math.max(1, tonumber(oldest[2]) + window - now)
+"""
+
+
+class RateLimiter(Protocol):
+    async def hit(self, key: str, *, limit: int, window: float) -> float | None:
+        """Record a hit; return ``None`` if allowed or the seconds to wait if not."""
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class InMemoryRateLimiter:
+    def __init__(self, *, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._hits: TTLCache[str, deque[float]] = TTLCache(max_entries=max_keys)
+
+    async def hit(self, key: str, *, limit: int, window: float) -> float | None:
+        now = time.monotonic()
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = deque()
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        if len(hits) >= limit:
+            return max(0.001, hits[0] + window - now)
+        hits.append(now)
+        self._hits.set(key, hits, expires_at=time.time() + window)
+        return None
+
+    def clear(self) -> None:
+        self._hits.clear()
+
+
+class RedisRateLimiter:
+    def __init__(self, *, fallback: InMemoryRateLimiter, prefix: str = "ratelimit:") -> None:
+        self.fallback = fallback
+        self.prefix = prefix
+
+    async def hit(self, key: str, *, limit: int, window: float) -> float | None:
+        redis = get_redis()
+        if redis is None:
+            return await self.fallback.hit(key, limit=limit, window=window)
+        try:
+            wait_ms = await redis.eval(
+                _SLIDING_WINDOW_SCRIPT,
+                1,
+                self.prefix + key,
+                int(time.time() * 1000),
+                int(window * 1000),
+                limit,
+                uuid.uuid4().hex,
+            )
+        except Exception:
+            logger.warning("Redis rate limiter unavailable, using in-memory limits", exc_info=True)
+            return await self.fallback.hit(key, limit=limit, window=window)
+        return None if int(wait_ms) == 0 else int(wait_ms) / 1000
+
+    def clear(self) -> None:
+        self.fallback.clear()
+
+
+def build_rate_limiter() -> RateLimiter:
+    memory = InMemoryRateLimiter()
+    if settings.rate_limit_backend == "redis":
+        return RedisRateLimiter(fallback=memory)
+    return memory
+
+
+rate_limiter = build_rate_limiter()
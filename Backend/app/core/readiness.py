@@ -0,0 +1,97 @@
+"""Background readiness checks.
+
+Dependencies are probed on a fixed interval by a single background task and
+probes are answered from the cached results, so a probe never opens a
+connection and a burst of probes never adds load on the database.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+Check = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class CheckResult:
+    ok: bool
+    checked_at: float
+    duration_seconds: float
+    error: str | None = None
+
+
+class ReadinessMonitor:
+    def __init__(self, checks: dict[str, Check], *, interval: float, timeout: float) -> None:
+        self.checks = checks
+        self.interval = interval
+        self.timeout = timeout
+        self.results: dict[str, CheckResult] = {}
+        self._task: asyncio.Task | None = None
+
+    async def _run_check(self, name: str, check: Check) -> None:
+        started = time.monotonic()
+        error = None
+        try:
+            await asyncio.wait_for(check(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout}s"
+        except Exception as exc:
+            error = type(exc).__name__
+            logger.warning("Readiness check %s failed", name, exc_info=True)
+        self.results[name] = CheckResult(
+            ok=error is None,
+            checked_at=time.monotonic(),
+            duration_seconds=time.monotonic() - started,
+            error=error,
+        )
+
+    async def run_checks(self) -> None:
+        await asyncio.gather(*(self._run_check(name, check) for name, check in self.checks.items()))
+
+    async def _loop(self) -> None:
+        while True:
+            await self.run_checks()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="readiness-monitor")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def snapshot(self) -> tuple[bool, dict[str, Any]]:
+        now = time.monotonic()
+        # Results older than a few intervals mean the monitor itself is stuck.
+        max_age = self.interval * 3 + self.timeout
+        checks: dict[str, Any] = {}
+        ready = bool(self.checks)
+        for name in self.checks:
+            result = self.results.get(name)
+            if result is None:
+                checks[name] = {"ok": False, "error": "not checked yet"}
+                ready = False
+                continue
+            age = now - result.checked_at
+            ok = result.ok and age <= max_age
+            checks[name] = {
+                "ok": ok,
+                "age_seconds": round(age, 3),
+                "duration_seconds": round(result.duration_seconds, 4),
+            }
+            if result.error:
+                checks[name]["error"] = result.error
+            elif not ok:
+                checks[name]["error"] = "stale result"
+            ready = ready and ok
+        return ready, {"status": "ok" if ready else "unavailable", "checks": checks}
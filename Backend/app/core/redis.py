@@ -0,0 +1,47 @@
+"""Shared Redis client.
+
+Redis is optional: features that can use it fall back to in-process state when
+``settings.redis_url`` is unset. The client is created lazily so importing the
+app never opens a connection.
+"""
+
+from typing import TYPE_CHECKING
+
+from app.core.config import Settings, settings
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+_client: "Redis | None" = None
+
+
+def get_redis() -> "Redis | None":
+    global _client
+    if _client is None and settings.redis_url:
+        from redis.asyncio import Redis
+
+        _client = Redis.from_url(settings.redis_url, decode_responses=True)
+    return _client
+
+
+def redis_features(config: Settings) -> list[str]:
+    """Settings that select a Redis-backed feature; Redis is only needed when this is non-empty."""
+    features = []
+    if config.refresh_token_store == "redis":
+        features.append("REFRESH_TOKEN_STORE")
+    if config.rate_limit_enabled and config.rate_limit_backend == "redis":
+        features.append("RATE_LIMIT_BACKEND")
+    if config.principal_cache_redis:
+        features.append("PRINCIPAL_CACHE_REDIS")
+    if config.email_queue_backend == "redis":
+        features.append("EMAIL_QUEUE_BACKEND")
+    if config.user_changes_backend == "redis":
+        features.append("USER_CHANGES_BACKEND")
+    return features
+
+
+async def close_redis() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
@@ -1,12 +1,68 @@
+import hashlib
+import hmac
+import secrets
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from functools import cache
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from jose.exceptions import JWTError
 
+from app.core import keys
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.hashing import PasswordHashPool
+from app.core.metrics import registry
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+if TYPE_CHECKING:
+    from types import ModuleType
+
+    from passlib.context import CryptContext
+
+
+# passlib/argon2 and the jose signing backends (which pull in cryptography) are
+# imported on first use rather than at startup, keeping worker boot fast.
+@cache
+def _password_context() -> "CryptContext":
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["argon2"], deprecated="auto")
+
+
+@cache
+def _jwt() -> "ModuleType":
+    from jose import jwt
+
+    return jwt
+
+
+def __getattr__(name: str) -> Any:
+    if name == "pwd_context":
+        return _password_context()
+    if name == "jwt":
+        return _jwt()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+password_hash_pool = PasswordHashPool(
+    kind=settings.password_hash_executor,
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
+
+# Verified claims keyed by an HMAC of the token under the verifying secret, so a
+# hit proves the same secret already accepted the exact same token. Tokens
+# verified against the key ring share one random per-process namespace.
+verified_token_cache: TTLCache[bytes, dict[str, Any]] = TTLCache(
+    max_entries=settings.token_cache_max_entries
+)
+token_cache_lookups_total = registry.counter(
+    "jwt_verify_cache_lookups_total",
+    "Verified-token cache lookups by result.",
+    ["result"],
+)
+
+
+_KEY_RING_CACHE_NAMESPACE = secrets.token_bytes(32)
 
 
 class AuthenticationError(Exception):
@@ -14,15 +70,30 @@ class AuthenticationError(Exception):
 
 
 def create_token(
-    *, subject: str, expires_delta: timedelta, secret: str, algorithm: str
+    *,
+    subject: str,
+    expires_delta: timedelta,
+    secret: Any,
+    algorithm: str,
+    claims: dict[str, Any] | None = None,
+    headers: dict[str, Any] | None = None,
 ) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"sub": subject, "exp": expire}
-    return jwt.encode(to_encode, secret, algorithm=algorithm)
+    to_encode = {**(claims or {}), "sub": subject, "exp": expire}
+    return _jwt().encode(to_encode, secret, algorithm=algorithm, headers=headers)
 
 
 def create_access_token(subject: str, expires_minutes: Optional[int] = None) -> str:
     minutes = expires_minutes or settings.access_token_expire_minutes
+    if keys.key_ring:
+        signing_key = keys.key_ring.active
+        return create_token(
+            subject=subject,
+            expires_delta=timedelta(minutes=minutes),
+            secret=signing_key.private_key,
+            algorithm=signing_key.algorithm,
+            headers={"kid": signing_key.kid},
+        )
     return create_token(
         subject=subject,
         expires_delta=timedelta(minutes=minutes),
@@ -31,26 +102,73 @@ def create_access_token(subject: str, expires_minutes: Optional[int] = None) ->
     )
 
 
-def create_refresh_token(subject: str, expires_minutes: Optional[int] = None) -> str:
+def create_refresh_token(
+    subject: str, expires_minutes: Optional[int] = None, *, claims: dict[str, Any] | None = None
+) -> str:
     minutes = expires_minutes or settings.refresh_token_expire_minutes
     return create_token(
         subject=subject,
         expires_delta=timedelta(minutes=minutes),
         secret=settings.jwt_refresh_secret_key,
         algorithm=settings.jwt_algorithm,
+        claims=claims,
     )
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _password_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _password_context().hash(password)
 
 
-def decode_token(token: str, *, secret: str) -> dict[str, Any]:
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run("hash", get_password_hash, password)
+
+
+async def get_password_hashes_async(passwords: list[str]) -> list[str]:
+    return await password_hash_pool.map("hash", get_password_hash, passwords)
+
+
+def _decode_cached(token: str, namespace: bytes, verify: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+    cache_key = hmac.new(namespace, token.encode(), hashlib.sha256).digest()
+    claims = verified_token_cache.get(cache_key)
+    if claims is not None:
+        token_cache_lookups_total.inc(result="hit")
+        return dict(claims)
+    token_cache_lookups_total.inc(result="miss")
+
     try:
-        return jwt.decode(token, secret, algorithms=[settings.jwt_algorithm])
+        claims = verify()
     except JWTError as exc:
         raise AuthenticationError("Could not validate credentials") from exc
+
+    expires_at = claims.get("exp")
+    if isinstance(expires_at, (int, float)):
+        verified_token_cache.set(cache_key, claims, expires_at=float(expires_at))
+    return dict(claims)
+
+
+def decode_token(token: str, *, secret: str) -> dict[str, Any]:
+    return _decode_cached(
+        token, secret.encode(), lambda: _jwt().decode(token, secret, algorithms=[settings.jwt_algorithm])
+    )
+
+
+def _verify_with_key_ring(token: str) -> dict[str, Any]:
+    jwt = _jwt()
+    signing_key = keys.key_ring.get(jwt.get_unverified_header(token).get("kid"))
+    if signing_key is None:
+        raise JWTError("Unknown signing key")
+    return jwt.decode(token, signing_key.public_key, algorithms=[signing_key.algorithm])
+
+
+def decode_access_token(token: str) -> dict[str, Any]:
+    if not keys.key_ring:
+        return decode_token(token, secret=settings.jwt_secret_key)
+    return _decode_cached(token, _KEY_RING_CACHE_NAMESPACE, lambda: _verify_with_key_ring(token))
@@ -0,0 +1,66 @@
+"""SQLAlchemy event hooks that record query counts and durations, and profile spans."""
+
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.metrics import registry
+from app.core.profiling import record_span
+
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+db_queries_total = registry.counter(
+    "db_queries_total",
+    "SQL statements executed by operation.",
+    ["operation"],
+)
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by operation.",
+    ["operation"],
+    buckets=QUERY_BUCKETS,
+)
+
+_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "COPY", "WITH"})
+
+
+def statement_operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in _OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    operation = statement_operation(statement)
+    db_queries_total.inc(operation=operation)
+    db_query_duration_seconds.observe(elapsed, operation=operation)
+    # Statements only, never their parameters.
+    record_span("db", operation, started, elapsed, statement)
+
+
+def _handle_error(exception_context: Any) -> None:
+    # Drop the start time of the failed statement so the stack stays balanced.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def instrument_engine(engine: AsyncEngine | Engine) -> None:
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
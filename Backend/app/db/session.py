@@ -1,12 +1,327 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import itertools
+import time
+from typing import Any, Callable
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import registry
+from app.db.instrumentation import instrument_engine
+
+POOL_CHECKOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+pool_checkout_seconds = registry.histogram(
+    "db_pool_checkout_seconds",
+    "Time spent acquiring a connection from the pool, including new connects and pre-ping.",
+    buckets=POOL_CHECKOUT_BUCKETS,
+)
+pool_checkout_failures_total = registry.counter(
+    "db_pool_checkout_failures_total",
+    "Pool checkouts that failed, including pool timeouts.",
+)
+pool_connections = registry.gauge(
+    "db_pool_connections",
+    "Pooled connections by database and state.",
+    ["database", "state"],
+)
+session_routes_total = registry.counter(
+    "db_session_routes_total",
+    "Read sessions opened per target database.",
+    ["target"],
+)
+connection_hold_seconds = registry.histogram(
+    "db_connection_hold_seconds",
+    "Time a request session held a pooled connection, by method and route template.",
+    ["method", "route"],
+    buckets=POOL_CHECKOUT_BUCKETS,
+)
+
+WROTE_KEY = "wrote"
+HELD_SINCE_KEY = "connection_held_since"
+HELD_SECONDS_KEY = "connection_held_seconds"
+
+SessionFactory = Callable[[], AsyncSession]
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long each checkout waits."""
+
+    def connect(self):  # type: ignore[override]
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except Exception:
+            pool_checkout_failures_total.inc()
+            raise
+        finally:
+            pool_checkout_seconds.observe(time.perf_counter() - started)
+
+
+def engine_options(database_url: str) -> dict[str, Any]:
+    url = make_url(database_url)
+    options: dict[str, Any] = {
+        "echo": settings.db_echo,
+        "future": True,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if url.get_backend_name() == "sqlite":
+        # SQLite picks its own pool class; queue sizing does not apply.
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    if url.get_driver_name() == "asyncpg" and settings.db_statement_cache_size is not None:
+        options["connect_args"] = {"statement_cache_size": settings.db_statement_cache_size}
+    return options
+
+
+def build_engine(database_url: str) -> AsyncEngine:
+    url = make_url(database_url)
+    if url.get_driver_name() == "asyncpg" and settings.db_statement_cache_size is not None:
+        # SQLAlchemy keeps its own prepared statement cache on top of asyncpg's.
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.db_statement_cache_size)}
+        )
+    return create_async_engine(url, **engine_options(database_url))
+
+
+def pool_status(pool: Pool) -> dict[str, Any]:
+    status: dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    return status
+
+
+class ReplicaRouter:
+    """Session factory that spreads read-only sessions across replica engines.
+
+    ``round_robin`` cycles through the replicas; ``least_loaded`` picks the one
+    with the fewest checked-out connections. Without replicas every session
+    goes to the primary factory.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        *,
+        primary: async_sessionmaker[AsyncSession],
+        strategy: str = "round_robin",
+    ) -> None:
+        self.engines = engines
+        self.primary = primary
+        self.strategy = strategy
+        self._factories = [
+            async_sessionmaker(replica, expire_on_commit=False, class_=AsyncSession) for replica in engines
+        ]
+        self._cycle = itertools.cycle(range(len(engines)))
+
+    @property
+    def has_replicas(self) -> bool:
+        return bool(self._factories)
+
+    def _choose(self) -> int:
+        start = next(self._cycle)
+        if self.strategy != "least_loaded":
+            return start
+        order = [(start + offset) % len(self._factories) for offset in range(len(self._factories))]
+        return min(order, key=lambda index: _checked_out(self.engines[index].pool))
+
+    def __call__(self) -> AsyncSession:
+        if not self._factories:
+            session_routes_total.inc(target="primary")
+            return self.primary()
+        session_routes_total.inc(target="replica")
+        return self._factories[self._choose()]()
+
+
+def _checked_out(pool: Pool) -> int:
+    return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+
+class ReadYourWritesTracker:
+    """Remembers which clients wrote recently so their reads stay on the primary.
+
+    State is per process; with several workers, clients should be pinned to a
+    worker by the load balancer or the window should exceed replica lag.
+    """
+
+    def __init__(self, *, window_seconds: float, max_clients: int = 100_000) -> None:
+        self._recent: TTLCache[str, bool] = TTLCache(max_entries=max_clients, ttl=window_seconds)
+
+    def mark(self, client_key: str) -> None:
+        self._recent.set(client_key, True)
+
+    def is_sticky(self, client_key: str) -> bool:
+        return self._recent.get(client_key) is not None
+
+    def clear(self) -> None:
+        self._recent.clear()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session: Session, flush_context: Any) -> None:
+    session.info[WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_write(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[WROTE_KEY] = True
+
+
+@event.listens_for(Session, "after_begin")
+def _mark_connection_acquired(session: Session, transaction: Any, connection: Any) -> None:
+    session.info.setdefault(HELD_SINCE_KEY, time.perf_counter())
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _mark_connection_released(session: Session, transaction: Any) -> None:
+    # Only the outermost transaction returns the connection to the pool.
+    if transaction.parent is None and HELD_SINCE_KEY in session.info:
+        held = time.perf_counter() - session.info.pop(HELD_SINCE_KEY)
+        session.info[HELD_SECONDS_KEY] = session.info.get(HELD_SECONDS_KEY, 0.0) + held
+
+
+class LazySession:
+    """Request session that is only created when something uses it.
+
+    Attribute access is forwarded to an ``AsyncSession`` opened on first use,
+    which in turn checks out a connection on its first statement. Requests that
+    fail authentication or are answered from a cache never touch the pool.
+    ``release`` closes the session as soon as the caller is done with it and
+    records how long a connection was held.
+    """
+
+    def __init__(self, factory: SessionFactory, *, method: str, route: str) -> None:
+        self._factory = factory
+        self._session: AsyncSession | None = None
+        self._labels = {"method": method, "route": route}
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    @property
+    def wrote(self) -> bool:
+        return self._session is not None and bool(self._session.info.get(WROTE_KEY))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.session, name)
+
+    async def release(self) -> None:
+        """Close the session, rolling back anything uncommitted. Safe to call repeatedly."""
+        if self._session is None:
+            return
+        await self._session.close()
+        held = self._session.info.pop(HELD_SECONDS_KEY, None)
+        if held is not None:
+            connection_hold_seconds.observe(held, **self._labels)
+
+
+class Database:
+    """Engines and session factories for the configured primary and replicas."""
+
+    def __init__(self, database_url: str, replica_urls: list[str]) -> None:
+        self.engine = build_engine(database_url)
+        self.replica_engines = [build_engine(url) for url in replica_urls]
+        self.session_factory = async_sessionmaker(self.engine, expire_on_commit=False, class_=AsyncSession)
+        self.read_router = ReplicaRouter(
+            self.replica_engines, primary=self.session_factory, strategy=settings.replica_routing
+        )
+        if settings.metrics_enabled or settings.profiling_enabled:
+            for database_engine in self.engines:
+                instrument_engine(database_engine)
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        return [self.engine, *self.replica_engines]
+
+    async def dispose(self) -> None:
+        for database_engine in self.engines:
+            await database_engine.dispose()
+
+
+# Built on first use rather than at import, so importing the app stays cheap
+# (no driver imports) and the DSN is read when the process actually starts.
+_database: Database | None = None
+
+
+def get_database() -> Database:
+    global _database
+    if _database is None:
+        _database = Database(settings.database_url, settings.database_replica_urls)
+    return _database
+
+
+def get_engine() -> AsyncEngine:
+    return get_database().engine
+
+
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return get_database().session_factory
+
+
+def get_read_router() -> ReplicaRouter:
+    return get_database().read_router
+
+
+async def dispose_database() -> None:
+    global _database
+    database, _database = _database, None
+    if database is not None:
+        await database.dispose()
+
+
+def reset_after_fork() -> None:
+    """Drop pooled connections inherited from a parent process without closing its sockets."""
+    if _database is not None:
+        for database_engine in _database.engines:
+            database_engine.sync_engine.dispose(close=False)
+
+
+read_your_writes = ReadYourWritesTracker(window_seconds=settings.read_your_writes_seconds)
+
+
+def _collect_pool_stats() -> None:
+    if _database is None:
+        return
+    databases = [("primary", _database.engine)] + [
+        (f"replica{index}", replica) for index, replica in enumerate(_database.replica_engines)
+    ]
+    for name, database_engine in databases:
+        status = pool_status(database_engine.pool)
+        for state in ("checked_in", "checked_out", "overflow"):
+            if state in status:
+                pool_connections.set(status[state], database=name, state=state)
 
-engine = create_async_engine(settings.database_url, echo=False, future=True)
 
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+if settings.metrics_enabled:
+    registry.register_collector(_collect_pool_stats)
 
 
 async def get_session() -> AsyncSession:
-    async with AsyncSessionLocal() as session:
+    async with get_sessionmaker()() as session:
         yield session
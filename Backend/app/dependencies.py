@@ -1,37 +1,172 @@
-from fastapi import Depends, HTTPException, status
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Callable
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import settings
-from app.core.security import AuthenticationError, decode_token
-from app.db.session import get_session
+from app.core.security import AuthenticationError, decode_access_token
+from app.db.session import (
+    LazySession,
+    SessionFactory,
+    get_read_router,
+    get_sessionmaker,
+    read_your_writes,
+)
+from app.middleware.metrics import route_template
 from app.schemas.auth import TokenPayload
+from app.schemas.user import UserRead
+from app.services.principals import principal_cache
 from app.services.users import get_user_by_email
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-async def get_db_session() -> AsyncSession:
-    async for session in get_session():
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def subject_key(subject: str) -> str:
+    """Read-your-writes key for requests authenticated as ``subject``."""
+    return f"sub:{subject}"
+
+
+def _client_key(request: Request) -> str:
+    # Keyed on the token subject rather than the header, so every token a user
+    # holds (including ones issued after the write) shares the same pin.
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            subject = decode_access_token(token).get("sub")
+        except AuthenticationError:
+            subject = None
+        if subject:
+            return subject_key(subject)
+    return f"ip:{client_ip(request)}"
+
+
+# Sessions opened for the request being handled, so ``SessionReleasingRoute``
+# can close them once the endpoint returns.
+_request_sessions: ContextVar[list[tuple[LazySession, Request]] | None] = ContextVar(
+    "request_sessions", default=None
+)
+
+
+def _open_session(request: Request, factory: SessionFactory) -> LazySession:
+    session = LazySession(factory, method=request.method, route=route_template(request.scope))
+    sessions = _request_sessions.get()
+    if sessions is not None:
+        sessions.append((session, request))
+    return session
+
+
+async def _release_session(session: LazySession, request: Request) -> None:
+    await session.release()
+    # Pin the client to the primary before the response can reach it, or its
+    # next read could race the mark to a lagging replica.
+    if session.wrote:
+        read_your_writes.mark(_client_key(request))
+
+
+class SessionReleasingRoute(APIRoute):
+    """Route that returns request sessions to the pool as soon as the endpoint returns.
+
+    FastAPI tears down ``yield`` dependencies only after the response has been
+    serialized, so without this a connection stays checked out while the body
+    is encoded. The dependencies still release anything opened after this point.
+    """
+
+    def get_route_handler(self) -> Callable:
+        endpoint = self.dependant.call
+        is_coroutine = asyncio.iscoroutinefunction(endpoint)
+
+        async def call_endpoint(**values: Any) -> Any:
+            try:
+                if is_coroutine:
+                    return await endpoint(**values)
+                return await run_in_threadpool(endpoint, **values)
+            finally:
+                for session, request in _request_sessions.get() or ():
+                    await _release_session(session, request)
+
+        self.dependant.call = call_endpoint
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request):
+            token = _request_sessions.set([])
+            try:
+                return await handler(request)
+            finally:
+                _request_sessions.reset(token)
+
+        return route_handler
+
+
+def get_session_factory() -> SessionFactory:
+    """Session factory for work that outlives the request, such as streamed responses."""
+    return get_sessionmaker()
+
+
+async def get_db_session(
+    request: Request, factory: SessionFactory = Depends(get_session_factory)
+) -> AsyncSession:
+    session = _open_session(request, factory)
+    try:
+        yield session
+    finally:
+        await _release_session(session, request)
+
+
+def _read_factory(request: Request) -> SessionFactory:
+    read_router = get_read_router()
+    if read_router.has_replicas and not read_your_writes.is_sticky(_client_key(request)):
+        return read_router
+    return get_sessionmaker()
+
+
+def get_read_session_factory(request: Request) -> SessionFactory:
+    """Like ``get_session_factory`` but routed to a replica when it is safe to do so."""
+    return _read_factory(request)
+
+
+async def get_read_db_session(
+    request: Request, factory: SessionFactory = Depends(get_read_session_factory)
+) -> AsyncSession:
+    """Session for pure reads, served by a replica unless this client wrote recently."""
+    session = _open_session(request, factory)
+    try:
         yield session
+    finally:
+        await session.release()
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_db_session)
 ):
+    # Principals resolve on the primary: a lagging replica could miss a user
+    # who just registered, or hand the cache an activation state or password
+    # that an admin has already changed.
     try:
-        payload = decode_token(token, secret=settings.jwt_secret_key)
+        payload = decode_access_token(token)
         token_data = TokenPayload(**payload)
     except AuthenticationError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials") from exc
 
-    user = await get_user_by_email(session, token_data.sub)
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    if not user.is_active:
+    principal = await principal_cache.get(token_data.sub)
+    if principal is None:
+        user = await get_user_by_email(session, token_data.sub)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        principal = UserRead.model_validate(user)
+        await principal_cache.set(principal)
+
+    if not principal.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
 
-    return user
+    return principal
 
 
 async def get_current_active_superuser(current_user=Depends(get_current_user)):
@@ -1,24 +1,67 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.core.config import settings
-from app.db.session import engine
-from app.routers import auth, health, users
+from app.core.email_queue import email_dispatcher
+from app.core.hashing import PasswordHashPoolSaturated
+from app.core.profiling import profiler
+from app.core.redis import close_redis
+from app.core.security import password_hash_pool
+from app.db.session import dispose_database
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.routers import audit, auth, health, jwks, metrics, profiles, users
+from app.services.audit import audit_log
+from app.services.user_changes import user_changes
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    app.state.readiness.start()
+    await email_dispatcher.start()
+    await audit_log.start()
+    await user_changes.start()
     try:
         yield
     finally:
-        await engine.dispose()
+        await app.state.readiness.stop()
+        await email_dispatcher.stop(timeout=settings.email_shutdown_timeout_seconds)
+        # Flushes buffered audit events, so it runs before the engines go away.
+        await audit_log.stop(timeout=settings.audit_shutdown_timeout_seconds)
+        password_hash_pool.shutdown(wait=False)
+        await user_changes.stop()
+        await close_redis()
+        await dispose_database()
+
+
+async def password_hash_saturated_handler(request: Request, exc: PasswordHashPoolSaturated):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.project_name, lifespan=lifespan)
+    app = FastAPI(
+        title=settings.project_name,
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse if settings.fast_json_responses else JSONResponse,
+    )
+    app.state.readiness = health.build_readiness_monitor()
+
+    app.add_exception_handler(PasswordHashPoolSaturated, password_hash_saturated_handler)
+
+    if settings.profiling_enabled:
+        # Added first so it runs innermost: profiles cover routing, the
+        # endpoint and serialization rather than the other middleware.
+        app.add_middleware(ProfilingMiddleware, profiler=profiler)
+        app.include_router(profiles.router)
 
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
 
@@ -34,11 +77,26 @@ def create_app() -> FastAPI:
         allow_credentials=allow_credentials,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Link", "ETag", "X-Total-Count", "X-Total-Count-Exact"],
     )
 
+    if settings.compression_enabled:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality,
+        )
+
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics.router)
+
     app.include_router(health.router)
     app.include_router(auth.router)
+    app.include_router(jwks.router)
     app.include_router(users.router)
+    app.include_router(audit.router)
 
     return app
 
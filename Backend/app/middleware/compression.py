@@ -0,0 +1,164 @@
+"""Response compression with brotli or gzip.
+
+Picks the best encoding the client accepts, skips bodies below a size threshold
+and responses that are already encoded, and compresses streamed bodies chunk by
+chunk with a sync flush so NDJSON exports and event streams keep flowing.
+"""
+
+import zlib
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+UNCOMPRESSIBLE_STATUSES = {204, 304}
+
+
+class _Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    def finish(self) -> bytes:
+        ...
+
+
+class _GzipCompressor:
+    def __init__(self, level: int) -> None:
+        # wbits=31 writes a gzip container rather than a raw zlib stream.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int) -> None:
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _accepted_encodings(scope: Scope) -> set[str]:
+    header = Headers(scope=scope).get("accept-encoding", "")
+    encodings = set()
+    for part in header.split(","):
+        name, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            encodings.add(name.lower())
+    return encodings
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        brotli_enabled: bool = True,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli_enabled = brotli_enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted_encodings(scope)
+        if self.brotli_enabled and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Message | None = None
+        self.compressor: _Compressor | None = None
+        self.passthrough = False
+
+    def _new_compressor(self) -> _Compressor:
+        if self.encoding == "br":
+            return _BrotliCompressor(self.middleware.brotli_quality)
+        return _GzipCompressor(self.middleware.gzip_level)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                message["status"] in UNCOMPRESSIBLE_STATUSES
+                or "content-encoding" in headers
+                or content_type.startswith("text/event-stream")
+            )
+            if self.passthrough:
+                await self.downstream(message)
+            else:
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.downstream(start)
+                await self.downstream(message)
+                return
+
+            self.compressor = self._new_compressor()
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.downstream(start)
+                await self.downstream({"type": "http.response.body", "body": body})
+                return
+            await self.downstream(start)
+
+        assert self.compressor is not None
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,63 @@
+"""ASGI middleware recording per-route request metrics."""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+
+UNMATCHED_ROUTE = "unmatched"
+
+http_requests_total = registry.counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ["method", "route", "status"],
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template.",
+    ["method", "route"],
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served.",
+    ["method"],
+)
+
+
+def route_template(scope: Scope) -> str:
+    # FastAPI stores the matched route in the scope; using its template keeps
+    # label cardinality bounded (``/users/{user_id}`` rather than every id).
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_progress.dec(method=method)
+            route = route_template(scope)
+            http_requests_total.inc(method=method, route=route, status=str(status_code))
+            http_request_duration_seconds.observe(elapsed, method=method, route=route)
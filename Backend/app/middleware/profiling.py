@@ -0,0 +1,67 @@
+"""ASGI middleware that profiles the requests that ask for it.
+
+A profile ends once the first body message has been sent. For ordinary
+responses that is the whole response; for streaming ones (server-sent events,
+exports) it is the endpoint plus the first chunk, so a long stream does not
+keep the sampler busy for every other request.
+"""
+
+import random
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.profiling import Profiler, current_profile, profiles_total
+from app.middleware.metrics import route_template
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, *, profiler: Profiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    def _trigger(self, scope: Scope) -> str | None:
+        token = Headers(scope=scope).get(PROFILE_TOKEN_HEADER)
+        if token is not None:
+            if self.profiler.verify_token(token):
+                return "token"
+            profiles_total.inc(trigger="token", outcome="rejected")
+        if self.profiler.sample_rate and random.random() < self.profiler.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        sampler = self.profiler.begin(trigger, scope["method"], scope["path"]) if trigger else None
+        if sampler is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = sampler.profile
+        status_code = 500
+        finished = False
+
+        def finish() -> None:
+            nonlocal finished
+            if not finished:
+                finished = True
+                self.profiler.finish(sampler, route=route_template(scope), status=status_code)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = profile.id
+            await send(message)
+            if message["type"] == "http.response.body":
+                finish()
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            finish()
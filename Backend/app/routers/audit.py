@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import InvalidCursor
+from app.dependencies import SessionReleasingRoute, get_current_active_superuser, get_read_db_session
+from app.schemas.audit import AuditEventRead
+from app.services import audit as audit_service
+
+router = APIRouter(prefix="/audit", tags=["audit"], route_class=SessionReleasingRoute)
+
+
+@router.get("/events", response_model=list[AuditEventRead])
+async def list_audit_events(
+    request: Request,
+    response: Response,
+    cursor: str | None = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor"),
+    limit: int = Query(100, ge=1, le=1000),
+    action: str | None = Query(None, description="For example `auth.login_failed` or `users.update`"),
+    actor: str | None = Query(None, description="Email of the user who caused the event"),
+    since: datetime | None = Query(None, description="Only events at or after this time"),
+    until: datetime | None = Query(None, description="Only events before this time"),
+    session: AsyncSession = Depends(get_read_db_session),
+    _: None = Depends(get_current_active_superuser),
+):
+    """Audit events, newest first."""
+    try:
+        before = audit_service.decode_audit_cursor(cursor) if cursor else None
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+    events = await audit_service.list_audit_events(
+        session, limit=limit + 1, before=before, action=action, actor=actor, since=since, until=until
+    )
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = audit_service.encode_audit_cursor(events[-1])
+        next_url = request.url.include_query_params(cursor=next_cursor, limit=limit)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return events
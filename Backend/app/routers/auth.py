@@ -1,23 +1,61 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db_session
+from app.core.config import settings
+from app.core.rate_limit import rate_limited_total, rate_limiter
+from app.db.session import read_your_writes
+from app.dependencies import SessionReleasingRoute, client_ip, get_db_session, subject_key
 from app.schemas.auth import LoginRequest, RefreshRequest, RegisterRequest, Token
 from app.services import auth as auth_service
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=SessionReleasingRoute)
+
+
+async def enforce_rate_limit(request: Request, action: str, email: str | None = None) -> None:
+    """Reject over-limit callers before any database or hashing work happens."""
+    if not settings.rate_limit_enabled:
+        return
+
+    window = settings.auth_rate_limit_window_seconds
+    checks = [(f"auth:{action}:ip:{client_ip(request)}", settings.auth_rate_limit_per_ip)]
+    if email is not None:
+        checks.append((f"auth:{action}:email:{email.lower()}", settings.auth_rate_limit_per_email))
+
+    for key, limit in checks:
+        retry_after = await rate_limiter.hit(key, limit=limit, window=window)
+        if retry_after is not None:
+            rate_limited_total.inc(scope=f"auth_{action}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+            )
 
 
 @router.post("/register", response_model=Token)
-async def register(payload: RegisterRequest, session: AsyncSession = Depends(get_db_session)):
-    return await auth_service.register_user(session, payload)
+async def register(
+    request: Request, payload: RegisterRequest, session: AsyncSession = Depends(get_db_session)
+):
+    await enforce_rate_limit(request, "register", payload.email)
+    tokens = await auth_service.register_user(session, payload, client_ip=client_ip(request))
+    # The new user's first requests carry the tokens issued here, so pin them too.
+    read_your_writes.mark(subject_key(payload.email))
+    return tokens
 
 
 @router.post("/login", response_model=Token)
-async def login(payload: LoginRequest, session: AsyncSession = Depends(get_db_session)):
-    return await auth_service.login_user(session, payload)
+async def login(request: Request, payload: LoginRequest, session: AsyncSession = Depends(get_db_session)):
+    await enforce_rate_limit(request, "login", payload.email)
+    return await auth_service.login_user(session, payload, client_ip=client_ip(request))
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh(payload: RefreshRequest):
-    return auth_service.refresh_tokens(payload.refresh_token)
+async def refresh(request: Request, payload: RefreshRequest):
+    await enforce_rate_limit(request, "refresh")
+    return await auth_service.refresh_tokens(payload.refresh_token, client_ip=client_ip(request))
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(request: Request, payload: RefreshRequest):
+    await enforce_rate_limit(request, "refresh")
+    await auth_service.logout(payload.refresh_token, client_ip=client_ip(request))
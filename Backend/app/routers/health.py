@@ -1,13 +1,72 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db_session
+from app.core.config import settings
+from app.core.readiness import ReadinessMonitor
+from app.core.redis import get_redis, redis_features
+from app.db.session import get_engine, pool_checkout_seconds, pool_status
+from app.dependencies import SessionReleasingRoute, get_current_active_superuser, get_db_session
 
-router = APIRouter(tags=["health"])
+router = APIRouter(tags=["health"], route_class=SessionReleasingRoute)
+
+
+async def check_database() -> None:
+    async with get_engine().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def check_redis() -> None:
+    redis = get_redis()
+    if redis is not None:
+        await redis.ping()
+
+
+def build_readiness_monitor() -> ReadinessMonitor:
+    checks = {"database": check_database}
+    # REDIS_URL has a default, so only check Redis when something uses it.
+    if settings.redis_url and redis_features(settings):
+        checks["redis"] = check_redis
+    return ReadinessMonitor(
+        checks,
+        interval=settings.readiness_interval_seconds,
+        timeout=settings.readiness_timeout_seconds,
+    )
+
+
+@router.get("/livez", summary="Liveness probe")
+async def livez():
+    return {"status": "ok"}
+
+
+@router.get("/readyz", summary="Readiness probe served from cached background checks")
+async def readyz(request: Request):
+    ready, body = request.app.state.readiness.snapshot()
+    return JSONResponse(
+        body, status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
 
 
 @router.get("/health", summary="Service health check")
 async def healthcheck(session: AsyncSession = Depends(get_db_session)):
     await session.execute(text("SELECT 1"))
     return {"status": "ok"}
+
+
+@router.get(
+    "/health/db-pool",
+    summary="Connection pool statistics",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def db_pool_stats():
+    checkout = pool_checkout_seconds.snapshot()
+    cumulative = 0
+    buckets = {}
+    for bound, count in zip((*checkout.buckets, "+Inf"), checkout.counts):
+        cumulative += count
+        buckets[str(bound)] = cumulative
+    return {
+        **pool_status(get_engine().pool),
+        "checkout_seconds": {"count": checkout.count, "sum": checkout.sum, "buckets": buckets},
+    }
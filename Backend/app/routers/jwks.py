@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Request, Response, status
+
+from app.core import conditional, keys
+from app.core.config import settings
+
+router = APIRouter(prefix="/.well-known", tags=["auth"])
+
+JWKS_MEDIA_TYPE = "application/jwk-set+json"
+
+
+@router.get("/jwks.json", summary="Public keys that verify access tokens")
+async def jwks(request: Request):
+    # The key set only changes on deploy, so its body and ETag are built once.
+    key_ring = keys.key_ring
+    headers = {
+        "ETag": key_ring.jwks_etag,
+        "Cache-Control": (
+            f"public, max-age={settings.jwks_cache_max_age_seconds}, "
+            f"stale-while-revalidate={settings.jwks_cache_max_age_seconds}"
+        ),
+    }
+    if conditional.is_not_modified(request, key_ring.jwks_etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(key_ring.jwks_json, media_type=JWKS_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiling import RequestProfile, profiler
+from app.dependencies import SessionReleasingRoute, get_current_active_superuser
+from app.middleware.profiling import PROFILE_TOKEN_HEADER
+from app.schemas.profile import ProfileRead, ProfileSummary, ProfileToken, SpanRead, StackSample
+
+router = APIRouter(
+    prefix="/profiles",
+    tags=["profiles"],
+    route_class=SessionReleasingRoute,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+
+# The JSON view lists the heaviest stacks; ?format=folded returns all of them.
+MAX_JSON_STACKS = 200
+
+
+def _milliseconds(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _summary(profile: RequestProfile) -> dict:
+    return {
+        "id": profile.id,
+        "trigger": profile.trigger,
+        "method": profile.method,
+        "path": profile.path,
+        "route": profile.route,
+        "status": profile.status,
+        "started_at": profile.started_at,
+        "duration_ms": _milliseconds(profile.duration),
+        "db_ms": _milliseconds(profile.span_seconds("db")),
+        "db_queries": profile.span_count("db"),
+        "password_hash_ms": _milliseconds(profile.span_seconds("password_hash")),
+        "samples": sum(profile.samples.values()),
+        "truncated": profile.truncated,
+    }
+
+
+@router.get("/", response_model=list[ProfileSummary])
+async def list_profiles():
+    """Recently captured profiles on this worker, newest first."""
+    return [_summary(profile) for profile in profiler.profiles()]
+
+
+@router.get("/{profile_id}", response_model=ProfileRead)
+async def read_profile(
+    profile_id: str,
+    format: Literal["json", "folded"] = Query(
+        "json", description="`folded` returns every stack sample for flame graph tools"
+    ),
+):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "folded":
+        return PlainTextResponse(profile.folded())
+    return {
+        **_summary(profile),
+        "spans": [
+            SpanRead(
+                kind=span.kind,
+                name=span.name,
+                start_ms=_milliseconds(span.start),
+                duration_ms=_milliseconds(span.duration),
+                detail=span.detail,
+            )
+            for span in profile.spans
+        ],
+        "spans_dropped": profile.spans_dropped,
+        "stacks": [
+            StackSample(stack=stack, samples=count) for stack, count in profile.samples.most_common(MAX_JSON_STACKS)
+        ],
+    }
+
+
+@router.post("/token", response_model=ProfileToken)
+async def create_profile_token(
+    ttl_seconds: int = Query(settings.profiling_token_ttl_seconds, ge=1, le=86_400),
+):
+    """Mint a value for the X-Profile-Token header that profiles any request until it expires."""
+    token, expires = profiler.create_token(ttl_seconds)
+    return ProfileToken(
+        token=token,
+        header=PROFILE_TOKEN_HEADER,
+        expires_at=datetime.fromtimestamp(expires, timezone.utc),
+    )
@@ -1,77 +1,327 @@
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import conditional
+from app.core.config import settings
+from app.core.pagination import InvalidCursor
+from app.db.session import SessionFactory
 from app.dependencies import (
+    SessionReleasingRoute,
+    client_ip,
     get_current_active_superuser,
     get_current_user,
     get_db_session,
+    get_read_db_session,
+    get_read_session_factory,
 )
-from app.schemas.user import UserAdminCreate, UserAdminUpdate, UserRead
+from app.schemas.user import (
+    UserAdminCreate,
+    UserAdminUpdate,
+    UserBatchRequest,
+    UserBatchResult,
+    UserImportResult,
+    UserRead,
+    dump_user_json,
+    dump_users_json,
+)
+from app.services import bulk_users as bulk_user_service
 from app.services import users as user_service
+from app.services.audit import audit_log
+from app.services.user_changes import user_changes
+
+router = APIRouter(prefix="/users", tags=["users"], route_class=SessionReleasingRoute)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _user_response(user, status_code: int = status.HTTP_200_OK, headers: dict[str, str] | None = None):
+    """Serialize with the precompiled adapter when the fast path is enabled.
+
+    Returning a ``Response`` makes FastAPI skip ``response_model`` validation
+    and ``jsonable_encoder``; otherwise the ORM object goes through them as usual.
+    """
+    if not settings.fast_json_responses:
+        return user
+    return Response(dump_user_json(user), status_code=status_code, media_type=JSON_MEDIA_TYPE, headers=headers)
+
 
-router = APIRouter(prefix="/users", tags=["users"])
+async def _ndjson_lines(users: AsyncIterator) -> AsyncIterator[bytes]:
+    async for user in users:
+        yield dump_user_json(user) + b"\n"
 
 
 @router.get("/me", response_model=UserRead)
-async def read_current_user(current_user=Depends(get_current_user)):
-    return current_user
+async def read_current_user(request: Request, response: Response, current_user=Depends(get_current_user)):
+    etag = conditional.make_etag(current_user.id, current_user.updated_at.isoformat())
+    if conditional.is_not_modified(request, etag, current_user.updated_at):
+        return conditional.not_modified_response(etag, current_user.updated_at)
+
+    headers = conditional.validator_headers(etag, current_user.updated_at)
+    response.headers.update(headers)
+    return _user_response(current_user, headers=headers)
 
 
 @router.get("/", response_model=list[UserRead])
 async def list_users(
+    request: Request,
+    response: Response,
+    cursor: str | None = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor"),
+    limit: int = Query(100, ge=1, le=1000),
+    format: Literal["json", "ndjson"] = Query(
+        "json", description="`ndjson` streams every matching user after the cursor and ignores `limit`"
+    ),
+    is_active: bool | None = Query(None),
+    is_superuser: bool | None = Query(None),
+    search: str | None = Query(
+        None, min_length=1, max_length=255, description="Case-insensitive match on email or full name"
+    ),
+    search_mode: Literal["substring", "prefix"] = Query(
+        "substring", description="Terms shorter than three characters always match as a prefix"
+    ),
+    sort: user_service.UserSort = Query("created_at", description="Sort column; prefix with `-` to descend"),
+    include_total: bool = Query(
+        False, description="Add X-Total-Count; large Postgres matches report the planner estimate"
+    ),
+    session: AsyncSession = Depends(get_read_db_session),
+    session_factory: SessionFactory = Depends(get_read_session_factory),
+    _: None = Depends(get_current_active_superuser),
+):
+    try:
+        after = user_service.decode_user_cursor(cursor, sort) if cursor else None
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+    filters = user_service.UserFilters(
+        is_active=is_active, is_superuser=is_superuser, search=search, search_mode=search_mode
+    )
+    if format == "ndjson":
+        users = user_service.stream_users(session_factory, after=after, filters=filters, sort=sort)
+        return StreamingResponse(_ndjson_lines(users), media_type=NDJSON_MEDIA_TYPE)
+
+    # The validator costs one aggregate over an index, so unchanged pages are
+    # answered with 304 before any rows are loaded or serialized.
+    last_updated, total = await user_service.users_fingerprint(session)
+    etag = conditional.make_etag(
+        last_updated and last_updated.isoformat(), total, cursor, limit, filters, sort, include_total
+    )
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified_response(etag)
+
+    users = await user_service.list_users(session, limit=limit + 1, after=after, filters=filters, sort=sort)
+    headers = conditional.validator_headers(etag)
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = user_service.encode_user_cursor(users[-1], sort)
+        next_url = request.url.include_query_params(cursor=next_cursor, limit=limit)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    if include_total:
+        # The fingerprint already counted the whole table exactly.
+        matched, exact = (total, True) if not filters else await user_service.count_users(session, filters)
+        headers["X-Total-Count"] = str(matched)
+        headers["X-Total-Count-Exact"] = "true" if exact else "false"
+
+    if settings.fast_json_responses:
+        return Response(dump_users_json(users), media_type=JSON_MEDIA_TYPE, headers=headers)
+    response.headers.update(headers)
+    return users
+
+
+IMPORT_MEDIA_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+
+@router.post("/import", response_model=UserImportResult)
+async def import_users(
+    request: Request,
     session: AsyncSession = Depends(get_db_session),
+    admin: UserRead = Depends(get_current_active_superuser),
+):
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    import_format = IMPORT_MEDIA_TYPES.get(media_type)
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload users as application/x-ndjson or text/csv",
+        )
+
+    lines = bulk_user_service.iter_lines(request.stream())
+    try:
+        result = await bulk_user_service.import_users(session, lines, import_format)
+    except bulk_user_service.ImportFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except UnicodeDecodeError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload must be UTF-8") from exc
+    audit_log.record(
+        "users.import",
+        actor=admin.email,
+        ip=client_ip(request),
+        created=result.created,
+        skipped=result.skipped,
+        failed=result.failed,
+    )
+    return result
+
+
+@router.get("/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    session_factory: SessionFactory = Depends(get_read_session_factory),
     _: None = Depends(get_current_active_superuser),
 ):
-    return await user_service.list_users(session)
+    users = user_service.stream_users(session_factory)
+    if format == "csv":
+        body, media_type = bulk_user_service.export_csv_lines(users), "text/csv"
+    else:
+        body, media_type = _ndjson_lines(users), NDJSON_MEDIA_TYPE
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+RECONNECT_DELAY_MILLISECONDS = 3000
+
+
+async def _change_events(last_event_id: str | None) -> AsyncIterator[bytes]:
+    # Streams end after a while so clients reconnect, re-authenticating and
+    # resuming from their Last-Event-ID.
+    deadline = time.monotonic() + settings.user_changes_max_stream_seconds
+    yield f"retry: {RECONNECT_DELAY_MILLISECONDS}\n\n".encode()
+    changes = user_changes.subscribe(last_event_id, idle_timeout=settings.user_changes_heartbeat_seconds)
+    async with aclosing(changes):
+        async for change in changes:
+            if change is None:
+                yield b": keepalive\n\n"
+            else:
+                yield f"id: {change.id}\nevent: {change.type}\ndata: {change.data}\n\n".encode()
+            if time.monotonic() >= deadline:
+                return
+
+
+@router.get("/changes")
+async def stream_user_changes(
+    last_event_id: str | None = Header(None, description="Resume after this event id"),
+    _: None = Depends(get_current_active_superuser),
+):
+    """Server-sent events for every user created, updated or deleted."""
+    return StreamingResponse(
+        _change_events(last_event_id),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+EMAIL_ALREADY_REGISTERED = "Email already registered"
+USER_NOT_FOUND = "User not found"
+
+
+def _changed_fields(changes: UserAdminUpdate) -> list[str]:
+    # Field names only: audit rows never carry passwords or their hashes.
+    return sorted(changes.model_dump(exclude_none=True))
 
 
 @router.post("/", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def create_user(
+    request: Request,
     payload: UserAdminCreate,
     session: AsyncSession = Depends(get_db_session),
-    _: None = Depends(get_current_active_superuser),
+    admin: UserRead = Depends(get_current_active_superuser),
 ):
-    existing_user = await user_service.get_user_by_email(session, payload.email)
-    if existing_user:
+    try:
+        user = await user_service.create_user(session, payload)
+    except user_service.EmailAlreadyRegistered as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EMAIL_ALREADY_REGISTERED) from exc
+    audit_log.record(
+        "users.create",
+        actor=admin.email,
+        subject=user.id,
+        ip=client_ip(request),
+        email=user.email,
+        is_superuser=user.is_superuser,
+    )
+    return _user_response(user, status.HTTP_201_CREATED)
+
+
+async def _limit_batch_size(request: Request, _: UserRead = Depends(get_current_active_superuser)) -> None:
+    # Dependencies run before the body is validated, so an oversized batch is
+    # turned away without building a model per operation. FastAPI caches the
+    # parsed JSON on the request, so this does not decode it a second time.
+    try:
+        body = await request.json()
+    except ValueError:
+        return  # left for body validation to report
+    operations = body.get("operations") if isinstance(body, dict) else None
+    if isinstance(operations, list) and len(operations) > settings.users_batch_max_operations:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may hold at most {settings.users_batch_max_operations} operations",
         )
 
-    return await user_service.create_user(session, payload)
+
+@router.post("/batch", response_model=UserBatchResult, dependencies=[Depends(_limit_batch_size)])
+async def batch_users(
+    request: Request,
+    payload: UserBatchRequest,
+    session: AsyncSession = Depends(get_db_session),
+    admin: UserRead = Depends(get_current_active_superuser),
+):
+    """Apply many updates and deletes in one transaction, reporting each item's outcome."""
+    try:
+        result = await bulk_user_service.apply_user_batch(session, payload.operations)
+    except user_service.EmailAlreadyRegistered as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EMAIL_ALREADY_REGISTERED) from exc
+    ip = client_ip(request)
+    for operation, item in zip(payload.operations, result.results):
+        if item.status == "updated":
+            audit_log.record(
+                "users.update", actor=admin.email, subject=item.id, ip=ip, fields=_changed_fields(operation.changes)
+            )
+        elif item.status == "deleted":
+            audit_log.record("users.delete", actor=admin.email, subject=item.id, ip=ip)
+    return result
 
 
 @router.patch("/{user_id}", response_model=UserRead)
 async def update_user(
+    request: Request,
     user_id: UUID,
     payload: UserAdminUpdate,
     session: AsyncSession = Depends(get_db_session),
-    _: None = Depends(get_current_active_superuser),
+    admin: UserRead = Depends(get_current_active_superuser),
 ):
-    user = await user_service.get_user(session, user_id)
+    try:
+        user = await user_service.update_user(session, user_id, payload)
+    except user_service.EmailAlreadyRegistered as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=EMAIL_ALREADY_REGISTERED) from exc
     if user is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    if payload.email and payload.email != user.email:
-        existing_user = await user_service.get_user_by_email(session, payload.email)
-        if existing_user and existing_user.id != user.id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered",
-            )
-
-    return await user_service.update_user(session, user, payload)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=USER_NOT_FOUND)
+    audit_log.record(
+        "users.update", actor=admin.email, subject=user_id, ip=client_ip(request), fields=_changed_fields(payload)
+    )
+    return _user_response(user)
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
+    request: Request,
     user_id: UUID,
     session: AsyncSession = Depends(get_db_session),
-    _: None = Depends(get_current_active_superuser),
+    admin: UserRead = Depends(get_current_active_superuser),
 ):
-    user = await user_service.get_user(session, user_id)
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    await user_service.delete_user(session, user)
+    if not await user_service.delete_user(session, user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=USER_NOT_FOUND)
+    audit_log.record("users.delete", actor=admin.email, subject=user_id, ip=client_ip(request))
@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class AuditEventRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    occurred_at: datetime
+    action: str
+    actor: str | None = None
+    subject: str | None = None
+    ip: str | None = None
+    details: dict[str, Any] | None = None
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class SpanRead(BaseModel):
+    kind: str
+    name: str
+    start_ms: float
+    duration_ms: float
+    detail: str | None = None
+
+
+class StackSample(BaseModel):
+    stack: str
+    samples: int
+
+
+class ProfileSummary(BaseModel):
+    id: str
+    trigger: str
+    method: str
+    path: str
+    route: str | None = None
+    status: int | None = None
+    started_at: datetime
+    duration_ms: float
+    db_ms: float
+    db_queries: int
+    password_hash_ms: float
+    samples: int
+    truncated: bool
+
+
+class ProfileRead(ProfileSummary):
+    spans: list[SpanRead]
+    spans_dropped: int
+    stacks: list[StackSample]
+
+
+class ProfileToken(BaseModel):
+    token: str
+    header: str
+    expires_at: datetime
@@ -1,7 +1,9 @@
+from collections.abc import Iterable
 from datetime import datetime
+from typing import Annotated, Any, Literal
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
 
 
 class UserBase(BaseModel):
@@ -26,6 +28,28 @@ class UserRead(UserBase):
         from_attributes = True
 
 
+# Precompiled serializers for the fast response path. Rows loaded from the
+# database are already valid, so they are wrapped with ``model_construct``
+# instead of being validated again before serialization.
+_user_read_fields = tuple(UserRead.model_fields)
+user_read_adapter = TypeAdapter(UserRead)
+user_read_list_adapter = TypeAdapter(list[UserRead])
+
+
+def trusted_user_read(user: Any) -> UserRead:
+    if isinstance(user, UserRead):
+        return user
+    return UserRead.model_construct(**{name: getattr(user, name) for name in _user_read_fields})
+
+
+def dump_user_json(user: Any) -> bytes:
+    return user_read_adapter.dump_json(trusted_user_read(user))
+
+
+def dump_users_json(users: Iterable[Any]) -> bytes:
+    return user_read_list_adapter.dump_json([trusted_user_read(user) for user in users])
+
+
 class UserUpdate(BaseModel):
     email: EmailStr | None = None
     full_name: str | None = None
@@ -40,3 +64,48 @@ class UserAdminCreate(UserCreate):
 
 class UserAdminUpdate(UserUpdate):
     pass
+
+
+class UserImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class UserImportResult(BaseModel):
+    created: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: list[UserImportError] = []
+
+
+class UserBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: UUID
+    changes: UserAdminUpdate
+
+
+class UserBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: UUID
+
+
+UserBatchOperation = Annotated[UserBatchUpdate | UserBatchDelete, Field(discriminator="op")]
+
+
+class UserBatchRequest(BaseModel):
+    operations: list[UserBatchOperation] = Field(min_length=1)
+
+
+class UserBatchItemResult(BaseModel):
+    index: int
+    id: UUID
+    op: Literal["update", "delete"]
+    status: Literal["updated", "deleted", "not_found", "conflict", "duplicate"]
+    detail: str | None = None
+
+
+class UserBatchResult(BaseModel):
+    updated: int = 0
+    deleted: int = 0
+    failed: int = 0
+    results: list[UserBatchItemResult] = []
@@ -0,0 +1,187 @@
+"""Production server launcher.
+
+Run from the ``Backend/`` directory::
+
+    python -m app.serve
+
+With gunicorn installed the app is imported once in the master and forked into
+``UvicornWorker`` processes, so workers share the imported code copy-on-write;
+each child drops any pooled connections inherited from the master before
+serving. Without gunicorn, uvicorn's own process manager spawns the workers.
+Either way the event loop and HTTP parser are uvloop and httptools when they
+are installed, and shutdown waits up to
+``server_graceful_timeout_seconds`` for in-flight requests before the lifespan
+disposes the database engines.
+
+Workers default to one per CPU core once every store that must be shared
+between workers (refresh tokens, rate limits, the user change feed) is backed
+by Redis. While any of them is in process memory the launcher runs a single
+worker, and refuses to start more.
+"""
+
+import argparse
+import importlib.util
+import os
+from typing import Any
+
+from app.core.config import Settings, settings
+
+APP_PATH = "app.main:app"
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+LOOP = "uvloop" if _installed("uvloop") else "asyncio"
+HTTP = "httptools" if _installed("httptools") else "h11"
+
+
+def process_local_stores(config: Settings) -> list[str]:
+    """Settings that keep state in worker memory which other workers would need to see."""
+    stores = []
+    if config.refresh_token_store == "memory":
+        stores.append("REFRESH_TOKEN_STORE")
+    if config.rate_limit_enabled and config.rate_limit_backend == "memory":
+        stores.append("RATE_LIMIT_BACKEND")
+    if config.user_changes_backend == "memory":
+        stores.append("USER_CHANGES_BACKEND")
+    return stores
+
+
+def worker_count(config: Settings) -> int:
+    if config.server_workers:
+        return config.server_workers
+    if process_local_stores(config):
+        return 1
+    # Async workers saturate a core each; more only adds memory and pool connections.
+    return max(1, os.cpu_count() or 1)
+
+
+def check_workers(config: Settings) -> None:
+    """Refuse to run several workers that would each keep their own copy of shared state."""
+    stores = process_local_stores(config)
+    if worker_count(config) > 1 and stores:
+        raise SystemExit(
+            f"{worker_count(config)} workers need shared state, but {', '.join(stores)} "
+            "is set to memory. Set it to redis (with REDIS_URL) or run a single worker."
+        )
+
+
+def server_kind(config: Settings) -> str:
+    if config.server_kind == "auto":
+        return "gunicorn" if _installed("gunicorn") else "uvicorn"
+    return config.server_kind
+
+
+def uvicorn_options(config: Settings) -> dict[str, Any]:
+    return {
+        "host": config.server_host,
+        "port": config.server_port,
+        "workers": worker_count(config),
+        "loop": LOOP,
+        "http": HTTP,
+        "backlog": config.server_backlog,
+        "timeout_keep_alive": config.server_keepalive_seconds,
+        "timeout_graceful_shutdown": config.server_graceful_timeout_seconds,
+        "limit_max_requests": config.server_max_requests or None,
+        "proxy_headers": True,
+        "forwarded_allow_ips": config.server_forwarded_allow_ips,
+        "access_log": config.server_access_log,
+    }
+
+
+def gunicorn_options(config: Settings) -> dict[str, Any]:
+    return {
+        "bind": f"{config.server_host}:{config.server_port}",
+        "workers": worker_count(config),
+        "worker_class": "app.serve.TunedUvicornWorker",
+        "preload_app": True,
+        "backlog": config.server_backlog,
+        "keepalive": config.server_keepalive_seconds,
+        "graceful_timeout": config.server_graceful_timeout_seconds,
+        "timeout": config.server_graceful_timeout_seconds + 30,
+        "max_requests": config.server_max_requests,
+        "max_requests_jitter": config.server_max_requests_jitter,
+        "forwarded_allow_ips": config.server_forwarded_allow_ips,
+        "accesslog": "-" if config.server_access_log else None,
+        "post_fork": post_fork,
+    }
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    """Drop pooled connections copied from the master without closing its sockets."""
+    from app.db.session import reset_after_fork
+
+    # Engines are normally built lazily in each worker; this only matters if
+    # something in the master opened connections before forking.
+    reset_after_fork()
+
+
+try:
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # gunicorn is optional
+    UvicornWorker = None
+else:
+
+    class TunedUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": LOOP, "http": HTTP, "lifespan": "on"}
+
+
+def run_gunicorn(config: Settings) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    from app.main import app
+
+    options = gunicorn_options(config)
+
+    class Application(BaseApplication):
+        def load_config(self) -> None:
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Application().run()
+
+
+def run_uvicorn(config: Settings) -> None:
+    import uvicorn
+
+    uvicorn.run(APP_PATH, **uvicorn_options(config))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--server", choices=["auto", "gunicorn", "uvicorn"])
+    parser.add_argument("--print-config", action="store_true", help="show the resolved options and exit")
+    args = parser.parse_args()
+
+    overrides = {
+        "server_host": args.host,
+        "server_port": args.port,
+        "server_workers": args.workers,
+        "server_kind": args.server,
+    }
+    config = settings.model_copy(update={key: value for key, value in overrides.items() if value is not None})
+
+    check_workers(config)
+    kind = server_kind(config)
+    if args.print_config:
+        options = gunicorn_options(config) if kind == "gunicorn" else uvicorn_options(config)
+        options.pop("post_fork", None)
+        print({"server": kind, "loop": LOOP, "http": HTTP, **options})
+        return
+
+    if kind == "gunicorn":
+        run_gunicorn(config)
+    else:
+        run_uvicorn(config)
+
+
+if __name__ == "__main__":
+    main()
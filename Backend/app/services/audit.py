@@ -0,0 +1,253 @@
+"""Buffered audit log of authentication and admin events.
+
+Handlers call ``audit_log.record`` which only appends to an in-memory buffer;
+a writer task started from the application lifespan flushes the buffer with
+bulk INSERTs once ``audit_batch_size`` events are waiting or every
+``audit_flush_interval_seconds``. When the database falls behind the buffer
+fills up and further events are dropped and counted rather than slowing the
+requests that produce them. A batch whose write fails goes back to the head of
+the buffer and is retried with exponential backoff; it is dropped only after
+``audit_write_max_attempts`` failed writes. Whatever is buffered is flushed on
+shutdown.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.db import models
+from app.db.session import SessionFactory, get_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+audit_events_written_total = registry.counter(
+    "audit_events_written_total",
+    "Audit events written to the database.",
+)
+audit_events_dropped_total = registry.counter(
+    "audit_events_dropped_total",
+    "Audit events discarded before reaching the database, by reason.",
+    ["reason"],
+)
+audit_flush_duration_seconds = registry.histogram(
+    "audit_flush_duration_seconds",
+    "Time spent writing one batch of audit events.",
+)
+audit_buffered_events = registry.gauge(
+    "audit_buffered_events",
+    "Audit events waiting in memory to be written.",
+)
+
+# Column limits, so one oversized value cannot fail a whole batch.
+_STRING_LIMITS = {"action": 64, "actor": 255, "subject": 255, "ip": 45}
+
+
+class AuditLog:
+    def __init__(
+        self,
+        *,
+        max_events: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_attempts: int = 5,
+        max_backoff: float = 30.0,
+        session_factory: SessionFactory | None = None,
+    ) -> None:
+        self.max_events = max_events
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self._failures = 0
+        self.session_factory = session_factory
+        self._buffer: deque[dict[str, Any]] = deque()
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    def record(
+        self,
+        action: str,
+        *,
+        actor: str | None = None,
+        subject: str | None = None,
+        ip: str | None = None,
+        **details: Any,
+    ) -> None:
+        """Buffer one event; never blocks and never touches the database."""
+        if not settings.audit_enabled:
+            return
+        if len(self._buffer) >= self.max_events:
+            audit_events_dropped_total.inc(reason="buffer_full")
+            return
+
+        event = {"action": action, "actor": actor, "subject": subject, "ip": ip}
+        for column, limit in _STRING_LIMITS.items():
+            if event[column] is not None:
+                event[column] = str(event[column])[:limit]
+        self._buffer.append(
+            {"id": uuid.uuid4(), "occurred_at": models.utcnow(), **event, "details": details or None}
+        )
+        # While writes are failing the writer backs off instead of waking up early.
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None and not self._failures:
+            self._wakeup.set()
+
+    async def flush(self, session_factory: SessionFactory | None = None) -> int:
+        """Write everything buffered so far in batches and return how many events were written.
+
+        Stops at the first failed write and puts that batch back at the head
+        of the buffer, unless it has now failed ``max_attempts`` times.
+        """
+        factory = session_factory or self.session_factory or get_sessionmaker()
+        written = 0
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            started = time.perf_counter()
+            try:
+                async with factory() as session:
+                    await session.execute(insert(models.AuditEvent), batch)
+                    await session.commit()
+            except Exception:
+                self._failures += 1
+                if self._failures < self.max_attempts:
+                    logger.warning(
+                        "Audit write failed (attempt %d of %d), retrying %d events",
+                        self._failures,
+                        self.max_attempts,
+                        len(batch),
+                        exc_info=True,
+                    )
+                    self._buffer.extendleft(reversed(batch))
+                    return written
+                logger.exception("Dropping %d audit events after %d failed writes", len(batch), self._failures)
+                audit_events_dropped_total.inc(len(batch), reason="write_failed")
+                self._failures = 0
+                continue
+            finally:
+                audit_flush_duration_seconds.observe(time.perf_counter() - started)
+            self._failures = 0
+            audit_events_written_total.inc(len(batch))
+            written += len(batch)
+        return written
+
+    async def _writer(self) -> None:
+        assert self._wakeup is not None
+        while not self._stopping:
+            delay = self.flush_interval
+            if self._failures:
+                delay = min(self.max_backoff, self.flush_interval * 2**self._failures)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Audit writer failed to flush")
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._writer(), name="audit-writer")
+
+    async def stop(self, *, timeout: float = 5.0) -> None:
+        """Flush what is buffered for up to ``timeout`` seconds, then stop the writer."""
+        deadline = time.monotonic() + timeout
+        task, self._task = self._task, None
+        if task is not None:
+            # Let the writer finish its current batch and do a last pass rather
+            # than cancelling it halfway through an INSERT.
+            self._stopping = True
+            assert self._wakeup is not None
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(task, timeout=timeout)
+            except asyncio.TimeoutError:
+                pass  # wait_for has cancelled the writer
+        try:
+            await asyncio.wait_for(self.flush(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            pass
+        if self._buffer:
+            logger.warning("Shutting down with %d unwritten audit events", len(self._buffer))
+            audit_events_dropped_total.inc(len(self._buffer), reason="shutdown")
+            self._buffer.clear()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def clear(self) -> None:
+        self._buffer.clear()
+        self._failures = 0
+
+
+audit_log = AuditLog(
+    max_events=settings.audit_buffer_max_events,
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval_seconds,
+    max_attempts=settings.audit_write_max_attempts,
+    max_backoff=settings.audit_retry_backoff_max_seconds,
+)
+
+
+def _collect_buffer_size() -> None:
+    audit_buffered_events.set(len(audit_log))
+
+
+registry.register_collector(_collect_buffer_size)
+
+
+AuditCursor = tuple[datetime, uuid.UUID]
+
+
+def encode_audit_cursor(event: models.AuditEvent) -> str:
+    return encode_cursor(event.occurred_at.isoformat(), event.id)
+
+
+def decode_audit_cursor(cursor: str) -> AuditCursor:
+    occurred_at, event_id = decode_cursor(cursor, size=2)
+    try:
+        return datetime.fromisoformat(occurred_at), uuid.UUID(event_id)
+    except ValueError as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+
+
+async def list_audit_events(
+    session: AsyncSession,
+    *,
+    limit: int,
+    before: AuditCursor | None = None,
+    action: str | None = None,
+    actor: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> list[models.AuditEvent]:
+    """Return events newest first, keyset-paginated on ``(occurred_at, id)``."""
+    statement = select(models.AuditEvent).order_by(
+        models.AuditEvent.occurred_at.desc(), models.AuditEvent.id.desc()
+    )
+    if before is not None:
+        statement = statement.where(tuple_(models.AuditEvent.occurred_at, models.AuditEvent.id) < before)
+    if action is not None:
+        statement = statement.where(models.AuditEvent.action == action)
+    if actor is not None:
+        statement = statement.where(models.AuditEvent.actor == actor)
+    if since is not None:
+        statement = statement.where(models.AuditEvent.occurred_at >= since)
+    if until is not None:
+        statement = statement.where(models.AuditEvent.occurred_at < until)
+    result = await session.execute(statement.limit(limit))
+    return list(result.scalars())
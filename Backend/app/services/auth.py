@@ -1,54 +1,108 @@
+import logging
+import time
+import uuid
+
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import security
 from app.core.config import settings
+from app.core.email import welcome_email
+from app.core.email_queue import email_dispatcher
 from app.core.security import AuthenticationError
 from app.schemas import auth as auth_schemas
 from app.schemas import user as user_schemas
 from app.services import users as user_service
+from app.services.audit import audit_log
+from app.services.refresh_tokens import RotationOutcome, refresh_token_store
+
+logger = logging.getLogger(__name__)
 
 
 async def register_user(
-    session: AsyncSession, payload: auth_schemas.RegisterRequest
+    session: AsyncSession, payload: auth_schemas.RegisterRequest, *, client_ip: str | None = None
 ) -> auth_schemas.Token:
-    existing_user = await user_service.get_user_by_email(session, payload.email)
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-
     user_in = user_schemas.UserCreate(
         email=payload.email, password=payload.password, full_name=payload.full_name
     )
-    await user_service.create_user(session, user_in)
-    return await login_user(session, auth_schemas.LoginRequest(email=payload.email, password=payload.password))
+    try:
+        user = await user_service.create_user(session, user_in)
+    except user_service.EmailAlreadyRegistered as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered") from exc
+    await email_dispatcher.enqueue(welcome_email(user.email, user.full_name))
+    audit_log.record("auth.register", actor=user.email, subject=user.id, ip=client_ip)
+    # The password was just hashed for the insert; verifying it again via login
+    # would only repeat the Argon2 work and the email lookup.
+    return await _start_session(user.email)
 
 
 async def login_user(
-    session: AsyncSession, payload: auth_schemas.LoginRequest
+    session: AsyncSession, payload: auth_schemas.LoginRequest, *, client_ip: str | None = None
 ) -> auth_schemas.Token:
     user = await user_service.get_user_by_email(session, payload.email)
-    if not user or not security.verify_password(payload.password, user.hashed_password):
+    if not user or not await security.verify_password_async(payload.password, user.hashed_password):
+        audit_log.record("auth.login_failed", actor=payload.email, ip=client_ip, reason="invalid_credentials")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
     if not user.is_active:
+        audit_log.record("auth.login_failed", actor=user.email, subject=user.id, ip=client_ip, reason="inactive")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
 
-    return _issue_tokens(user.email)
+    audit_log.record("auth.login", actor=user.email, subject=user.id, ip=client_ip)
+    return await _start_session(user.email)
 
 
-def _issue_tokens(subject: str) -> auth_schemas.Token:
+def _refresh_expires_at() -> float:
+    return time.time() + settings.refresh_token_expire_minutes * 60
+
+
+def _issue_tokens(subject: str, *, family: str, jti: str, version: int) -> auth_schemas.Token:
     access_token = security.create_access_token(subject)
-    refresh_token = security.create_refresh_token(subject)
+    refresh_token = security.create_refresh_token(
+        subject, claims={"jti": jti, "fid": family, "ver": version}
+    )
     return auth_schemas.Token(access_token=access_token, refresh_token=refresh_token)
 
 
-def refresh_tokens(refresh_token: str) -> auth_schemas.Token:
+async def _start_session(subject: str) -> auth_schemas.Token:
+    family, jti = uuid.uuid4().hex, uuid.uuid4().hex
+    version = await refresh_token_store.current_version(subject)
+    await refresh_token_store.issue(subject, family=family, jti=jti, expires_at=_refresh_expires_at())
+    return _issue_tokens(subject, family=family, jti=jti, version=version)
+
+
+def _refresh_claims(refresh_token: str) -> tuple[str, str, str, int]:
     try:
         payload = security.decode_token(refresh_token, secret=settings.jwt_refresh_secret_key)
-    except AuthenticationError as exc:  # pragma: no cover - defensive guard
+    except AuthenticationError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token") from exc
 
-    subject = payload.get("sub")
-    if subject is None:
+    # Tokens issued before rotation existed carry no family and are refused.
+    claims = [payload.get(claim) for claim in ("sub", "fid", "jti")]
+    version = payload.get("ver")
+    if not all(isinstance(value, str) for value in claims) or not isinstance(version, int):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    subject, family, jti = claims
+    return subject, family, jti, version
+
+
+async def refresh_tokens(refresh_token: str, *, client_ip: str | None = None) -> auth_schemas.Token:
+    subject, family, jti, version = _refresh_claims(refresh_token)
+    new_jti = uuid.uuid4().hex
+    outcome = await refresh_token_store.rotate(
+        subject, family=family, jti=jti, version=version, new_jti=new_jti, expires_at=_refresh_expires_at()
+    )
+    if outcome is RotationOutcome.REUSED:
+        logger.warning("Refresh token reuse detected for %s, revoked token family %s", subject, family)
+    if outcome is not RotationOutcome.ROTATED:
+        audit_log.record("auth.refresh_rejected", actor=subject, ip=client_ip, family=family, outcome=outcome.value)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
-    return _issue_tokens(subject)
+    audit_log.record("auth.refresh", actor=subject, ip=client_ip, family=family)
+
+    return _issue_tokens(subject, family=family, jti=new_jti, version=version)
+
+
+async def logout(refresh_token: str, *, client_ip: str | None = None) -> None:
+    subject, family, _, _ = _refresh_claims(refresh_token)
+    await refresh_token_store.revoke_family(subject, family)
+    audit_log.record("auth.logout", actor=subject, ip=client_ip, family=family)
@@ -0,0 +1,435 @@
+"""Bulk user import, export and batch admin operations.
+
+Imports are consumed as a stream of NDJSON or CSV lines and processed in
+batches: one query per batch finds emails that already exist, passwords are
+hashed in parallel on the hashing pool and the remaining rows are written with
+a single COPY (Postgres + asyncpg) or a multi-row INSERT. Each batch commits on
+its own so memory stays flat and progress survives a late failure.
+
+Batch operations apply many updates and deletes in one transaction: one locking
+SELECT finds the targets, deletes run as a single DELETE, updates sharing the
+same changes run as one UPDATE each, and per-user changes (emails, password
+hashes) go out as one executemany.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import uuid
+from collections.abc import AsyncIterator, Iterable
+from typing import Any, Literal
+
+from pydantic import ValidationError
+from sqlalchemy import ColumnElement, any_, bindparam, delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import get_password_hashes_async
+from app.db import models
+from app.db.session import WROTE_KEY
+from app.schemas.user import (
+    UserAdminCreate,
+    UserBatchItemResult,
+    UserBatchOperation,
+    UserBatchResult,
+    UserBatchUpdate,
+    UserImportError,
+    UserImportResult,
+)
+from app.services.principals import principal_cache
+from app.services.refresh_tokens import refresh_token_store
+from app.services.user_changes import USERS_INVALIDATED, user_changes
+from app.services.users import EmailAlreadyRegistered
+
+ImportFormat = Literal["ndjson", "csv"]
+
+MAX_REPORTED_ERRORS = 100
+
+EXPORT_COLUMNS = ("id", "email", "full_name", "is_active", "is_superuser", "created_at", "updated_at")
+COPY_COLUMNS = (
+    "id",
+    "email",
+    "hashed_password",
+    "full_name",
+    "is_active",
+    "is_superuser",
+    "created_at",
+    "updated_at",
+)
+
+
+class ImportFormatError(ValueError):
+    """Raised when an upload cannot be parsed at all, e.g. a CSV without a header."""
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """Split a byte stream into numbered text lines, blank ones included."""
+    buffer = bytearray()
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            line_number += 1
+            yield line_number, buffer[start:end].decode("utf-8").rstrip("\r")
+            start = end + 1
+        del buffer[:start]
+    if buffer:
+        yield line_number + 1, buffer.decode("utf-8").rstrip("\r")
+
+
+class _PendingLines:
+    """Lines handed to one long-lived ``csv.reader`` a record at a time."""
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def __iter__(self) -> "_PendingLines":
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.pop(0)
+
+
+async def _parse_rows(
+    lines: AsyncIterator[tuple[int, str]], import_format: ImportFormat
+) -> AsyncIterator[tuple[int, dict[str, Any] | None, str | None]]:
+    header: list[str] | None = None
+    pending = _PendingLines()
+    reader = csv.reader(pending)
+    record_start = 0
+    quotes = 0
+    async for line_number, line in lines:
+        if import_format == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, None, "Invalid JSON"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, record, None
+            continue
+
+        if not pending.lines:
+            if not line.strip():
+                continue
+            record_start = line_number
+        pending.lines.append(line + "\n")
+        # An odd number of quotes so far means a quoted field spans into the next line.
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        quotes = 0
+        values = next(reader)
+        if header is None:
+            header = [name.strip() for name in values]
+            if "email" not in header or "password" not in header:
+                raise ImportFormatError("CSV header must include email and password columns")
+            continue
+        if len(values) != len(header):
+            yield record_start, None, "Column count does not match the header"
+            continue
+        # Empty CSV cells mean "use the default" rather than an empty string.
+        yield record_start, {name: value for name, value in zip(header, values) if value != ""}, None
+
+    if pending.lines:
+        yield record_start, None, "Unterminated quoted field"
+
+
+async def import_users(
+    session: AsyncSession, lines: AsyncIterator[tuple[int, str]], import_format: ImportFormat
+) -> UserImportResult:
+    result = UserImportResult()
+    batch: list[UserAdminCreate] = []
+
+    try:
+        async for line_number, record, error in _parse_rows(lines, import_format):
+            if error is None:
+                try:
+                    batch.append(UserAdminCreate.model_validate(record))
+                except ValidationError as exc:
+                    error = "; ".join(item["msg"] for item in exc.errors())
+            if error is not None:
+                _record_error(result, line_number, error)
+                continue
+            if len(batch) >= settings.bulk_import_batch_size:
+                await _flush_batch(session, batch, result)
+                batch = []
+
+        if batch:
+            await _flush_batch(session, batch, result)
+    finally:
+        # Batches commit independently, so even a failed import may have added users.
+        if result.created:
+            await user_changes.publish([USERS_INVALIDATED])
+    return result
+
+
+def _record_error(result: UserImportResult, line_number: int, detail: str) -> None:
+    result.failed += 1
+    if len(result.errors) < MAX_REPORTED_ERRORS:
+        result.errors.append(UserImportError(line=line_number, detail=detail))
+
+
+async def _flush_batch(
+    session: AsyncSession, rows: list[UserAdminCreate], result: UserImportResult
+) -> None:
+    unique: dict[str, UserAdminCreate] = {}
+    for user_in in rows:
+        if user_in.email in unique:
+            result.skipped += 1
+            continue
+        unique[user_in.email] = user_in
+
+    existing = await session.execute(
+        select(models.User.email).where(models.User.email.in_(list(unique)))
+    )
+    for email in existing.scalars():
+        unique.pop(email, None)
+        result.skipped += 1
+    if not unique:
+        return
+
+    pending = list(unique.values())
+    hashes = await get_password_hashes_async([user_in.password for user_in in pending])
+    now = models.utcnow()
+    records = [
+        {
+            "id": uuid.uuid4(),
+            "email": user_in.email,
+            "hashed_password": hashed,
+            "full_name": user_in.full_name,
+            "is_active": user_in.is_active,
+            "is_superuser": user_in.is_superuser,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for user_in, hashed in zip(pending, hashes)
+    ]
+
+    if _can_copy(session):
+        if await _copy_records(session, records):
+            await session.commit()
+            result.created += len(records)
+            return
+        # A concurrent writer claimed one of the emails; retry the batch
+        # through the conflict-tolerant INSERT path below.
+        await session.rollback()
+
+    created = await _insert_records(session, records)
+    await session.commit()
+    result.created += created
+    result.skipped += len(records) - created
+
+
+def _can_copy(session: AsyncSession) -> bool:
+    dialect = session.get_bind().dialect
+    return settings.bulk_import_use_copy and dialect.name == "postgresql" and dialect.driver == "asyncpg"
+
+
+async def _copy_records(session: AsyncSession, records: list[dict[str, Any]]) -> bool:
+    from asyncpg.exceptions import UniqueViolationError
+
+    # COPY bypasses the ORM, so flag the write for read-your-writes routing.
+    session.info[WROTE_KEY] = True
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    try:
+        await raw_connection.driver_connection.copy_records_to_table(
+            models.User.__tablename__,
+            records=[tuple(record[column] for column in COPY_COLUMNS) for record in records],
+            columns=list(COPY_COLUMNS),
+        )
+    except UniqueViolationError:
+        return False
+    return True
+
+
+async def _insert_records(session: AsyncSession, records: list[dict[str, Any]]) -> int:
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(models.User).on_conflict_do_nothing(index_elements=["email"])
+    elif dialect == "sqlite":
+        statement = sqlite.insert(models.User).on_conflict_do_nothing(index_elements=["email"])
+    else:  # pragma: no cover - other backends fail the batch on duplicates
+        statement = insert(models.User)
+    inserted = await session.execute(statement.returning(models.User.id), records)
+    return len(inserted.all())
+
+
+def _id_in(session: AsyncSession, ids: list[uuid.UUID]) -> ColumnElement[bool]:
+    if session.get_bind().dialect.name == "postgresql":
+        # One array parameter keeps the statement text, and its cached plan,
+        # the same however many ids are sent.
+        array_type = postgresql.ARRAY(postgresql.UUID(as_uuid=True))
+        return models.User.id == any_(bindparam("ids", ids, type_=array_type, unique=True))
+    return models.User.id.in_(ids)
+
+
+async def apply_user_batch(session: AsyncSession, operations: list[UserBatchOperation]) -> UserBatchResult:
+    """Apply ``operations`` in one transaction and report the outcome of each.
+
+    Items that cannot apply (unknown or repeated ids, emails already taken) are
+    reported and skipped; the rest commit together. A unique violation that
+    slips past the email check by racing another writer rolls back the whole
+    batch and raises ``EmailAlreadyRegistered``.
+    """
+    outcomes: dict[int, tuple[str, str | None]] = {}
+    first_seen: dict[uuid.UUID, int] = {}
+    for index, operation in enumerate(operations):
+        if operation.id in first_seen:
+            outcomes[index] = ("duplicate", f"User already appears at index {first_seen[operation.id]}")
+        else:
+            first_seen[operation.id] = index
+
+    pending = {index: operations[index] for index in first_seen.values()}
+    # Hash before touching the database so no connection or row lock is held
+    # while the hashing pool works through the batch.
+    with_password = [
+        index
+        for index, operation in pending.items()
+        if isinstance(operation, UserBatchUpdate) and operation.changes.password
+    ]
+    hashed = await get_password_hashes_async([pending[index].changes.password for index in with_password])
+    hashes = dict(zip(with_password, hashed))
+
+    locked = await session.execute(
+        select(models.User.id, models.User.email).where(_id_in(session, list(first_seen))).with_for_update()
+    )
+    previous_emails: dict[uuid.UUID, str] = dict(locked.tuples().all())
+    for index, operation in list(pending.items()):
+        if operation.id not in previous_emails:
+            outcomes[index] = ("not_found", None)
+            del pending[index]
+
+    deletes = {index: operation for index, operation in pending.items() if operation.op == "delete"}
+    updates = {index: operation for index, operation in pending.items() if isinstance(operation, UserBatchUpdate)}
+    await _reject_email_conflicts(session, updates, previous_emails, {op.id for op in deletes.values()}, outcomes)
+
+    shared: dict[tuple[tuple[str, Any], ...], list[uuid.UUID]] = {}
+    per_user: list[dict[str, Any]] = []
+    revoked: set[str] = {previous_emails[operation.id] for operation in deletes.values()}
+    new_emails: set[str] = set()
+    for index, operation in updates.items():
+        changes = operation.changes.model_dump(exclude_none=True, exclude={"password"})
+        if index in hashes:
+            changes["hashed_password"] = hashes[index]
+        previous_email = previous_emails[operation.id]
+        email_changed = changes.get("email", previous_email) != previous_email
+        if changes.get("is_active") is False or "hashed_password" in changes or email_changed:
+            # As with single updates, these end every existing session.
+            revoked.add(previous_email)
+        if email_changed:
+            new_emails.add(changes["email"])
+        if "email" in changes or "hashed_password" in changes:
+            per_user.append({"id": operation.id, **changes})
+        elif changes:
+            shared.setdefault(tuple(sorted(changes.items())), []).append(operation.id)
+        outcomes[index] = ("updated", None)
+
+    try:
+        if deletes:
+            await session.execute(delete(models.User).where(_id_in(session, [op.id for op in deletes.values()])))
+        for changes, ids in shared.items():
+            await session.execute(
+                update(models.User)
+                .where(_id_in(session, ids))
+                .values(dict(changes))
+                .execution_options(synchronize_session=False)
+            )
+        if per_user:
+            # ORM bulk UPDATE by primary key: one executemany for all rows.
+            await session.execute(update(models.User), per_user)
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+        raise EmailAlreadyRegistered(", ".join(sorted(new_emails))) from exc
+    outcomes.update({index: ("deleted", None) for index in deletes})
+
+    affected = {previous_emails[operation.id] for operation in pending.values()} | new_emails
+    await principal_cache.invalidate(*affected)
+    await asyncio.gather(*(refresh_token_store.revoke_all(email) for email in revoked))
+    # Updated rows were never loaded, so subscribers reload the list once
+    # instead of re-fetching it for every row.
+    if deletes or updates:
+        await user_changes.publish([USERS_INVALIDATED])
+
+    result = UserBatchResult()
+    for index, operation in enumerate(operations):
+        status, detail = outcomes[index]
+        result.results.append(
+            UserBatchItemResult(index=index, id=operation.id, op=operation.op, status=status, detail=detail)
+        )
+        if status == "updated":
+            result.updated += 1
+        elif status == "deleted":
+            result.deleted += 1
+        else:
+            result.failed += 1
+    return result
+
+
+async def _reject_email_conflicts(
+    session: AsyncSession,
+    updates: dict[int, UserBatchUpdate],
+    previous_emails: dict[uuid.UUID, str],
+    deleted_ids: set[uuid.UUID],
+    outcomes: dict[int, tuple[str, str | None]],
+) -> None:
+    """Drop updates whose new email is taken, by another user or earlier in the batch."""
+    claimed: dict[str, int] = {}
+    for index, operation in list(updates.items()):
+        email = operation.changes.email
+        if email is None or email == previous_emails[operation.id]:
+            continue
+        if email in claimed:
+            outcomes[index] = ("conflict", f"Email already requested at index {claimed[email]}")
+            del updates[index]
+        else:
+            claimed[email] = index
+    if not claimed:
+        return
+
+    owners = await session.execute(
+        select(models.User.email, models.User.id).where(models.User.email.in_(list(claimed)))
+    )
+    for email, owner_id in owners.tuples():
+        index = claimed[email]
+        # Users deleted by this batch free their email before updates run.
+        if owner_id != updates[index].id and owner_id not in deleted_ids:
+            outcomes[index] = ("conflict", "Email already registered")
+            del updates[index]
+
+
+def export_row(user: models.User) -> dict[str, Any]:
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "full_name": user.full_name,
+        "is_active": user.is_active,
+        "is_superuser": user.is_superuser,
+        "created_at": user.created_at.isoformat(),
+        "updated_at": user.updated_at.isoformat(),
+    }
+
+
+async def export_csv_lines(users: AsyncIterator[models.User]) -> AsyncIterator[bytes]:
+    yield _csv_line(EXPORT_COLUMNS)
+    async for user in users:
+        row = export_row(user)
+        yield _csv_line("" if row[column] is None else row[column] for column in EXPORT_COLUMNS)
+
+
+def _csv_line(values: Iterable[Any]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue().encode()
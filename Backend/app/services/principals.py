@@ -0,0 +1,95 @@
+"""Cache of authenticated principals keyed by token subject.
+
+Resolving the user behind an access token is the only database work most
+authenticated reads need, so the resolved profile is kept in an in-process LRU
+with a short TTL and, optionally, in Redis so other workers can reuse it.
+Writes to a user invalidate both tiers; other workers' in-process entries age
+out within ``principal_cache_ttl_seconds``.
+"""
+
+import logging
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.schemas.user import UserRead
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "principal:"
+
+
+class PrincipalCache:
+    def __init__(self, *, ttl_seconds: int, max_entries: int, use_redis: bool) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+        self._local: TTLCache[str, UserRead] = TTLCache(max_entries=max_entries, ttl=ttl_seconds)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    async def get(self, subject: str) -> UserRead | None:
+        if not self.enabled:
+            return None
+
+        principal = self._local.get(subject)
+        if principal is not None or not self.use_redis:
+            return principal
+
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(REDIS_KEY_PREFIX + subject)
+        except Exception:  # pragma: no cover - cache is best effort
+            logger.warning("Principal cache lookup failed", exc_info=True)
+            return None
+        if raw is None:
+            return None
+
+        principal = UserRead.model_validate_json(raw)
+        self._local.set(subject, principal)
+        return principal
+
+    async def set(self, principal: UserRead) -> None:
+        if not self.enabled:
+            return
+
+        self._local.set(principal.email, principal)
+        if not self.use_redis:
+            return
+
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(
+                REDIS_KEY_PREFIX + principal.email, principal.model_dump_json(), ex=self.ttl_seconds
+            )
+        except Exception:  # pragma: no cover - cache is best effort
+            logger.warning("Principal cache write failed", exc_info=True)
+
+    async def invalidate(self, *subjects: str) -> None:
+        for subject in subjects:
+            self._local.pop(subject)
+        if not self.use_redis or not subjects:
+            return
+
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.delete(*(REDIS_KEY_PREFIX + subject for subject in subjects))
+        except Exception:  # pragma: no cover - cache is best effort
+            logger.warning("Principal cache invalidation failed", exc_info=True)
+
+    def clear(self) -> None:
+        self._local.clear()
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+    max_entries=settings.principal_cache_max_entries,
+    use_redis=settings.principal_cache_redis,
+)
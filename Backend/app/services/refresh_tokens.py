@@ -0,0 +1,246 @@
+"""Refresh-token rotation and revocation.
+
+Every login starts a token *family*. Each refresh token carries the family id,
+its own ``jti`` and the user's token version; the store keeps only the family's
+current ``jti``. Refreshing swaps in a new ``jti``, so presenting an older token
+from the same family means it was copied and the whole family is revoked.
+Bumping a user's token version revokes every family at once. Each check is a
+single key lookup and never touches Postgres.
+
+The Redis store is shared by all workers and indexes each user's families in a
+sorted set scored by expiry so expired entries are pruned on write. The
+in-memory store serves single-node deployments and tests, and takes over when
+Redis is unreachable.
+"""
+
+import enum
+import logging
+import time
+from typing import Protocol
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class RotationOutcome(str, enum.Enum):
+    ROTATED = "rotated"
+    REUSED = "reused"
+    REVOKED = "revoked"
+
+
+class RefreshTokenStore(Protocol):
+    async def current_version(self, subject: str) -> int:
+        ...
+
+    async def issue(self, subject: str, *, family: str, jti: str, expires_at: float) -> None:
+        ...
+
+    async def rotate(
+        self, subject: str, *, family: str, jti: str, version: int, new_jti: str, expires_at: float
+    ) -> RotationOutcome:
+        ...
+
+    async def revoke_family(self, subject: str, family: str) -> None:
+        ...
+
+    async def revoke_all(self, subject: str) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class InMemoryRefreshTokenStore:
+    def __init__(self, *, max_families: int = 100_000, max_users: int = 100_000) -> None:
+        self._families: TTLCache[str, tuple[str, str]] = TTLCache(max_entries=max_families)
+        # Both per-user maps expire with the last refresh token they describe,
+        # so users who stop signing in do not keep entries forever.
+        self._user_families: TTLCache[str, dict[str, float]] = TTLCache(max_entries=max_users)
+        self._versions: TTLCache[str, int] = TTLCache(max_entries=max_users)
+        self.version_ttl = settings.refresh_token_expire_minutes * 60
+
+    async def current_version(self, subject: str) -> int:
+        return self._versions.get(subject) or 0
+
+    def _index(self, subject: str, family: str, expires_at: float) -> None:
+        now = time.time()
+        families = self._user_families.get(subject) or {}
+        families = {name: deadline for name, deadline in families.items() if deadline > now}
+        families[family] = expires_at
+        self._user_families.set(subject, families, expires_at=max(families.values()))
+        version = self._versions.get(subject)
+        if version:
+            # Tokens carrying this version must not outlive it.
+            self._versions.set(subject, version, expires_at=max(expires_at, now + self.version_ttl))
+
+    async def issue(self, subject: str, *, family: str, jti: str, expires_at: float) -> None:
+        self._families.set(family, (jti, subject), expires_at=expires_at)
+        self._index(subject, family, expires_at)
+
+    async def rotate(
+        self, subject: str, *, family: str, jti: str, version: int, new_jti: str, expires_at: float
+    ) -> RotationOutcome:
+        current = self._families.get(family)
+        if current is None or version != await self.current_version(subject):
+            self._families.pop(family)
+            return RotationOutcome.REVOKED
+        if current != (jti, subject):
+            await self.revoke_family(subject, family)
+            return RotationOutcome.REUSED
+        await self.issue(subject, family=family, jti=new_jti, expires_at=expires_at)
+        return RotationOutcome.ROTATED
+
+    async def revoke_family(self, subject: str, family: str) -> None:
+        self._families.pop(family)
+        families = self._user_families.get(subject)
+        if families is not None:
+            families.pop(family, None)
+            if not families:
+                self._user_families.pop(subject)
+
+    async def revoke_all(self, subject: str) -> None:
+        version = await self.current_version(subject) + 1
+        self._versions.set(subject, version, expires_at=time.time() + self.version_ttl)
+        for family in self._user_families.get(subject) or {}:
+            self._families.pop(family)
+        self._user_families.pop(subject)
+
+    def clear(self) -> None:
+        self._families.clear()
+        self._user_families.clear()
+        self._versions.clear()
+
+
+# KEYS: family, user version, user family index
+# ARGV: presented jti, presented version, new jti, new expiry (unix seconds), family id, now
+_ROTATE_SCRIPT = """
+local version = tonumber(redis.call('GET', KEYS[2]) or '0')
+local current = redis.call('GET', KEYS[1])
+if not current or version ~= tonumber(ARGV[2]) then
+  redis.call('DEL', KEYS[1])
+  return 'revoked'
+end
+if current ~= ARGV[1] then
+  redis.call('DEL', KEYS[1])
+  redis.call('ZREM', KEYS[3], ARGV[5])
+  return 'reused'
+end
+redis.call('SET', KEYS[1], ARGV[3], 'EXAT', ARGV[4])
+redis.call('ZADD', KEYS[3], ARGV[4], ARGV[5])
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', ARGV[6])
+return 'rotated'
+"""
+
+# KEYS: user version, user family index; ARGV: family key prefix
+_REVOKE_ALL_SCRIPT = """
+redis.call('INCR', KEYS[1])
+local families = redis.call('ZRANGE', KEYS[2], 0, -1)
+for _, family in ipairs(families) do
+  redis.call('DEL', ARGV[1] .. family)
+end
+redis.call('DEL', KEYS[2])
+return #families
+"""
+
+
+class RedisRefreshTokenStore:
+    def __init__(self, *, fallback: InMemoryRefreshTokenStore, prefix: str = "refresh:") -> None:
+        self.fallback = fallback
+        self.family_prefix = prefix + "family:"
+        self.version_prefix = prefix + "version:"
+        self.index_prefix = prefix + "families:"
+
+    async def current_version(self, subject: str) -> int:
+        redis = get_redis()
+        if redis is None:
+            return await self.fallback.current_version(subject)
+        try:
+            return int(await redis.get(self.version_prefix + subject) or 0)
+        except Exception:
+            logger.warning("Redis refresh token store unavailable, using in-memory store", exc_info=True)
+            return await self.fallback.current_version(subject)
+
+    async def issue(self, subject: str, *, family: str, jti: str, expires_at: float) -> None:
+        redis = get_redis()
+        if redis is None:
+            await self.fallback.issue(subject, family=family, jti=jti, expires_at=expires_at)
+            return
+        index_key = self.index_prefix + subject
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.set(self.family_prefix + family, jti, exat=int(expires_at))
+                pipe.zadd(index_key, {family: int(expires_at)})
+                pipe.zremrangebyscore(index_key, "-inf", int(time.time()))
+                await pipe.execute()
+        except Exception:
+            logger.warning("Redis refresh token store unavailable, using in-memory store", exc_info=True)
+            await self.fallback.issue(subject, family=family, jti=jti, expires_at=expires_at)
+
+    async def rotate(
+        self, subject: str, *, family: str, jti: str, version: int, new_jti: str, expires_at: float
+    ) -> RotationOutcome:
+        redis = get_redis()
+        if redis is None:
+            return await self.fallback.rotate(
+                subject, family=family, jti=jti, version=version, new_jti=new_jti, expires_at=expires_at
+            )
+        try:
+            outcome = await redis.eval(
+                _ROTATE_SCRIPT,
+                3,
+                self.family_prefix + family,
+                self.version_prefix + subject,
+                self.index_prefix + subject,
+                jti,
+                version,
+                new_jti,
+                int(expires_at),
+                family,
+                int(time.time()),
+            )
+        except Exception:
+            logger.warning("Redis refresh token store unavailable, using in-memory store", exc_info=True)
+            return await self.fallback.rotate(
+                subject, family=family, jti=jti, version=version, new_jti=new_jti, expires_at=expires_at
+            )
+        return RotationOutcome(outcome)
+
+    async def revoke_family(self, subject: str, family: str) -> None:
+        await self.fallback.revoke_family(subject, family)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self.family_prefix + family)
+                pipe.zrem(self.index_prefix + subject, family)
+                await pipe.execute()
+        except Exception:
+            # Logging out still succeeds; the family stays valid in Redis until it expires.
+            logger.warning("Redis refresh token store unavailable, revoked in memory only", exc_info=True)
+
+    async def revoke_all(self, subject: str) -> None:
+        # Revocation must not be lost to a Redis outage, so errors propagate.
+        await self.fallback.revoke_all(subject)
+        redis = get_redis()
+        if redis is None:
+            return
+        await redis.eval(
+            _REVOKE_ALL_SCRIPT, 2, self.version_prefix + subject, self.index_prefix + subject, self.family_prefix
+        )
+
+    def clear(self) -> None:
+        self.fallback.clear()
+
+
+def build_refresh_token_store() -> RefreshTokenStore:
+    memory = InMemoryRefreshTokenStore()
+    if settings.refresh_token_store == "redis":
+        return RedisRefreshTokenStore(fallback=memory)
+    return memory
+
+
+refresh_token_store = build_refresh_token_store()
@@ -0,0 +1,281 @@
+"""Feed of user record changes for ``GET /users/changes``.
+
+``services.users`` publishes an event after every committed create, update and
+delete. Each worker fans events out to the streams it serves from memory. With
+``USER_CHANGES_BACKEND=redis`` events are appended to a Redis stream instead and
+every worker reads that stream, so a subscriber sees writes made on any worker;
+the stream also serves as the history that reconnecting clients resume from.
+
+Event ids have the Redis stream form ``<milliseconds>-<sequence>``; the memory
+backend prefixes them with a per-process instance id, since another worker's
+counter covers the same range but not the same events. A client
+that reconnects with a ``Last-Event-ID`` outside the retained history, or one
+that falls too far behind, gets a single ``users.invalidated`` event telling it
+to reload the list rather than a partial replay.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from typing import Any, Literal
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.redis import get_redis
+from app.schemas.user import dump_user_json
+
+logger = logging.getLogger(__name__)
+
+ChangeType = Literal["user.created", "user.updated", "user.deleted", "users.invalidated"]
+
+user_changes_published_total = registry.counter(
+    "user_changes_published_total",
+    "User change events published, by type.",
+    ["type"],
+)
+user_change_resets_total = registry.counter(
+    "user_change_resets_total",
+    "Subscribers told to reload instead of receiving missed events, by reason.",
+    ["reason"],
+)
+user_change_subscribers = registry.gauge(
+    "user_change_subscribers",
+    "Open user change streams on this worker.",
+)
+
+
+@dataclass(frozen=True)
+class UserChange:
+    id: str
+    type: str
+    data: str
+
+
+def user_change(type: ChangeType, user_id: UUID | str, user: Any = None) -> tuple[str, str]:
+    """Build the ``(type, data)`` pair for one event; ``user`` is omitted for deletes and bulk writes."""
+    body = dump_user_json(user).decode() if user is not None else "null"
+    return type, f'{{"id":"{user_id}","user":{body}}}'
+
+
+# Too many rows changed to describe one by one; subscribers reload the list.
+USERS_INVALIDATED = ("users.invalidated", "{}")
+
+
+def _id_key(event_id: str) -> tuple[int, int] | None:
+    milliseconds, _, sequence = event_id.rpartition(":")[2].partition("-")
+    try:
+        return int(milliseconds), int(sequence or 0)
+    except ValueError:
+        return None
+
+
+class _Subscriber:
+    def __init__(self, queue_size: int) -> None:
+        self.queue: asyncio.Queue[UserChange] = asyncio.Queue(queue_size)
+
+    def deliver(self, change: UserChange) -> None:
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            # Too slow to keep up: replace the backlog with one reload covering
+            # everything up to this change.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(UserChange(change.id, *USERS_INVALIDATED))
+            user_change_resets_total.inc(reason="overflow")
+
+
+class UserChangeFeed:
+    def __init__(
+        self,
+        *,
+        history_size: int = 1000,
+        queue_size: int = 1000,
+        use_redis: bool = False,
+        stream_key: str = "user-changes",
+        block_seconds: float = 1.0,
+    ) -> None:
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.use_redis = use_redis
+        self.stream_key = stream_key
+        self.block_seconds = block_seconds
+        self._instance = uuid.uuid4().hex[:12]
+        self._subscribers: set[_Subscriber] = set()
+        self._history: deque[UserChange] = deque()
+        self._last_ms = 0
+        self._sequence = 0
+        # Every event after this id is still in ``_history``.
+        self._floor = self._next_id()
+        self._task: asyncio.Task | None = None
+
+    def _next_id(self) -> str:
+        now = int(time.time() * 1000)
+        if now > self._last_ms:
+            self._last_ms, self._sequence = now, 0
+        else:
+            self._sequence += 1
+        return f"{self._instance}:{self._last_ms}-{self._sequence}"
+
+    async def publish(self, changes: Iterable[tuple[str, str]]) -> None:
+        """Publish ``(type, data)`` events, as built by ``user_change``, after a commit."""
+        changes = list(changes)
+        if not changes:
+            return
+        for type, _ in changes:
+            user_changes_published_total.inc(type=type)
+
+        redis = get_redis() if self.use_redis else None
+        if redis is not None:
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for type, data in changes:
+                        pipe.xadd(
+                            self.stream_key,
+                            {"type": type, "data": data},
+                            maxlen=self.history_size,
+                            approximate=True,
+                        )
+                    await pipe.execute()
+                return
+            except Exception:
+                logger.warning("Redis change feed unavailable, publishing on this worker only", exc_info=True)
+        self._dispatch([UserChange(self._next_id(), type, data) for type, data in changes])
+
+    def _dispatch(self, changes: list[UserChange]) -> None:
+        for change in changes:
+            if len(self._history) >= self.history_size:
+                self._floor = self._history.popleft().id
+            self._history.append(change)
+        for subscriber in self._subscribers:
+            for change in changes:
+                subscriber.deliver(change)
+
+    async def _backlog(self, last_event_id: str | None) -> tuple[str, list[UserChange] | None]:
+        """Return the newest id and the events after ``last_event_id``.
+
+        The events are ``None`` when there is no ``last_event_id`` or some of
+        the events after it are no longer retained.
+        """
+        after = _id_key(last_event_id) if last_event_id is not None else None
+        if not self.use_redis or get_redis() is None:
+            newest = self._history[-1].id if self._history else self._floor
+            # Ids issued by another worker say nothing about what this one published.
+            if not (last_event_id or "").startswith(f"{self._instance}:"):
+                after = None
+            if after is None or not _id_key(self._floor) <= after <= _id_key(newest):
+                return newest, None
+            return newest, [change for change in self._history if _id_key(change.id) > after]
+
+        redis = get_redis()
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.xrange(self.stream_key, count=1)
+                pipe.xrevrange(self.stream_key, count=1)
+                first, last = await pipe.execute()
+            oldest = first[0][0] if first else "0-0"
+            newest = last[0][0] if last else "0-0"
+            if after is None or not _id_key(oldest) <= after <= _id_key(newest):
+                return newest, None
+            entries = await redis.xrange(self.stream_key, min=last_event_id, max=newest)
+        except Exception:
+            logger.warning("Could not read user change history from Redis", exc_info=True)
+            return last_event_id or "0-0", None
+        backlog = [UserChange(entry_id, fields["type"], fields["data"]) for entry_id, fields in entries]
+        return newest, [change for change in backlog if change.id != last_event_id]
+
+    async def subscribe(
+        self, last_event_id: str | None = None, *, idle_timeout: float = 15.0
+    ) -> AsyncIterator[UserChange | None]:
+        """Yield the events published after ``last_event_id``, then new ones as they arrive.
+
+        Without a resumable ``last_event_id`` the first event is
+        ``users.invalidated``, carrying the newest id, so the client loads the
+        list only once it is subscribed. Yields ``None`` whenever
+        ``idle_timeout`` seconds pass without an event, so the caller can keep
+        the connection alive.
+        """
+        subscriber = _Subscriber(self.queue_size)
+        # Subscribe before reading the backlog so nothing published in between
+        # is lost; events seen in both are skipped below.
+        self._subscribers.add(subscriber)
+        try:
+            newest, backlog = await self._backlog(last_event_id)
+            if backlog is None:
+                if last_event_id is not None:
+                    user_change_resets_total.inc(reason="resume")
+                backlog = [UserChange(newest, *USERS_INVALIDATED)]
+            for change in backlog:
+                yield change
+
+            seen = _id_key(newest)
+            while True:
+                try:
+                    change = await asyncio.wait_for(subscriber.queue.get(), timeout=idle_timeout)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                key = _id_key(change.id)
+                if key <= seen and change.type != USERS_INVALIDATED[0]:
+                    continue
+                seen = max(seen, key)
+                yield change
+        finally:
+            self._subscribers.discard(subscriber)
+
+    async def _read_stream(self) -> None:
+        last_id = "$"
+        while True:
+            redis = get_redis()
+            if redis is None:
+                return
+            try:
+                response = await redis.xread(
+                    {self.stream_key: last_id}, count=500, block=int(self.block_seconds * 1000)
+                )
+            except Exception:
+                logger.warning("Could not read the user change stream from Redis", exc_info=True)
+                await asyncio.sleep(self.block_seconds)
+                continue
+            for _, entries in response or []:
+                if entries:
+                    last_id = entries[-1][0]
+                    self._dispatch(
+                        [UserChange(entry_id, fields["type"], fields["data"]) for entry_id, fields in entries]
+                    )
+
+    async def start(self) -> None:
+        if self.use_redis and self._task is None and get_redis() is not None:
+            self._task = asyncio.create_task(self._read_stream(), name="user-changes-reader")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def clear(self) -> None:
+        self._history.clear()
+        self._floor = self._next_id()
+
+
+user_changes = UserChangeFeed(
+    history_size=settings.user_changes_history_size,
+    use_redis=settings.user_changes_backend == "redis",
+)
+
+
+def _collect_subscribers() -> None:
+    user_change_subscribers.set(user_changes.subscribers)
+
+
+registry.register_collector(_collect_subscribers)
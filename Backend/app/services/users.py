@@ -1,11 +1,24 @@
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
-from sqlalchemy import delete, select
+from sqlalchemy import ColumnElement, Select, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
 
-from app.core.security import get_password_hash
+from app.core.config import settings
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.core.security import get_password_hash_async
 from app.db import models
+from app.db.estimates import estimate_rows, supports_estimates
+from app.db.session import SessionFactory
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.principals import principal_cache
+from app.services.refresh_tokens import refresh_token_store
+from app.services.user_changes import user_change, user_changes
 
 
 async def get_user_by_email(session: AsyncSession, email: str) -> models.User | None:
@@ -13,35 +26,92 @@ async def get_user_by_email(session: AsyncSession, email: str) -> models.User |
     return result.scalar_one_or_none()
 
 
+class EmailAlreadyRegistered(Exception):
+    """Raised when a write collides with the unique index on ``users.email``."""
+
+
+# Write paths issue a single INSERT/UPDATE/DELETE ... RETURNING and let the
+# unique index on users.email reject duplicates, instead of pre-checking with a
+# SELECT and reloading the row after commit.
+
+
 async def create_user(session: AsyncSession, user_in: UserCreate) -> models.User:
-    db_user = models.User(
-        email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
-        full_name=user_in.full_name,
-        is_active=user_in.is_active,
-        is_superuser=user_in.is_superuser,
+    statement = (
+        insert(models.User)
+        .values(
+            email=user_in.email,
+            hashed_password=await get_password_hash_async(user_in.password),
+            full_name=user_in.full_name,
+            is_active=user_in.is_active,
+            is_superuser=user_in.is_superuser,
+        )
+        .returning(models.User)
     )
-    session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
-    return db_user
-
-
-async def update_user(session: AsyncSession, user: models.User, payload: UserUpdate) -> models.User:
-    if payload.email is not None:
-        user.email = payload.email
-    if payload.full_name is not None:
-        user.full_name = payload.full_name
-    if payload.is_active is not None:
-        user.is_active = payload.is_active
-    if payload.is_superuser is not None:
-        user.is_superuser = payload.is_superuser
+    try:
+        user = (await session.execute(statement)).scalar_one()
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+        raise EmailAlreadyRegistered(user_in.email) from exc
+    await user_changes.publish([user_change("user.created", user.id, user)])
+    return user
+
+
+async def _update_changes(payload: UserUpdate) -> dict[str, object]:
+    changes = payload.model_dump(exclude_none=True, exclude={"password"})
     if payload.password:
-        user.hashed_password = get_password_hash(payload.password)
+        changes["hashed_password"] = await get_password_hash_async(payload.password)
+    return changes
 
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
+
+async def update_user(session: AsyncSession, user_id: UUID, payload: UserUpdate) -> models.User | None:
+    """Apply ``payload`` to the user and return the updated row, or ``None`` if it does not exist."""
+    changes = await _update_changes(payload)
+    if not changes:
+        return await get_user(session, user_id)
+
+    statement = (
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(**changes)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    returning: list = [models.User]
+    previous_email = None
+    if "email" in changes:
+        if session.get_bind().dialect.name == "postgresql":
+            # A self-join reads the row as it was before this statement, so the
+            # old email for cache invalidation comes back in the same round-trip.
+            previous = (
+                select(models.User.id, models.User.email)
+                .where(models.User.id == user_id)
+                .with_for_update()
+                .subquery("previous")
+            )
+            statement = statement.where(previous.c.id == models.User.id)
+            returning.append(previous.c.email)
+        else:
+            # RETURNING elsewhere only sees the new row, so read the old email first.
+            previous_email = await session.scalar(select(models.User.email).where(models.User.id == user_id))
+
+    try:
+        row = (await session.execute(statement.returning(*returning))).one_or_none()
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+        raise EmailAlreadyRegistered(changes["email"]) from exc
+    if row is None:
+        return None
+
+    user, *previous_values = row
+    if previous_values:
+        previous_email = previous_values[0]
+    previous_email = previous_email or user.email
+    await principal_cache.invalidate(*{previous_email, user.email})
+    if payload.is_active is False or "hashed_password" in changes or previous_email != user.email:
+        # Deactivation, a new password or a new email ends every existing session.
+        await refresh_token_store.revoke_all(previous_email)
+    await user_changes.publish([user_change("user.updated", user.id, user)])
     return user
 
 
@@ -49,11 +119,164 @@ async def get_user(session: AsyncSession, user_id: UUID) -> models.User | None:
     return await session.get(models.User, user_id)
 
 
-async def list_users(session: AsyncSession) -> list[models.User]:
-    result = await session.execute(select(models.User).order_by(models.User.created_at))
+UserSort = Literal["created_at", "-created_at", "updated_at", "-updated_at", "email", "-email"]
+UserCursor = tuple[object, ...]
+
+STREAM_BATCH_SIZE = 500
+# Trigrams need three characters; shorter substring terms fall back to a
+# prefix match so they can still use an index.
+MIN_SUBSTRING_SEARCH_LENGTH = 3
+LIKE_ESCAPE = "/"
+
+
+@dataclass(frozen=True)
+class UserFilters:
+    is_active: bool | None = None
+    is_superuser: bool | None = None
+    search: str | None = None
+    search_mode: Literal["substring", "prefix"] = "substring"
+
+    def __bool__(self) -> bool:
+        return self.is_active is not None or self.is_superuser is not None or bool(self.search)
+
+
+def _sort_keys(sort: UserSort) -> tuple[list[InstrumentedAttribute], bool]:
+    column = getattr(models.User, sort.removeprefix("-"))
+    # email is unique and orders rows on its own; timestamps need id as a
+    # tie-breaker so the keyset predicate never skips or repeats rows.
+    keys = [column] if column.key == "email" else [column, models.User.id]
+    return keys, sort.startswith("-")
+
+
+def encode_user_cursor(user: models.User, sort: UserSort = "created_at") -> str:
+    keys, _ = _sort_keys(sort)
+    values = [getattr(user, key.key) for key in keys]
+    return encode_cursor(sort, *(value.isoformat() if isinstance(value, datetime) else value for value in values))
+
+
+def decode_user_cursor(cursor: str, sort: UserSort = "created_at") -> UserCursor:
+    keys, _ = _sort_keys(sort)
+    cursor_sort, *values = decode_cursor(cursor, size=len(keys) + 1)
+    if cursor_sort != sort:
+        raise InvalidCursor("Cursor belongs to a different sort order")
+    try:
+        return tuple(_parse_cursor_value(key.key, value) for key, value in zip(keys, values))
+    except ValueError as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+
+
+def _parse_cursor_value(key: str, value: str) -> object:
+    if key == "id":
+        return UUID(value)
+    if key in ("created_at", "updated_at"):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _like_pattern(term: str, *, prefix: bool) -> str:
+    escaped = term.lower().replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+    escaped = escaped.replace("%", LIKE_ESCAPE + "%").replace("_", LIKE_ESCAPE + "_")
+    return f"{escaped}%" if prefix else f"%{escaped}%"
+
+
+def _filter_conditions(filters: UserFilters) -> list[ColumnElement[bool]]:
+    conditions: list[ColumnElement[bool]] = []
+    if filters.is_active is not None:
+        conditions.append(models.User.is_active == filters.is_active)
+    if filters.is_superuser is not None:
+        conditions.append(models.User.is_superuser == filters.is_superuser)
+    if filters.search:
+        prefix = filters.search_mode == "prefix" or len(filters.search) < MIN_SUBSTRING_SEARCH_LENGTH
+        pattern = _like_pattern(filters.search, prefix=prefix)
+        # lower(column) matches the expression indexes from migration 20261017_0004.
+        conditions.append(
+            or_(
+                func.lower(models.User.email).like(pattern, escape=LIKE_ESCAPE),
+                func.lower(models.User.full_name).like(pattern, escape=LIKE_ESCAPE),
+            )
+        )
+    return conditions
+
+
+def _users_in_order(
+    after: UserCursor | None, filters: UserFilters, sort: UserSort
+) -> Select[tuple[models.User]]:
+    keys, descending = _sort_keys(sort)
+    statement = select(models.User).where(*_filter_conditions(filters))
+    statement = statement.order_by(*(key.desc() if descending else key for key in keys))
+    if after is not None:
+        position = tuple_(*keys) if len(keys) > 1 else keys[0]
+        boundary = tuple_(*after) if len(keys) > 1 else after[0]
+        statement = statement.where(position < boundary if descending else position > boundary)
+    return statement
+
+
+async def list_users(
+    session: AsyncSession,
+    *,
+    limit: int | None = None,
+    after: UserCursor | None = None,
+    filters: UserFilters = UserFilters(),
+    sort: UserSort = "created_at",
+) -> list[models.User]:
+    statement = _users_in_order(after, filters, sort)
+    if limit is not None:
+        statement = statement.limit(limit)
+    result = await session.execute(statement)
     return list(result.scalars())
 
 
-async def delete_user(session: AsyncSession, user: models.User) -> None:
-    await session.execute(delete(models.User).where(models.User.id == user.id))
+async def count_users(session: AsyncSession, filters: UserFilters = UserFilters()) -> tuple[int, bool]:
+    """Return ``(count, exact)`` for the users matching ``filters``.
+
+    On Postgres the planner estimate is used as is once it exceeds
+    ``users_exact_count_threshold``: counting a large match exactly means
+    visiting every matching row, which is what keeps searches slow.
+    """
+    conditions = _filter_conditions(filters)
+    if supports_estimates(session):
+        estimate = await estimate_rows(session, select(models.User.id).where(*conditions))
+        if estimate > settings.users_exact_count_threshold:
+            return estimate, False
+    result = await session.execute(select(func.count()).select_from(models.User).where(*conditions))
+    return result.scalar_one(), True
+
+
+async def users_fingerprint(session: AsyncSession) -> tuple[datetime | None, int]:
+    """Return ``(max(updated_at), count)``, which changes whenever any user does."""
+    result = await session.execute(select(func.max(models.User.updated_at), func.count(models.User.id)))
+    last_updated, count = result.one()
+    return last_updated, count
+
+
+async def stream_users(
+    session_factory: SessionFactory,
+    *,
+    after: UserCursor | None = None,
+    filters: UserFilters = UserFilters(),
+    sort: UserSort = "created_at",
+) -> AsyncIterator[models.User]:
+    """Yield matching users in ``sort`` order without materialising the whole table.
+
+    The stream owns its session because it outlives the request's dependencies.
+    """
+    async with session_factory() as session:
+        statement = _users_in_order(after, filters, sort).execution_options(yield_per=STREAM_BATCH_SIZE)
+        result = await session.stream(statement)
+        async for user in result.scalars():
+            yield user
+
+
+async def delete_user(session: AsyncSession, user_id: UUID) -> bool:
+    """Delete the user and return whether it existed."""
+    result = await session.execute(
+        delete(models.User).where(models.User.id == user_id).returning(models.User.email)
+    )
+    email = result.scalar_one_or_none()
     await session.commit()
+    if email is None:
+        return False
+    await principal_cache.invalidate(email)
+    await refresh_token_store.revoke_all(email)
+    await user_changes.publish([user_change("user.deleted", user_id)])
+    return True
@@ -0,0 +1,197 @@
+"""Throughput, latency and allocation benchmarks for the API hot paths.
+
+Run from the ``Backend/`` directory::
+
+    python -m benchmarks.bench_api --output baseline.json
+    python -m benchmarks.bench_api --compare baseline.json --threshold 0.15
+
+Requests go through ``httpx.ASGITransport`` by default, or through a real
+uvicorn server on a local port with ``--transport uvicorn``. The database is an
+in-memory SQLite like the test suite unless ``--database-url`` points at a local
+Postgres; its ``users`` table is emptied and reseeded, so use a throwaway
+database. ``--compare`` exits non-zero when throughput drops or p99 latency
+grows by more than ``--threshold`` against the baseline.
+"""
+
+import argparse
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core import security  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.dependencies import get_read_session_factory, get_session_factory  # noqa: E402
+from app.main import app  # noqa: E402
+from benchmarks.harness import (  # noqa: E402
+    BenchmarkResult,
+    compare_results,
+    load_results,
+    run_benchmark,
+    save_results,
+)
+
+PASSWORD = "BenchmarkPassword123!"
+ADMIN_EMAIL = "bench-admin@example.com"
+
+
+async def seed(session_factory: async_sessionmaker, rows: int) -> None:
+    hashed_password = security.get_password_hash(PASSWORD)
+    async with session_factory() as session:
+        await session.execute(delete(models.User))
+        session.add(models.User(email=ADMIN_EMAIL, hashed_password=hashed_password, is_superuser=True))
+        session.add_all(
+            models.User(email=f"bench{index:06d}@example.com", hashed_password=hashed_password, full_name="Bench")
+            for index in range(rows)
+        )
+        await session.commit()
+
+
+def override_dependencies(session_factory: async_sessionmaker) -> None:
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    app.dependency_overrides[get_read_session_factory] = lambda: session_factory
+
+
+@asynccontextmanager
+async def open_client(transport: str) -> AsyncIterator[httpx.AsyncClient]:
+    if transport == "asgi":
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            yield client
+        return
+
+    import uvicorn
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning", access_log=False)
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await task
+
+
+def _expect(response: httpx.Response, status_code: int = 200) -> httpx.Response:
+    if response.status_code != status_code:
+        raise RuntimeError(f"{response.request.url} returned {response.status_code}: {response.text[:200]}")
+    return response
+
+
+async def run_suite(args: argparse.Namespace) -> list[BenchmarkResult]:
+    # Benchmarks hammer /auth/login from one address.
+    settings.rate_limit_enabled = False
+
+    engine_options = {"poolclass": StaticPool} if args.database_url.startswith("sqlite") else {}
+    engine = create_async_engine(args.database_url, **engine_options)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory, args.rows)
+    override_dependencies(session_factory)
+
+    results = []
+    try:
+        async with open_client(args.transport) as client:
+            login_body = {"email": ADMIN_EMAIL, "password": PASSWORD}
+            token = _expect(await client.post("/auth/login", json=login_body)).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            async def login():
+                _expect(await client.post("/auth/login", json=login_body))
+
+            async def users_me():
+                _expect(await client.get("/users/me", headers=headers))
+
+            async def users_list():
+                _expect(await client.get("/users/", params={"limit": args.rows}, headers=headers))
+
+            scenarios = [
+                # Argon2 dominates login, so it gets a fraction of the request budget.
+                ("auth_login", login, max(10, args.requests // 10)),
+                ("users_me", users_me, args.requests),
+                ("users_list", users_list, max(10, args.requests // 5)),
+            ]
+            for name, operation, operations in scenarios:
+                results.append(
+                    await run_benchmark(name, operation, operations=operations, concurrency=args.concurrency)
+                )
+
+        async def token_encode():
+            security.create_access_token("bench@example.com")
+
+        async def token_decode():
+            security.verified_token_cache.clear()
+            security.decode_access_token(token)
+
+        async def token_decode_cached():
+            security.decode_access_token(token)
+
+        for name, operation in (
+            ("token_encode", token_encode),
+            ("token_decode", token_decode),
+            ("token_decode_cached", token_decode_cached),
+        ):
+            results.append(await run_benchmark(name, operation, operations=args.requests * 10))
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--rows", type=int, default=100, help="users returned by GET /users/")
+    parser.add_argument("--requests", type=int, default=500, help="requests per HTTP scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_suite(args))
+    for result in results:
+        print(result.describe())
+
+    if args.output:
+        save_results(
+            args.output,
+            results,
+            {
+                "transport": args.transport,
+                "database": args.database_url.split(":", 1)[0],
+                "rows": args.rows,
+                "concurrency": args.concurrency,
+            },
+        )
+        print(f"saved {len(results)} results to {args.output}")
+
+    if args.compare:
+        regressions = compare_results(
+            load_results(args.compare), {result.name: result for result in results}, threshold=args.threshold
+        )
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare the default FastAPI response path with the fast user serializers.
+
+Run from the ``Backend/`` directory::
+
+    python -m benchmarks.bench_user_serialization --rows 1000 --repeat 50
+
+The default path mirrors what FastAPI does for ``response_model=list[UserRead]``:
+validate the ORM rows against the response model, run ``jsonable_encoder`` and
+render with ``JSONResponse``. The fast path serializes trusted rows straight to
+bytes with the precompiled ``TypeAdapter``.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, Response  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.schemas.user import UserRead, dump_users_json  # noqa: E402
+
+_response_adapter = TypeAdapter(list[UserRead])
+
+
+def build_rows(count: int) -> list[models.User]:
+    now = models.utcnow()
+    return [
+        models.User(
+            id=uuid.uuid4(),
+            email=f"user{index}@example.com",
+            hashed_password="not-serialized",
+            full_name=f"User {index}",
+            is_active=True,
+            is_superuser=index % 10 == 0,
+            created_at=now,
+            updated_at=now,
+        )
+        for index in range(count)
+    ]
+
+
+def default_path(rows: list[models.User]) -> bytes:
+    validated = _response_adapter.validate_python(rows, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fast_path(rows: list[models.User]) -> bytes:
+    return Response(dump_users_json(rows), media_type="application/json").body
+
+
+def measure(fn: Callable[[list[models.User]], bytes], rows: list[models.User], repeat: int) -> list[float]:
+    fn(rows)  # warm up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    results = {
+        "default": measure(default_path, rows, args.repeat),
+        "fast": measure(fast_path, rows, args.repeat),
+    }
+    for name, timings in results.items():
+        print(
+            f"{name:>8}: median {statistics.median(timings) * 1000:8.2f} ms"
+            f"  p95 {sorted(timings)[int(len(timings) * 0.95) - 1] * 1000:8.2f} ms"
+            f"  ({args.rows} rows, {args.repeat} runs)"
+        )
+    speedup = statistics.median(results["default"]) / statistics.median(results["fast"])
+    print(f"speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
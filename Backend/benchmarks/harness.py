@@ -0,0 +1,123 @@
+"""Timing, allocation tracking and baseline comparison shared by the benchmarks."""
+
+import asyncio
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+Operation = Callable[[], Awaitable[object]]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    operations: int
+    concurrency: int
+    ops_per_second: float
+    p50_ms: float
+    p99_ms: float
+    mean_ms: float
+    peak_alloc_kib: float
+
+    def describe(self) -> str:
+        return (
+            f"{self.name:>20}: {self.ops_per_second:9.1f} ops/s  p50 {self.p50_ms:7.2f} ms"
+            f"  p99 {self.p99_ms:7.2f} ms  peak alloc {self.peak_alloc_kib:8.1f} KiB"
+        )
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _drive(operation: Operation, operations: int, concurrency: int) -> list[float]:
+    latencies: list[float] = []
+    remaining = iter(range(operations))
+
+    async def worker() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def run_benchmark(
+    name: str,
+    operation: Operation,
+    *,
+    operations: int,
+    concurrency: int = 1,
+    warmup: int = 10,
+    alloc_operations: int = 20,
+) -> BenchmarkResult:
+    """Time ``operation`` untraced, then repeat a short run under tracemalloc.
+
+    Allocation tracing slows Python down several times over, so it runs
+    separately and only reports the peak memory allocated while it ran.
+    """
+    await _drive(operation, warmup, 1)
+
+    started = time.perf_counter()
+    latencies = await _drive(operation, operations, concurrency)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        await _drive(operation, alloc_operations, concurrency)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=name,
+        operations=operations,
+        concurrency=concurrency,
+        ops_per_second=operations / elapsed,
+        p50_ms=statistics.median(latencies) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        mean_ms=statistics.fmean(latencies) * 1000,
+        peak_alloc_kib=max(0, peak - baseline) / 1024,
+    )
+
+
+def save_results(path: Path, results: list[BenchmarkResult], metadata: dict[str, object]) -> None:
+    payload = {
+        "metadata": {"python": platform.python_version(), "machine": platform.machine(), **metadata},
+        "results": [asdict(result) for result in results],
+    }
+    path.write_text(json.dumps(payload, indent=2) + "\n")
+
+
+def load_results(path: Path) -> dict[str, BenchmarkResult]:
+    payload = json.loads(path.read_text())
+    return {entry["name"]: BenchmarkResult(**entry) for entry in payload["results"]}
+
+
+def compare_results(
+    baseline: dict[str, BenchmarkResult], current: dict[str, BenchmarkResult], *, threshold: float
+) -> list[str]:
+    """Return one message per benchmark whose throughput or p99 regressed beyond ``threshold``."""
+    regressions = []
+    for name, result in current.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        throughput_change = result.ops_per_second / previous.ops_per_second - 1
+        p99_change = result.p99_ms / previous.p99_ms - 1 if previous.p99_ms else 0.0
+        if throughput_change < -threshold:
+            regressions.append(f"{name}: throughput {throughput_change:+.1%} ({result.ops_per_second:.1f} ops/s)")
+        if p99_change > threshold:
+            regressions.append(f"{name}: p99 {p99_change:+.1%} ({result.p99_ms:.2f} ms)")
+    return regressions
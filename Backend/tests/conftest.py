@@ -1,16 +1,27 @@
+import secrets
 import sys
 from pathlib import Path
 
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+from app.core.email_queue import email_dispatcher
+from app.core.rate_limit import rate_limiter
+from app.core.security import verified_token_cache
 from app.db.base import Base
-from app.dependencies import get_db_session
+from app.dependencies import get_read_session_factory, get_session_factory
 from app.main import app
+from app.schemas import user as user_schemas
+from app.services import users as user_service
+from app.services.audit import audit_log
+from app.services.principals import principal_cache
+from app.services.refresh_tokens import refresh_token_store
+from app.services.user_changes import user_changes
 
 
 @pytest_asyncio.fixture
@@ -27,14 +38,69 @@ async def session_factory():
         await engine.dispose()
 
 
+@pytest.fixture
+def statement_log(session_factory):
+    engine = session_factory.kw["bind"].sync_engine
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
 @pytest_asyncio.fixture
 async def client(session_factory):
-    async def override_get_db():
-        async with session_factory() as session:
-            yield session
-
-    app.dependency_overrides[get_db_session] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    app.dependency_overrides[get_read_session_factory] = lambda: session_factory
+    principal_cache.clear()
+    verified_token_cache.clear()
+    rate_limiter.clear()
+    email_dispatcher.queue.clear()
+    refresh_token_store.clear()
+    audit_log.clear()
+    user_changes.clear()
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://testserver") as async_client:
         yield async_client
     app.dependency_overrides.clear()
+
+
+@pytest_asyncio.fixture
+async def superuser_headers(session_factory, client):
+    email = f"admin_{secrets.token_hex(4)}@example.com"
+    password = "SuperSecret123!"
+    async with session_factory() as session:
+        await user_service.create_user(
+            session,
+            user_schemas.UserCreate(
+                email=email,
+                password=password,
+                is_superuser=True,
+            ),
+        )
+
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest_asyncio.fixture
+async def regular_user_headers(session_factory, client):
+    email = f"user_{secrets.token_hex(4)}@example.com"
+    password = "UserPassword123!"
+    async with session_factory() as session:
+        await user_service.create_user(
+            session,
+            user_schemas.UserCreate(
+                email=email,
+                password=password,
+                is_superuser=False,
+            ),
+        )
+
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import models
+from app.services.audit import (
+    AuditLog,
+    audit_events_dropped_total,
+    audit_events_written_total,
+    audit_log,
+)
+
+
+async def _count_events(session_factory) -> int:
+    async with session_factory() as session:
+        return await session.scalar(select(func.count()).select_from(models.AuditEvent))
+
+
+@pytest.mark.asyncio
+async def test_auth_and_admin_events_are_recorded_and_queryable(
+    client, session_factory, superuser_headers, regular_user_headers
+):
+    await client.post("/auth/login", json={"email": "nobody@example.com", "password": "wrong"})
+    members = (await client.get("/users/", params={"is_superuser": False}, headers=superuser_headers)).json()
+    await client.patch(f"/users/{members[0]['id']}", json={"full_name": "Renamed"}, headers=superuser_headers)
+    await audit_log.flush(session_factory)
+    assert len(audit_log) == 0
+
+    response = await client.get("/audit/events", params={"action": "auth.login_failed"}, headers=superuser_headers)
+    assert response.status_code == 200
+    [failed] = response.json()
+    assert failed["actor"] == "nobody@example.com"
+    assert failed["details"] == {"reason": "invalid_credentials"}
+    assert failed["ip"]
+
+    response = await client.get("/audit/events", params={"action": "users.update"}, headers=superuser_headers)
+    [update] = response.json()
+    assert update["subject"] == members[0]["id"]
+    assert update["details"] == {"fields": ["full_name"]}
+
+    # Two fixture logins, one failure and the update, newest first one page at a time.
+    seen, params = [], {"limit": 1}
+    while True:
+        response = await client.get("/audit/events", params=params, headers=superuser_headers)
+        seen.extend(event["action"] for event in response.json())
+        if "x-next-cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["x-next-cursor"]
+    assert seen == ["users.update", "auth.login_failed", "auth.login", "auth.login"]
+
+
+@pytest.mark.asyncio
+async def test_audit_events_require_superuser(client, regular_user_headers):
+    response = await client.get("/audit/events", headers=regular_user_headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_on_batch_size_and_on_stop(session_factory):
+    writer = AuditLog(batch_size=2, flush_interval=60, session_factory=session_factory)
+    await writer.start()
+    written = audit_events_written_total.value()
+    writer.record("test.event", actor="first@example.com")
+    writer.record("test.event", actor="second@example.com")
+
+    # A full batch wakes the writer long before the flush interval.
+    for _ in range(200):
+        if audit_events_written_total.value() == written + 2:
+            break
+        await asyncio.sleep(0.01)
+    assert await _count_events(session_factory) == 2
+
+    writer.record("test.event", actor="third@example.com")
+    await writer.stop(timeout=5)
+    assert len(writer) == 0
+    assert await _count_events(session_factory) == 3
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_and_failed_writes_drop_events():
+    writer = AuditLog(max_events=2, batch_size=10, max_attempts=2)
+    before_full = audit_events_dropped_total.value(reason="buffer_full")
+    for _ in range(3):
+        writer.record("test.event")
+    assert len(writer) == 2
+    assert audit_events_dropped_total.value(reason="buffer_full") == before_full + 1
+
+    # An engine without the audit_events table makes every write fail.
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    before_failed = audit_events_dropped_total.value(reason="write_failed")
+    try:
+        # The first failure keeps the batch for a retry; the last attempt drops it.
+        assert await writer.flush(async_sessionmaker(engine)) == 0
+        assert len(writer) == 2
+        assert audit_events_dropped_total.value(reason="write_failed") == before_failed
+        assert await writer.flush(async_sessionmaker(engine)) == 0
+    finally:
+        await engine.dispose()
+    assert len(writer) == 0
+    assert audit_events_dropped_total.value(reason="write_failed") == before_failed + 2
@@ -1,4 +1,10 @@
+import time
+
 import pytest
+from redis.asyncio import Redis
+
+from app.services import refresh_tokens
+from app.services.refresh_tokens import InMemoryRefreshTokenStore, RedisRefreshTokenStore, RotationOutcome
 
 
 @pytest.mark.asyncio
@@ -33,3 +39,99 @@ async def test_register_login_and_profile_flow(client):
     login_data = login_response.json()
     assert login_data["access_token"]
     assert login_data["refresh_token"]
+
+
+async def _tokens(client, email="rotate@example.com", password="Password123!"):
+    response = await client.post("/auth/register", json={"email": email, "password": password})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_tokens_without_touching_the_database(client, statement_log):
+    tokens = await _tokens(client)
+
+    statement_log.clear()
+    rotated = await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert rotated.status_code == 200
+    assert rotated.json()["refresh_token"] != tokens["refresh_token"]
+    assert statement_log == []
+
+    again = await client.post("/auth/refresh", json={"refresh_token": rotated.json()["refresh_token"]})
+    assert again.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_revokes_the_family(client):
+    tokens = await _tokens(client)
+    rotated = await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert rotated.status_code == 200
+
+    replayed = await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replayed.status_code == 401
+
+    # The legitimate holder of the newest token is logged out as well.
+    latest = await client.post("/auth/refresh", json={"refresh_token": rotated.json()["refresh_token"]})
+    assert latest.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_only_that_session(client):
+    tokens = await _tokens(client)
+    other = await client.post("/auth/login", json={"email": "rotate@example.com", "password": "Password123!"})
+
+    logout = await client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert logout.status_code == 204
+
+    revoked = await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert revoked.status_code == 401
+    still_valid = await client.post("/auth/refresh", json={"refresh_token": other.json()["refresh_token"]})
+    assert still_valid.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_deactivation_revokes_every_refresh_token(client, superuser_headers):
+    tokens = await _tokens(client)
+    second = await client.post("/auth/login", json={"email": "rotate@example.com", "password": "Password123!"})
+    profile = await client.get("/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+    deactivated = await client.patch(
+        f"/users/{profile.json()['id']}", json={"is_active": False}, headers=superuser_headers
+    )
+    assert deactivated.status_code == 200
+
+    for refresh_token in (tokens["refresh_token"], second.json()["refresh_token"]):
+        response = await client.post("/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_in_memory_refresh_store_stays_bounded():
+    store = InMemoryRefreshTokenStore(max_users=2)
+    expires_at = time.time() + 60
+    for index in range(5):
+        await store.issue(f"user{index}@example.com", family=f"family{index}", jti="jti", expires_at=expires_at)
+        await store.revoke_all(f"user{index}@example.com")
+    assert len(store._user_families) <= 2
+    assert len(store._versions) <= 2
+    assert await store.current_version("user4@example.com") == 1
+
+    await store.issue("solo@example.com", family="only", jti="jti", expires_at=expires_at)
+    await store.revoke_family("solo@example.com", "only")
+    assert store._user_families.get("solo@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_outage_does_not_break_logout(monkeypatch):
+    unreachable = Redis.from_url("redis://127.0.0.1:1/0", socket_connect_timeout=0.1)
+    monkeypatch.setattr(refresh_tokens, "get_redis", lambda: unreachable)
+    store = RedisRefreshTokenStore(fallback=InMemoryRefreshTokenStore())
+    expires_at = time.time() + 60
+
+    await store.issue("outage@example.com", family="family", jti="jti", expires_at=expires_at)
+    await store.revoke_family("outage@example.com", "family")
+    outcome = await store.rotate(
+        "outage@example.com", family="family", jti="jti", version=0, new_jti="next", expires_at=expires_at
+    )
+    assert outcome is RotationOutcome.REVOKED
+    await unreachable.aclose()
@@ -0,0 +1,45 @@
+import pytest
+
+from benchmarks.harness import BenchmarkResult, compare_results, load_results, run_benchmark, save_results
+
+
+def _result(name, ops_per_second, p99_ms):
+    return BenchmarkResult(
+        name=name,
+        operations=100,
+        concurrency=1,
+        ops_per_second=ops_per_second,
+        p50_ms=1.0,
+        p99_ms=p99_ms,
+        mean_ms=1.0,
+        peak_alloc_kib=1.0,
+    )
+
+
+def test_compare_flags_throughput_and_tail_latency_regressions(tmp_path):
+    path = tmp_path / "baseline.json"
+    save_results(path, [_result("users_me", 1000, 10), _result("users_list", 100, 50)], {"transport": "asgi"})
+    baseline = load_results(path)
+
+    current = {
+        "users_me": _result("users_me", 950, 10.5),
+        "users_list": _result("users_list", 70, 80),
+        "new_scenario": _result("new_scenario", 1, 1),
+    }
+    regressions = compare_results(baseline, current, threshold=0.1)
+    assert len(regressions) == 2
+    assert all(message.startswith("users_list:") for message in regressions)
+
+
+@pytest.mark.asyncio
+async def test_run_benchmark_reports_latency_percentiles():
+    calls = []
+
+    async def operation():
+        calls.append(None)
+
+    result = await run_benchmark("noop", operation, operations=50, concurrency=5, warmup=2, alloc_operations=3)
+    assert len(calls) == 55
+    assert result.operations == 50
+    assert 0 < result.p50_ms <= result.p99_ms
+    assert result.ops_per_second > 0
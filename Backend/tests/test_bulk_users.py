@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import uuid
+
+import pytest
+
+from app.core import security
+from app.core.config import settings
+from app.db import models
+from app.schemas import user as user_schemas
+from app.services import users as user_service
+
+
+@pytest.mark.asyncio
+async def test_import_users_from_ndjson_in_batches(client, session_factory, superuser_headers, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_import_batch_size", 2)
+    async with session_factory() as session:
+        await user_service.create_user(
+            session, user_schemas.UserCreate(email="existing@example.com", password="Password123!")
+        )
+
+    rows = [
+        {"email": "bulk1@example.com", "password": "Password123!", "full_name": "Bulk One"},
+        {"email": "existing@example.com", "password": "Password123!"},
+        {"email": "bulk2@example.com", "password": "Password123!", "is_active": False},
+        {"email": "bulk1@example.com", "password": "Password123!"},
+        {"email": "not-an-email", "password": "Password123!"},
+        {"email": "bulk3@example.com", "password": "Password123!"},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows) + "\n{broken\n"
+
+    response = await client.post(
+        "/users/import",
+        content=body,
+        headers={**superuser_headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 3
+    assert result["skipped"] == 2
+    assert result["failed"] == 2
+    assert [error["line"] for error in result["errors"]] == [5, 7]
+
+    login = await client.post(
+        "/auth/login", json={"email": "bulk3@example.com", "password": "Password123!"}
+    )
+    assert login.status_code == 200
+
+    async with session_factory() as session:
+        inactive = await user_service.get_user_by_email(session, "bulk2@example.com")
+    assert inactive is not None and inactive.is_active is False
+
+
+@pytest.mark.asyncio
+async def test_import_users_from_csv_and_export(client, superuser_headers):
+    body = "email,password,full_name,is_superuser\ncsv1@example.com,Password123!,CSV One,false\ncsv2@example.com,Password123!,,true\n"
+    response = await client.post(
+        "/users/import", content=body, headers={**superuser_headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+
+    export = await client.get("/users/export", params={"format": "csv"}, headers=superuser_headers)
+    assert export.status_code == 200
+    assert export.headers["content-type"].startswith("text/csv")
+    exported = {row["email"]: row for row in csv.DictReader(io.StringIO(export.text))}
+    assert exported["csv1@example.com"]["full_name"] == "CSV One"
+    assert exported["csv2@example.com"]["full_name"] == ""
+    assert exported["csv2@example.com"]["is_superuser"] == "True"
+
+
+@pytest.mark.asyncio
+async def test_import_csv_keeps_quoted_line_breaks(client, superuser_headers):
+    body = (
+        'email,password,full_name\n'
+        'multi@example.com,Password123!,"Line one\n\nline ""two"""\n'
+        'after@example.com,Password123!,After\n'
+        'broken@example.com,Password123!,"never closed\n'
+    )
+    response = await client.post(
+        "/users/import", content=body, headers={**superuser_headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert result["errors"] == [{"line": 6, "detail": "Unterminated quoted field"}]
+
+    users = (await client.get("/users/", params={"search": "multi@"}, headers=superuser_headers)).json()
+    assert users[0]["full_name"] == 'Line one\n\nline "two"'
+
+
+@pytest.mark.asyncio
+async def test_import_users_rejects_unknown_media_type(client, superuser_headers):
+    response = await client.post(
+        "/users/import", content="{}", headers={**superuser_headers, "Content-Type": "application/json"}
+    )
+    assert response.status_code == 415
+
+
+async def _create(session_factory, email, password="Password123!"):
+    async with session_factory() as session:
+        return await user_service.create_user(session, user_schemas.UserCreate(email=email, password=password))
+
+
+@pytest.mark.asyncio
+async def test_batch_applies_updates_and_deletes_set_based(client, session_factory, superuser_headers, statement_log):
+    members = [await _create(session_factory, f"batch{index}@example.com") for index in range(4)]
+    taken = await _create(session_factory, "taken@example.com")
+    doomed = await _create(session_factory, "doomed@example.com")
+    login = await client.post("/auth/login", json={"email": "batch0@example.com", "password": "Password123!"})
+    refresh_token = login.json()["refresh_token"]
+    missing = uuid.uuid4()
+
+    operations = [
+        *({"op": "update", "id": str(user.id), "changes": {"is_active": False}} for user in members[:3]),
+        {"op": "update", "id": str(members[3].id), "changes": {"password": "NewPassword123!", "full_name": "Four"}},
+        {"op": "update", "id": str(taken.id), "changes": {"email": "renamed@example.com"}},
+        {"op": "update", "id": str(members[0].id), "changes": {"full_name": "Again"}},
+        {"op": "update", "id": str(missing), "changes": {"is_active": False}},
+        {"op": "delete", "id": str(doomed.id)},
+    ]
+    statement_log.clear()
+    response = await client.post("/users/batch", json={"operations": operations}, headers=superuser_headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert [item["status"] for item in result["results"]] == [
+        "updated",
+        "updated",
+        "updated",
+        "updated",
+        "updated",
+        "duplicate",
+        "not_found",
+        "deleted",
+    ]
+    assert (result["updated"], result["deleted"], result["failed"]) == (5, 1, 2)
+    # One DELETE, one UPDATE for the three shared deactivations and one
+    # executemany per set of per-user columns (password, email).
+    writes = [statement for statement in statement_log if statement.lstrip().startswith(("UPDATE", "DELETE"))]
+    assert len(writes) == 4
+
+    async with session_factory() as session:
+        for user in members[:3]:
+            refreshed = await session.get(models.User, user.id)
+            assert refreshed.is_active is False
+            assert refreshed.updated_at > user.updated_at
+        fourth = await session.get(models.User, members[3].id)
+        assert fourth.full_name == "Four"
+        assert security.verify_password("NewPassword123!", fourth.hashed_password)
+        assert (await session.get(models.User, taken.id)).email == "renamed@example.com"
+        assert await session.get(models.User, doomed.id) is None
+
+    # Deactivation ended the member's sessions.
+    refreshed = await client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert refreshed.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_email_conflicts_per_item(client, session_factory, superuser_headers):
+    first = await _create(session_factory, "first@example.com")
+    second = await _create(session_factory, "second@example.com")
+    leaving = await _create(session_factory, "leaving@example.com")
+
+    operations = [
+        {"op": "update", "id": str(first.id), "changes": {"email": "second@example.com"}},
+        {"op": "delete", "id": str(leaving.id)},
+        {"op": "update", "id": str(second.id), "changes": {"email": "leaving@example.com"}},
+    ]
+    response = await client.post("/users/batch", json={"operations": operations}, headers=superuser_headers)
+    assert [item["status"] for item in response.json()["results"]] == ["conflict", "deleted", "updated"]
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_oversized_requests(client, superuser_headers, monkeypatch):
+    monkeypatch.setattr(settings, "users_batch_max_operations", 1)
+    operations = [{"op": "delete", "id": str(uuid.uuid4())} for _ in range(2)]
+    response = await client.post("/users/batch", json={"operations": operations}, headers=superuser_headers)
+    assert response.status_code == 413
+
+    # The size is checked before the operations are validated.
+    invalid = [{"op": "rename"}, {"op": "rename"}]
+    response = await client.post("/users/batch", json={"operations": invalid}, headers=superuser_headers)
+    assert response.status_code == 413
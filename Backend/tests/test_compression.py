@@ -0,0 +1,99 @@
+import gzip
+
+import pytest
+
+from app.db import models
+
+
+async def _seed_users(session_factory, count):
+    async with session_factory() as session:
+        session.add_all(
+            models.User(email=f"zip{index:03d}@example.com", hashed_password="x", full_name="Compressed User")
+            for index in range(count)
+        )
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_compressed(client, session_factory, superuser_headers):
+    await _seed_users(session_factory, 30)
+
+    plain = await client.get("/users/", headers={**superuser_headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    gzipped = await client.get("/users/", headers={**superuser_headers, "Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in gzipped.headers["vary"].lower()
+    assert gzipped.json() == plain.json()
+
+    compressed = await client.get(
+        "/users/", headers={**superuser_headers, "Accept-Encoding": "gzip;q=0.5, br"}
+    )
+    assert compressed.headers["content-encoding"] == "br"
+    assert int(compressed.headers["content-length"]) < len(plain.content)
+    assert compressed.json() == plain.json()
+
+
+@pytest.mark.asyncio
+async def test_streamed_exports_are_compressed_incrementally(client, session_factory, superuser_headers):
+    await _seed_users(session_factory, 30)
+
+    async with client.stream(
+        "GET", "/users/export", headers={**superuser_headers, "Accept-Encoding": "gzip"}
+    ) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert len(lines) == 31
+
+
+@pytest.mark.asyncio
+async def test_small_responses_are_not_compressed(client):
+    response = await client.get("/livez", headers={"Accept-Encoding": "br, gzip"})
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_current_user_supports_conditional_get(client, regular_user_headers):
+    first = await client.get("/users/me", headers=regular_user_headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    cached = await client.get("/users/me", headers={**regular_user_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    by_date = await client.get(
+        "/users/me", headers={**regular_user_headers, "If-Modified-Since": first.headers["last-modified"]}
+    )
+    assert by_date.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_user_list_etag_changes_when_users_change(client, session_factory, superuser_headers):
+    await _seed_users(session_factory, 3)
+
+    first = await client.get("/users/", params={"limit": 2}, headers=superuser_headers)
+    etag = first.headers["etag"]
+    cached = await client.get(
+        "/users/", params={"limit": 2}, headers={**superuser_headers, "If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+
+    other_page = await client.get("/users/", params={"limit": 3}, headers=superuser_headers)
+    assert other_page.headers["etag"] != etag
+
+    user_id = first.json()[1]["id"]
+    updated = await client.patch(f"/users/{user_id}", json={"full_name": "Renamed"}, headers=superuser_headers)
+    assert updated.status_code == 200
+
+    refreshed = await client.get(
+        "/users/", params={"limit": 2}, headers={**superuser_headers, "If-None-Match": etag}
+    )
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.db.session import (
+    InstrumentedAsyncQueuePool,
+    build_engine,
+    pool_checkout_seconds,
+    pool_status,
+)
+
+
+@pytest.mark.asyncio
+async def test_build_engine_applies_pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "db_pool_size", 7)
+    monkeypatch.setattr(settings, "db_max_overflow", 3)
+    monkeypatch.setattr(settings, "db_pool_timeout", 2.5)
+    monkeypatch.setattr(settings, "db_statement_cache_size", 0)
+
+    engine = build_engine("postgresql+asyncpg://user:secret@db:5432/app")
+    try:
+        assert isinstance(engine.pool, InstrumentedAsyncQueuePool)
+        status = pool_status(engine.pool)
+        assert status["size"] == 7
+        assert status["max_overflow"] == 3
+        assert status["timeout"] == 2.5
+        assert status["checked_out"] == 0
+        _, connect_kwargs = engine.dialect.create_connect_args(engine.url)
+        assert connect_kwargs["prepared_statement_cache_size"] == 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_records_checkout_latency():
+    before = pool_checkout_seconds.snapshot().count
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=InstrumentedAsyncQueuePool)
+    try:
+        async with engine.connect() as connection:
+            assert pool_status(engine.pool)["checked_out"] == 1
+            await connection.execute(text("SELECT 1"))
+    finally:
+        await engine.dispose()
+
+    assert pool_checkout_seconds.snapshot().count == before + 1
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_endpoint(client, superuser_headers, regular_user_headers):
+    assert (await client.get("/health/db-pool")).status_code == 401
+    assert (await client.get("/health/db-pool", headers=regular_user_headers)).status_code == 403
+
+    response = await client.get("/health/db-pool", headers=superuser_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["pool"] == "InstrumentedAsyncQueuePool"
+    assert {"size", "checked_in", "checked_out", "overflow", "checkout_seconds"} <= data.keys()
+    assert "+Inf" in data["checkout_seconds"]["buckets"]
@@ -0,0 +1,63 @@
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel, model_serializer
+from sqlalchemy import text
+
+from app.db.session import connection_hold_seconds
+from app.dependencies import SessionReleasingRoute, get_db_session, get_read_session_factory, get_session_factory
+from app.main import app
+from app.services.principals import principal_cache
+
+
+@pytest.mark.asyncio
+async def test_rejected_requests_never_open_a_session(client, session_factory):
+    opened = []
+
+    def counting_factory():
+        opened.append(True)
+        return session_factory()
+
+    app.dependency_overrides[get_read_session_factory] = lambda: counting_factory
+    response = await client.get("/users/", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+    assert opened == []
+
+
+@pytest.mark.asyncio
+async def test_connection_hold_time_is_recorded_per_route(client, regular_user_headers):
+    principal_cache.clear()
+    before = connection_hold_seconds.snapshot(method="GET", route="/users/me").count
+    response = await client.get("/users/me", headers=regular_user_headers)
+    assert response.status_code == 200
+    assert connection_hold_seconds.snapshot(method="GET", route="/users/me").count == before + 1
+
+
+@pytest.mark.asyncio
+async def test_session_is_released_before_the_response_is_serialized(session_factory):
+    in_transaction_while_serializing = []
+    captured = []
+
+    class Probe(BaseModel):
+        @model_serializer
+        def serialize(self):
+            in_transaction_while_serializing.append(captured[0].in_transaction())
+            return {"ok": True}
+
+    router = APIRouter(route_class=SessionReleasingRoute)
+
+    @router.get("/probe")
+    async def probe(session=Depends(get_db_session)):
+        await session.execute(text("SELECT 1"))
+        captured.append(session.session)
+        return Probe()
+
+    probe_app = FastAPI()
+    probe_app.include_router(router)
+    probe_app.dependency_overrides[get_session_factory] = lambda: session_factory
+
+    async with AsyncClient(transport=ASGITransport(app=probe_app), base_url="http://testserver") as probe_client:
+        response = await probe_client.get("/probe")
+
+    assert response.json() == {"ok": True}
+    assert in_transaction_while_serializing == [False]
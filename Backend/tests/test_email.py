@@ -0,0 +1,185 @@
+import asyncio
+from email import message_from_bytes
+
+import pytest
+import pytest_asyncio
+
+from app.core.email import EmailMessage, SMTPEmailBackend
+from app.core.email_queue import EmailDispatcher, InMemoryEmailQueue, email_dispatcher, emails_total
+
+
+class SMTPStub:
+    """Just enough of an SMTP server for smtplib, recording delivered messages."""
+
+    def __init__(self, *, fail_data: int = 0) -> None:
+        self.fail_data = fail_data
+        self.disconnect_after: int | None = None
+        self.sessions = 0
+        self.messages = []
+        self.server: asyncio.base_events.Server | None = None
+        self.port = 0
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.sessions += 1
+
+        async def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 stub ESMTP")
+        while line := await reader.readline():
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                await reply("250 stub")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                await reply("250 OK")
+            elif command == "DATA":
+                if self.disconnect_after is not None and len(self.messages) >= self.disconnect_after:
+                    break
+                await reply("354 End data with <CR><LF>.<CR><LF>")
+                data = b""
+                while (chunk := await reader.readline()) != b".\r\n":
+                    data += chunk
+                if self.fail_data:
+                    self.fail_data -= 1
+                    await reply("451 Try again later")
+                else:
+                    self.messages.append(message_from_bytes(data))
+                    await reply("250 Queued")
+            elif command == "QUIT":
+                await reply("221 Bye")
+                break
+            else:
+                await reply("502 Not implemented")
+        writer.close()
+
+
+@pytest_asyncio.fixture
+async def smtp_stub():
+    stub = SMTPStub()
+    await stub.start()
+    try:
+        yield stub
+    finally:
+        await stub.stop()
+
+
+def _dispatcher(smtp_stub, **options):
+    backend = SMTPEmailBackend(host="127.0.0.1", port=smtp_stub.port, sender="noreply@example.com", timeout=2)
+    options.setdefault("backoff_seconds", 0.01)
+    return EmailDispatcher(InMemoryEmailQueue(), backend, workers=1, **options)
+
+
+async def _wait_for(condition, timeout=5.0):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_queued_messages_are_delivered_in_one_smtp_session(smtp_stub):
+    dispatcher = _dispatcher(smtp_stub, batch_size=10)
+    for index in range(3):
+        await dispatcher.enqueue(EmailMessage(subject=f"Hello {index}", recipient=f"to{index}@example.com", body="Hi"))
+
+    await dispatcher.start()
+    try:
+        await _wait_for(lambda: len(smtp_stub.messages) == 3)
+    finally:
+        await dispatcher.stop()
+
+    assert smtp_stub.sessions == 1
+    assert [message["To"] for message in smtp_stub.messages] == [f"to{index}@example.com" for index in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_failed_deliveries_are_retried_with_backoff(smtp_stub):
+    smtp_stub.fail_data = 2
+    dispatcher = _dispatcher(smtp_stub, max_attempts=5)
+    retried = emails_total.value(outcome="retried")
+
+    await dispatcher.enqueue(EmailMessage(subject="Retry", recipient="retry@example.com", body="Hi"))
+    await dispatcher.start()
+    try:
+        await _wait_for(lambda: len(smtp_stub.messages) == 1)
+    finally:
+        await dispatcher.stop()
+
+    assert emails_total.value(outcome="retried") == retried + 2
+    assert smtp_stub.sessions == 3
+
+
+@pytest.mark.asyncio
+async def test_messages_are_dropped_after_max_attempts(smtp_stub):
+    smtp_stub.fail_data = 10
+    dispatcher = _dispatcher(smtp_stub, max_attempts=2)
+    dropped = emails_total.value(outcome="dropped")
+
+    await dispatcher.enqueue(EmailMessage(subject="Drop", recipient="drop@example.com", body="Hi"))
+    await dispatcher.start()
+    try:
+        await _wait_for(lambda: emails_total.value(outcome="dropped") == dropped + 1)
+    finally:
+        await dispatcher.stop()
+
+    assert smtp_stub.messages == []
+    assert len(dispatcher.queue) == 0
+
+
+@pytest.mark.asyncio
+async def test_dropped_session_retries_only_undelivered_messages(smtp_stub):
+    smtp_stub.disconnect_after = 1
+    backend = SMTPEmailBackend(host="127.0.0.1", port=smtp_stub.port, sender="noreply@example.com", timeout=2)
+    batch = [EmailMessage(subject="Hello", recipient=f"to{index}@example.com", body="Hi") for index in range(3)]
+
+    failed = await backend.send_batch(batch)
+
+    assert [message["To"] for message in smtp_stub.messages] == ["to0@example.com"]
+    assert failed == batch[1:]
+
+
+class RecordingQueue(InMemoryEmailQueue):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = []
+
+    async def ack(self, messages):
+        self.calls.append(("ack", [message.recipient for message in messages]))
+
+    async def retry(self, message, delay):
+        self.calls.append(("retry", [message.recipient]))
+
+
+@pytest.mark.asyncio
+async def test_failed_messages_are_retried_before_the_rest_are_acked(smtp_stub):
+    smtp_stub.fail_data = 1
+    queue = RecordingQueue()
+    backend = SMTPEmailBackend(host="127.0.0.1", port=smtp_stub.port, sender="noreply@example.com", timeout=2)
+    dispatcher = EmailDispatcher(queue, backend, workers=1)
+
+    await dispatcher.deliver(
+        [EmailMessage(subject="Hello", recipient=f"to{index}@example.com", body="Hi") for index in range(2)]
+    )
+
+    assert queue.calls == [("retry", ["to0@example.com"]), ("ack", ["to1@example.com"])]
+
+
+@pytest.mark.asyncio
+async def test_register_enqueues_welcome_email(client):
+    response = await client.post(
+        "/auth/register",
+        json={"email": "welcome@example.com", "password": "Password123!", "full_name": "New Member"},
+    )
+    assert response.status_code == 200
+
+    batch = await email_dispatcher.queue.get_batch(10)
+    assert [message.recipient for message in batch] == ["welcome@example.com"]
+    assert "New Member" in batch[0].body
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.db import models
+from app.schemas.user import UserRead, dump_users_json
+
+
+@pytest.mark.asyncio
+async def test_fast_path_matches_default_serialization(client, session_factory, superuser_headers, monkeypatch):
+    async with session_factory() as session:
+        session.add_all(
+            models.User(email=f"fast{index}@example.com", hashed_password="x", full_name=f"Fast {index}")
+            for index in range(3)
+        )
+        await session.commit()
+
+    default_list = await client.get("/users/", params={"limit": 2}, headers=superuser_headers)
+    default_me = await client.get("/users/me", headers=superuser_headers)
+
+    monkeypatch.setattr(settings, "fast_json_responses", True)
+    fast_list = await client.get("/users/", params={"limit": 2}, headers=superuser_headers)
+    fast_me = await client.get("/users/me", headers=superuser_headers)
+
+    assert fast_list.status_code == 200
+    assert fast_list.json() == default_list.json()
+    assert fast_list.headers["x-next-cursor"] == default_list.headers["x-next-cursor"]
+    assert fast_me.json() == default_me.json()
+
+    created = await client.post(
+        "/users/",
+        json={"email": "fastcreate@example.com", "password": "Password123!"},
+        headers=superuser_headers,
+    )
+    assert created.status_code == 201
+    assert created.json()["email"] == "fastcreate@example.com"
+
+
+@pytest.mark.asyncio
+async def test_dump_users_json_skips_validation_for_trusted_rows(session_factory):
+    async with session_factory() as session:
+        orm_user = models.User(email="trusted@example.com", hashed_password="x")
+        session.add(orm_user)
+        await session.commit()
+
+    payload = json.loads(dump_users_json([orm_user]))
+    assert payload == [json.loads(UserRead.model_validate(orm_user).model_dump_json())]
+    assert "hashed_password" not in payload[0]
@@ -1,8 +1,77 @@
+import asyncio
+
 import pytest
 
+from app.core.config import settings
+from app.core.readiness import ReadinessMonitor
+from app.main import app
+from app.routers.health import build_readiness_monitor
+
 
 @pytest.mark.asyncio
 async def test_health_endpoint(client):
     response = await client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_livez_does_no_io(client):
+    response = await client.get("/livez")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_readyz_serves_cached_check_results(client, monkeypatch):
+    calls = []
+
+    async def healthy():
+        calls.append("db")
+
+    async def broken():
+        raise ConnectionError("down")
+
+    monitor = ReadinessMonitor({"database": healthy}, interval=60, timeout=1)
+    monkeypatch.setattr(app.state, "readiness", monitor)
+
+    not_ready = await client.get("/readyz")
+    assert not_ready.status_code == 503
+    assert not_ready.json()["checks"]["database"]["error"] == "not checked yet"
+
+    await monitor.run_checks()
+    for _ in range(3):
+        response = await client.get("/readyz")
+        assert response.status_code == 200
+    assert calls == ["db"]
+    body = response.json()
+    assert body["status"] == "ok"
+    assert body["checks"]["database"]["age_seconds"] >= 0
+
+    monitor.checks["redis"] = broken
+    await monitor.run_checks()
+    response = await client.get("/readyz")
+    assert response.status_code == 503
+    redis_check = response.json()["checks"]["redis"]
+    assert redis_check["ok"] is False
+    assert redis_check["error"] == "ConnectionError"
+
+
+@pytest.mark.asyncio
+async def test_readiness_check_times_out():
+    async def hangs():
+        await asyncio.sleep(5)
+
+    monitor = ReadinessMonitor({"database": hangs}, interval=60, timeout=0.01)
+    await monitor.run_checks()
+    ready, body = monitor.snapshot()
+    assert not ready
+    assert body["checks"]["database"]["error"].startswith("timed out")
+
+
+def test_redis_is_checked_only_when_a_feature_uses_it(monkeypatch):
+    monkeypatch.setattr(settings, "redis_url", "redis://redis:6379/0")
+    assert set(build_readiness_monitor().checks) == {"database"}
+
+    monkeypatch.setattr(settings, "email_queue_backend", "redis")
+    assert set(build_readiness_monitor().checks) == {"database", "redis"}
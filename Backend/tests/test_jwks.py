@@ -0,0 +1,100 @@
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jose import jwt
+
+from app.core import keys, security
+
+
+def _write_key(path, private_key, *, public_only=False):
+    if public_only:
+        pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+    else:
+        pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+    path.write_bytes(pem)
+    return str(path)
+
+
+@pytest.fixture
+def key_files(tmp_path):
+    active = _write_key(tmp_path / "active.pem", ec.generate_private_key(ec.SECP256R1()))
+    retired = _write_key(
+        tmp_path / "retired.pem", rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    )
+    return active, retired
+
+
+@pytest.mark.asyncio
+async def test_access_tokens_are_signed_with_the_active_key(client, key_files, monkeypatch, regular_user_headers):
+    ring = keys.KeyRing.from_files(list(key_files))
+    monkeypatch.setattr(keys, "key_ring", ring)
+
+    token = security.create_access_token("edge@example.com")
+    header = jwt.get_unverified_header(token)
+    assert header["alg"] == "ES256"
+    assert header["kid"] == ring.active.kid
+
+    response = await client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/jwk-set+json"
+    assert "max-age=" in response.headers["cache-control"]
+    published = response.json()["keys"]
+    assert [key["kid"] for key in published] == [key.kid for key in ring.keys]
+    assert all("d" not in key for key in published)
+
+    # An edge service verifies with the published key set alone.
+    claims = jwt.decode(token, response.json(), algorithms=["ES256"])
+    assert claims["sub"] == "edge@example.com"
+
+    cached = await client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_tokens_from_retired_keys_verify_until_the_key_is_removed(client, key_files, monkeypatch, tmp_path):
+    active, retired = key_files
+    monkeypatch.setattr(keys, "key_ring", keys.KeyRing.from_files([retired]))
+    old_token = security.create_access_token("rotated@example.com")
+
+    public_retired = tmp_path / "retired.pub.pem"
+    public_retired.write_bytes(
+        keys.load_signing_key(open(retired, "rb").read()).public_key.to_pem()
+    )
+    monkeypatch.setattr(keys, "key_ring", keys.KeyRing.from_files([active, str(public_retired)]))
+    assert security.decode_access_token(old_token)["sub"] == "rotated@example.com"
+
+    security.verified_token_cache.clear()
+    monkeypatch.setattr(keys, "key_ring", keys.KeyRing.from_files([active]))
+    with pytest.raises(security.AuthenticationError):
+        security.decode_access_token(old_token)
+
+
+@pytest.mark.asyncio
+async def test_api_accepts_tokens_signed_by_the_key_ring(client, key_files, monkeypatch):
+    monkeypatch.setattr(keys, "key_ring", keys.KeyRing.from_files(list(key_files)))
+    registered = await client.post(
+        "/auth/register", json={"email": "keyring@example.com", "password": "Password123!"}
+    )
+    token = registered.json()["access_token"]
+    assert jwt.get_unverified_header(token)["alg"] == "ES256"
+
+    profile = await client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert profile.status_code == 200
+
+    forged = jwt.encode({"sub": "keyring@example.com"}, "change-me", algorithm="HS256")
+    rejected = await client.get("/users/me", headers={"Authorization": f"Bearer {forged}"})
+    assert rejected.status_code == 401
+
+
+def test_key_ring_rejects_unsupported_keys(tmp_path):
+    eddsa = _write_key(tmp_path / "ed25519.pem", ed25519.Ed25519PrivateKey.generate())
+    with pytest.raises(ValueError, match="EdDSA"):
+        keys.KeyRing.from_files([eddsa])
+
+    public_only = _write_key(tmp_path / "public.pem", ec.generate_private_key(ec.SECP256R1()), public_only=True)
+    with pytest.raises(ValueError, match="private key"):
+        keys.KeyRing.from_files([public_only])
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.metrics import Registry
+from app.db.instrumentation import db_queries_total, instrument_engine, statement_operation
+from app.middleware.metrics import http_request_duration_seconds, http_requests_total
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("demo_requests_total", "Demo requests.", ["route"])
+    latency = registry.histogram("demo_latency_seconds", "Demo latency.", buckets=(0.1, 1.0))
+    requests.inc(route='/a"b')
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    rendered = registry.render()
+    assert "# TYPE demo_requests_total counter" in rendered
+    assert 'demo_requests_total{route="/a\\"b"} 1.0' in rendered
+    assert 'demo_latency_seconds_bucket{le="0.1"} 1' in rendered
+    assert 'demo_latency_seconds_bucket{le="1.0"} 2' in rendered
+    assert 'demo_latency_seconds_bucket{le="+Inf"} 2' in rendered
+    assert "demo_latency_seconds_count 2" in rendered
+
+
+def test_statement_operation_labels():
+    assert statement_operation("  select 1") == "SELECT"
+    assert statement_operation("INSERT INTO users ...") == "INSERT"
+    assert statement_operation("PRAGMA foreign_keys") == "OTHER"
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template(client, superuser_headers):
+    missing = "00000000-0000-0000-0000-000000000000"
+    before = http_requests_total.value(method="DELETE", route="/users/{user_id}", status="404")
+
+    response = await client.delete(f"/users/{missing}", headers=superuser_headers)
+    assert response.status_code == 404
+
+    assert http_requests_total.value(method="DELETE", route="/users/{user_id}", status="404") == before + 1
+    assert http_request_duration_seconds.snapshot(method="DELETE", route="/users/{user_id}").count >= 1
+
+    await client.get("/does-not-exist")
+    assert http_requests_total.value(method="GET", route="unmatched", status="404") >= 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_http_db_and_hash_metrics(client, session_factory):
+    instrument_engine(session_factory.kw["bind"])
+    before = db_queries_total.value(operation="SELECT")
+    async with session_factory() as session:
+        await session.execute(text("SELECT 1"))
+    assert db_queries_total.value(operation="SELECT") == before + 1
+
+    await client.post("/auth/register", json={"email": "metrics@example.com", "password": "Password123!"})
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="POST",route="/auth/register",status="200"}' in body
+    assert "db_queries_total" in body
+    assert 'password_hash_duration_seconds_count{operation="hash"}' in body
+    assert 'db_pool_connections{database="primary",state="checked_out"}' in body
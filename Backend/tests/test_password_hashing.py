@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core import security
+from app.core.hashing import PasswordHashPool, PasswordHashPoolSaturated, hash_duration_seconds
+
+
+@pytest.mark.asyncio
+async def test_async_hash_round_trip():
+    hashed = await security.get_password_hash_async("s3cret-value")
+    assert hashed != "s3cret-value"
+    assert await security.verify_password_async("s3cret-value", hashed)
+    assert not await security.verify_password_async("wrong-value", hashed)
+    assert hash_duration_seconds.snapshot(operation="verify").count >= 2
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_jobs_beyond_capacity():
+    pool = PasswordHashPool(kind="thread", max_workers=1, max_queue=0)
+    release = threading.Event()
+    try:
+        blocked = asyncio.create_task(pool.run("hash", release.wait, 5))
+        await asyncio.sleep(0.05)
+        assert pool.pending == 1
+
+        with pytest.raises(PasswordHashPoolSaturated):
+            await pool.run("hash", lambda: "never runs")
+
+        release.set()
+        assert await blocked is True
+        assert pool.pending == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_login_returns_503_when_hash_pool_saturated(client, monkeypatch):
+    register_response = await client.post(
+        "/auth/register", json={"email": "busy@example.com", "password": "Password123!"}
+    )
+    assert register_response.status_code == 200
+
+    saturated_pool = PasswordHashPool(kind="thread", max_workers=1, max_queue=0)
+    saturated_pool._pending = saturated_pool.capacity
+    monkeypatch.setattr(security, "password_hash_pool", saturated_pool)
+
+    response = await client.post(
+        "/auth/login", json={"email": "busy@example.com", "password": "Password123!"}
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,46 @@
+import pytest
+
+from app.schemas import user as user_schemas
+from app.services import users as user_service
+from app.services.principals import principal_cache
+
+
+async def _login(client, email, password):
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_repeated_profile_reads_skip_the_database(client, session_factory, statement_log):
+    async with session_factory() as session:
+        await user_service.create_user(
+            session, user_schemas.UserCreate(email="cached@example.com", password="Password123!")
+        )
+    headers = await _login(client, "cached@example.com", "Password123!")
+
+    first = await client.get("/users/me", headers=headers)
+    assert first.status_code == 200
+    statement_log.clear()
+
+    second = await client.get("/users/me", headers=headers)
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert statement_log == []
+
+
+@pytest.mark.asyncio
+async def test_deactivation_invalidates_cached_principal(client, session_factory):
+    async with session_factory() as session:
+        user = await user_service.create_user(
+            session, user_schemas.UserCreate(email="revoked@example.com", password="Password123!")
+        )
+    headers = await _login(client, "revoked@example.com", "Password123!")
+
+    assert (await client.get("/users/me", headers=headers)).status_code == 200
+    assert await principal_cache.get("revoked@example.com") is not None
+
+    async with session_factory() as session:
+        await user_service.update_user(session, user.id, user_schemas.UserUpdate(is_active=False))
+
+    assert await principal_cache.get("revoked@example.com") is None
+    assert (await client.get("/users/me", headers=headers)).status_code == 403
@@ -0,0 +1,112 @@
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.core.profiling import profiler
+from app.db.instrumentation import instrument_engine
+from app.dependencies import get_read_session_factory, get_session_factory
+from app.main import create_app
+from app.middleware.profiling import ProfilingMiddleware
+
+
+@pytest_asyncio.fixture
+async def profiled_client(monkeypatch, client, session_factory):
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    app = create_app()
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    app.dependency_overrides[get_read_session_factory] = lambda: session_factory
+    instrument_engine(session_factory.kw["bind"])
+    profiler.clear()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as async_client:
+        yield async_client
+    profiler.clear()
+
+
+@pytest.mark.asyncio
+async def test_token_profiles_request_with_db_and_hash_spans(profiled_client, superuser_headers):
+    response = await profiled_client.post("/profiles/token", headers=superuser_headers)
+    assert response.status_code == 200
+    token = response.json()
+    assert token["header"] == "X-Profile-Token"
+
+    email = (await profiled_client.get("/users/me", headers=superuser_headers)).json()["email"]
+    response = await profiled_client.post(
+        "/auth/login",
+        json={"email": email, "password": "SuperSecret123!"},
+        headers={"X-Profile-Token": token["token"]},
+    )
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    profile = (await profiled_client.get(f"/profiles/{profile_id}", headers=superuser_headers)).json()
+    assert (profile["trigger"], profile["route"], profile["status"]) == ("token", "/auth/login", 200)
+    assert profile["db_queries"] >= 1
+    assert any(span["kind"] == "db" and span["detail"].startswith("SELECT") for span in profile["spans"])
+    [hash_span] = [span for span in profile["spans"] if span["kind"] == "password_hash"]
+    assert hash_span["name"] == "verify"
+    assert profile["password_hash_ms"] == hash_span["duration_ms"]
+    assert profile["samples"] > 0
+    assert "SuperSecret123!" not in str(profile)
+
+    folded = await profiled_client.get(
+        f"/profiles/{profile_id}", params={"format": "folded"}, headers=superuser_headers
+    )
+    assert folded.headers["content-type"].startswith("text/plain")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.text.splitlines())
+
+    listed = (await profiled_client.get("/profiles/", headers=superuser_headers)).json()
+    assert [item["id"] for item in listed] == [profile_id]
+
+
+@pytest.mark.asyncio
+async def test_requests_are_only_profiled_when_asked(profiled_client, superuser_headers, monkeypatch):
+    response = await profiled_client.get("/users/me", headers=superuser_headers)
+    assert "x-profile-id" not in response.headers
+
+    expired, _ = profiler.create_token(-1)
+    for token in (expired, "9999999999.forged"):
+        response = await profiled_client.get("/users/me", headers={**superuser_headers, "X-Profile-Token": token})
+        assert "x-profile-id" not in response.headers
+    assert profiler.profiles() == []
+
+    monkeypatch.setattr(profiler, "sample_rate", 1.0)
+    response = await profiled_client.get("/users/me", headers=superuser_headers)
+    [profile] = profiler.profiles()
+    assert response.headers["x-profile-id"] == profile.id
+    assert profile.trigger == "sample"
+
+
+@pytest.mark.asyncio
+async def test_profiles_require_superuser(profiled_client, regular_user_headers):
+    response = await profiled_client.get("/profiles/", headers=regular_user_headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_streaming_responses_release_the_sampler_after_the_first_chunk():
+    busy_while_streaming = []
+
+    async def stream(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"first", "more_body": True})
+        busy_while_streaming.append(profiler._busy.locked())
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def ignore(message):
+        pass
+
+    token, _ = profiler.create_token(60)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/stream",
+        "headers": [(b"x-profile-token", token.encode())],
+    }
+    profiler.clear()
+    await ProfilingMiddleware(stream, profiler=profiler)(scope, None, ignore)
+
+    assert busy_while_streaming == [False]
+    [profile] = profiler.profiles()
+    assert profile.status == 200
+    profiler.clear()
@@ -0,0 +1,46 @@
+import pytest
+
+from app.core.config import settings
+from app.core.hashing import hash_duration_seconds
+from app.core.rate_limit import InMemoryRateLimiter
+
+
+@pytest.mark.asyncio
+async def test_in_memory_limiter_enforces_sliding_window():
+    limiter = InMemoryRateLimiter()
+    assert await limiter.hit("key", limit=2, window=0.2) is None
+    assert await limiter.hit("key", limit=2, window=0.2) is None
+
+    retry_after = await limiter.hit("key", limit=2, window=0.2)
+    assert retry_after is not None and 0 < retry_after <= 0.2
+    assert await limiter.hit("other", limit=2, window=0.2) is None
+
+
+@pytest.mark.asyncio
+async def test_login_is_throttled_per_email_before_hashing(client, monkeypatch):
+    monkeypatch.setattr(settings, "auth_rate_limit_per_email", 2)
+
+    for _ in range(2):
+        response = await client.post(
+            "/auth/login", json={"email": "victim@example.com", "password": "guess"}
+        )
+        assert response.status_code == 401
+
+    verifications = hash_duration_seconds.snapshot(operation="verify").count
+    response = await client.post("/auth/login", json={"email": "Victim@example.com", "password": "guess"})
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert hash_duration_seconds.snapshot(operation="verify").count == verifications
+
+    other = await client.post("/auth/login", json={"email": "someone@example.com", "password": "guess"})
+    assert other.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_throttled_per_ip(client, monkeypatch):
+    monkeypatch.setattr(settings, "auth_rate_limit_per_ip", 1)
+
+    first = await client.post("/auth/refresh", json={"refresh_token": "not-a-token"})
+    assert first.status_code == 401
+    second = await client.post("/auth/refresh", json={"refresh_token": "not-a-token"})
+    assert second.status_code == 429
@@ -0,0 +1,129 @@
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.requests import Request
+
+from app import dependencies
+from app.core.security import create_access_token
+from app.db import models
+from app.db.session import (
+    WROTE_KEY,
+    InstrumentedAsyncQueuePool,
+    ReadYourWritesTracker,
+    ReplicaRouter,
+)
+from app.main import app
+
+
+def _request(token: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/users/",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+            "client": ("127.0.0.1", 1234),
+        }
+    )
+
+
+@pytest_asyncio.fixture
+async def replica_engines():
+    engines = [
+        create_async_engine("sqlite+aiosqlite://", poolclass=InstrumentedAsyncQueuePool) for _ in range(2)
+    ]
+    yield engines
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_round_robin_alternates_replicas(replica_engines):
+    primary = async_sessionmaker(create_async_engine("sqlite+aiosqlite://"))
+    router = ReplicaRouter(replica_engines, primary=primary)
+
+    binds = [router().bind for _ in range(4)]
+    assert binds == [replica_engines[0], replica_engines[1], replica_engines[0], replica_engines[1]]
+
+
+@pytest.mark.asyncio
+async def test_least_loaded_prefers_idle_replica(replica_engines):
+    primary = async_sessionmaker(create_async_engine("sqlite+aiosqlite://"))
+    router = ReplicaRouter(replica_engines, primary=primary, strategy="least_loaded")
+
+    async with replica_engines[0].connect() as busy:
+        await busy.execute(text("SELECT 1"))
+        assert {router().bind for _ in range(3)} == {replica_engines[1]}
+
+
+def test_router_without_replicas_uses_primary():
+    primary = async_sessionmaker(create_async_engine("sqlite+aiosqlite://"))
+    router = ReplicaRouter([], primary=primary)
+    assert not router.has_replicas
+    assert router().bind is primary.kw["bind"]
+
+
+@pytest.mark.asyncio
+async def test_writes_flag_session_and_pin_client_to_primary(session_factory, replica_engines, monkeypatch):
+    async with session_factory() as session:
+        await session.execute(select(models.User))
+        assert not session.info.get(WROTE_KEY)
+        session.add(models.User(email="writer@example.com", hashed_password="x"))
+        await session.flush()
+        assert session.info[WROTE_KEY] is True
+
+    router = ReplicaRouter(replica_engines, primary=session_factory)
+    tracker = ReadYourWritesTracker(window_seconds=60)
+    monkeypatch.setattr(dependencies, "get_read_router", lambda: router)
+    monkeypatch.setattr(dependencies, "get_sessionmaker", lambda: session_factory)
+    monkeypatch.setattr(dependencies, "read_your_writes", tracker)
+
+    request = _request(create_access_token("writer@example.com"))
+    assert dependencies.get_read_session_factory(request) is router
+
+    tracker.mark(dependencies._client_key(request))
+    assert dependencies.get_read_session_factory(request) is session_factory
+    # The pin follows the subject, so a fresh token for the same user is pinned too.
+    fresh = _request(create_access_token("writer@example.com", expires_minutes=5))
+    assert dependencies.get_read_session_factory(fresh) is session_factory
+    assert dependencies.get_read_session_factory(_request(create_access_token("other@example.com"))) is router
+
+
+@pytest.mark.asyncio
+async def test_principals_resolve_on_primary_when_replica_lags(client, replica_engines):
+    # The replica has no users table at all, standing in for one that lags behind.
+    app.dependency_overrides[dependencies.get_read_session_factory] = lambda: async_sessionmaker(replica_engines[0])
+
+    response = await client.post(
+        "/auth/register", json={"email": "fresh@example.com", "password": "secret123"}
+    )
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    me = await client.get("/users/me", headers=headers)
+    assert me.status_code == 200
+    assert me.json()["email"] == "fresh@example.com"
+
+
+@pytest.mark.asyncio
+async def test_writes_pin_the_client_before_the_response_is_sent(client, superuser_headers, monkeypatch):
+    tracker = ReadYourWritesTracker(window_seconds=60)
+    monkeypatch.setattr(dependencies, "read_your_writes", tracker)
+    admin = (await client.get("/users/me", headers=superuser_headers)).json()["email"]
+    pinned_at_start = []
+
+    async def observed(scope, receive, send):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                pinned_at_start.append(tracker.is_sticky(dependencies.subject_key(admin)))
+            await send(message)
+
+        await app(scope, receive, send_wrapper)
+
+    async with AsyncClient(transport=ASGITransport(app=observed), base_url="http://testserver") as observer:
+        response = await observer.post(
+            "/users/", json={"email": "pinned@example.com", "password": "secret123"}, headers=superuser_headers
+        )
+    assert response.status_code == 201
+    assert pinned_at_start == [True]
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+import pytest
+
+from app.core import security
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+def test_decode_token_memoizes_verified_claims(monkeypatch):
+    security.verified_token_cache.clear()
+    token = security.create_access_token("cached@example.com")
+
+    calls = []
+    original_decode = security.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+
+    first = security.decode_token(token, secret=settings.jwt_secret_key)
+    second = security.decode_token(token, secret=settings.jwt_secret_key)
+    assert first == second
+    assert first["sub"] == "cached@example.com"
+    assert len(calls) == 1
+
+    # A cached entry is bound to the secret that verified it.
+    with pytest.raises(security.AuthenticationError):
+        security.decode_token(token, secret=settings.jwt_refresh_secret_key)
+
+
+def test_decode_token_rejects_expired_tokens():
+    security.verified_token_cache.clear()
+    token = security.create_token(
+        subject="expired@example.com",
+        expires_delta=timedelta(seconds=-5),
+        secret=settings.jwt_secret_key,
+        algorithm=settings.jwt_algorithm,
+    )
+    with pytest.raises(security.AuthenticationError):
+        security.decode_token(token, secret=settings.jwt_secret_key)
+    assert len(security.verified_token_cache) == 0
+
+
+def test_ttl_cache_expires_and_evicts_entries():
+    now = [1000.0]
+    cache: TTLCache[str, int] = TTLCache(max_entries=2, clock=lambda: now[0])
+
+    cache.set("a", 1, expires_at=1010.0)
+    cache.set("b", 2, expires_at=1020.0)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3, expires_at=1030.0)
+    assert cache.get("b") is None  # least recently used entry was evicted
+    assert cache.get("a") == 1
+
+    now[0] = 1010.0
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+
+    cache.set("stale", 4, expires_at=900.0)
+    assert cache.get("stale") is None
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from app import serve
+from app.core.config import settings
+
+SHARED_STORES = {"refresh_token_store": "redis", "rate_limit_backend": "redis", "user_changes_backend": "redis"}
+
+
+def test_workers_default_to_cpu_count_once_state_is_shared():
+    config = settings.model_copy(update={"server_workers": None, **SHARED_STORES})
+    assert serve.worker_count(config) == max(1, os.cpu_count() or 1)
+    assert serve.worker_count(config.model_copy(update={"server_workers": 3})) == 3
+
+
+def test_process_local_stores_keep_a_single_worker():
+    config = settings.model_copy(update={"server_workers": None, **SHARED_STORES, "refresh_token_store": "memory"})
+    assert serve.process_local_stores(config) == ["REFRESH_TOKEN_STORE"]
+    assert serve.worker_count(config) == 1
+    serve.check_workers(config)
+
+    with pytest.raises(SystemExit, match="REFRESH_TOKEN_STORE"):
+        serve.check_workers(config.model_copy(update={"server_workers": 4}))
+
+
+def test_gunicorn_preloads_the_app_with_tuned_workers():
+    config = settings.model_copy(update={"server_workers": 2, "server_max_requests": 1000})
+    options = serve.gunicorn_options(config)
+    assert options["preload_app"] is True
+    assert options["workers"] == 2
+    assert options["max_requests"] == 1000
+    assert options["worker_class"] == "app.serve.TunedUvicornWorker"
+    assert serve.TunedUvicornWorker.CONFIG_KWARGS["loop"] == serve.LOOP
+
+    # Forked children must not reuse pooled connections opened by the master.
+    serve.post_fork(None, None)
+
+
+def test_uvicorn_options_follow_settings():
+    config = settings.model_copy(update={"server_port": 9000, "server_graceful_timeout_seconds": 12})
+    options = serve.uvicorn_options(config)
+    assert options["port"] == 9000
+    assert options["timeout_graceful_shutdown"] == 12
+    assert options["limit_max_requests"] is None
+    assert options["loop"] in {"uvloop", "asyncio"}
@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# The budget covers only the app's own modules: the frameworks are imported
+# before the clock starts, since their cost is not ours to control. Set
+# STARTUP_IMPORT_BUDGET_SECONDS to relax it on a slow or cold CI runner.
+STARTUP_IMPORT_BUDGET_SECONDS = float(os.environ.get("STARTUP_IMPORT_BUDGET_SECONDS", "0.5"))
+DEFERRED_MODULES = ("asyncpg", "passlib", "argon2", "jose.jwt", "cryptography")
+
+PROBE = """
+import json, sys, time
+import fastapi, pydantic, pydantic_settings, sqlalchemy.ext.asyncio, sqlalchemy.orm
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def _import_app() -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, check=True, timeout=60
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def test_importing_the_app_defers_drivers_and_crypto():
+    probe = _import_app()
+    loaded = [module for module in DEFERRED_MODULES if module in probe["modules"]]
+    assert loaded == []
+    assert probe["seconds"] < STARTUP_IMPORT_BUDGET_SECONDS, (
+        f"importing app.main took {probe['seconds']:.2f}s, budget is {STARTUP_IMPORT_BUDGET_SECONDS:.2f}s"
+    )
@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services.user_changes import UserChangeFeed, user_change, user_change_resets_total, user_changes
+
+
+def _parse_events(body: str) -> list[dict[str, str]]:
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if line and not line.startswith(":"))
+        if "event" in fields:
+            events.append(fields)
+    return events
+
+
+@pytest.fixture
+def short_streams(monkeypatch):
+    # The test transport buffers the whole body, so end each stream after its first event.
+    monkeypatch.setattr(settings, "user_changes_max_stream_seconds", 0)
+
+
+@pytest.mark.asyncio
+async def test_change_stream_resumes_from_last_event_id(client, superuser_headers, short_streams):
+    response = await client.get("/users/changes", headers=superuser_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    [ready] = _parse_events(response.text)
+    assert ready["event"] == "users.invalidated"
+
+    created = await client.post(
+        "/users/", json={"email": "streamed@example.com", "password": "secret123"}, headers=superuser_headers
+    )
+    response = await client.get("/users/changes", headers={**superuser_headers, "Last-Event-ID": ready["id"]})
+    [event] = _parse_events(response.text)
+    assert event["event"] == "user.created"
+    data = json.loads(event["data"])
+    assert data["id"] == created.json()["id"]
+    assert data["user"]["email"] == "streamed@example.com"
+
+    # An id the feed never issued cannot be resumed from, so the client reloads.
+    response = await client.get("/users/changes", headers={**superuser_headers, "Last-Event-ID": "1-0"})
+    [event] = _parse_events(response.text)
+    assert event["event"] == "users.invalidated"
+    assert event["id"] != "1-0"
+
+
+@pytest.mark.asyncio
+async def test_change_stream_requires_superuser(client, regular_user_headers):
+    response = await client.get("/users/changes", headers=regular_user_headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_subscribers_receive_live_events_and_reload_when_behind():
+    feed = UserChangeFeed(history_size=2, queue_size=2)
+    changes = feed.subscribe(idle_timeout=0.01)
+    ready = await anext(changes)
+    assert ready.type == "users.invalidated"
+    assert await anext(changes) is None
+
+    await feed.publish([user_change("user.deleted", "first")])
+    event = await anext(changes)
+    assert (event.type, json.loads(event.data)) == ("user.deleted", {"id": "first", "user": None})
+
+    before = user_change_resets_total.value(reason="overflow")
+    await feed.publish([user_change("user.deleted", str(index)) for index in range(3)])
+    assert (await anext(changes)).type == "users.invalidated"
+    assert user_change_resets_total.value(reason="overflow") == before + 1
+    await changes.aclose()
+    assert feed.subscribers == 0
+
+    # Only the last two events are retained; resuming from before them reloads.
+    before = user_change_resets_total.value(reason="resume")
+    resumed = feed.subscribe(event.id)
+    assert (await anext(resumed)).type == "users.invalidated"
+    assert user_change_resets_total.value(reason="resume") == before + 1
+    await resumed.aclose()
+
+
+@pytest.mark.asyncio
+async def test_ids_from_another_worker_are_not_resumed():
+    worker, other = UserChangeFeed(), UserChangeFeed()
+    await other.publish([user_change("user.deleted", "elsewhere")])
+    await worker.publish([user_change("user.deleted", "here")])
+
+    # Even when the other worker's id falls inside this one's window, its events differ.
+    changes = worker.subscribe(other._history[-1].id)
+    assert (await anext(changes)).type == "users.invalidated"
+    await changes.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batch_writes_publish_one_reload(
+    client, superuser_headers, regular_user_headers, short_streams
+):
+    ready = _parse_events((await client.get("/users/changes", headers=superuser_headers)).text)[0]
+    members = (await client.get("/users/", params={"is_superuser": False}, headers=superuser_headers)).json()
+    member_id = members[0]["id"]
+    created = await client.post(
+        "/users/", json={"email": "batch@example.com", "password": "secret123"}, headers=superuser_headers
+    )
+    response = await client.post(
+        "/users/batch",
+        json={
+            "operations": [
+                {"op": "update", "id": member_id, "changes": {"is_active": False}},
+                {"op": "delete", "id": created.json()["id"]},
+            ]
+        },
+        headers=superuser_headers,
+    )
+    assert response.status_code == 200
+
+    changes = user_changes.subscribe(ready["id"], idle_timeout=0.01)
+    received = [await asyncio.wait_for(anext(changes), 1) for _ in range(2)]
+    assert await anext(changes) is None
+    await changes.aclose()
+    assert [change.type for change in received] == ["user.created", "users.invalidated"]
@@ -1,51 +1,15 @@
-import secrets
+import json
 from uuid import UUID
 
 import pytest
-import pytest_asyncio
+from sqlalchemy.dialects import postgresql
 
+from app.db import models
+from app.db.estimates import Explain
 from app.schemas import user as user_schemas
 from app.services import users as user_service
 
 
-@pytest_asyncio.fixture
-async def superuser_headers(session_factory, client):
-    email = f"admin_{secrets.token_hex(4)}@example.com"
-    password = "SuperSecret123!"
-    async with session_factory() as session:
-        await user_service.create_user(
-            session,
-            user_schemas.UserCreate(
-                email=email,
-                password=password,
-                is_superuser=True,
-            ),
-        )
-
-    response = await client.post("/auth/login", json={"email": email, "password": password})
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
-
-
-@pytest_asyncio.fixture
-async def regular_user_headers(session_factory, client):
-    email = f"user_{secrets.token_hex(4)}@example.com"
-    password = "UserPassword123!"
-    async with session_factory() as session:
-        await user_service.create_user(
-            session,
-            user_schemas.UserCreate(
-                email=email,
-                password=password,
-                is_superuser=False,
-            ),
-        )
-
-    response = await client.post("/auth/login", json={"email": email, "password": password})
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
-
-
 @pytest.mark.asyncio
 async def test_superuser_can_list_users(client, session_factory, superuser_headers):
     # Seed an additional user
@@ -106,3 +70,189 @@ async def test_superuser_can_manage_users(client, session_factory, superuser_hea
     list_response = await client.get("/users/", headers=superuser_headers)
     emails = [user["email"] for user in list_response.json()]
     assert "managed@example.com" not in emails
+
+
+async def _seed_users(session_factory, count):
+    async with session_factory() as session:
+        session.add_all(
+            models.User(email=f"seed{index:03d}@example.com", hashed_password="not-a-real-hash")
+            for index in range(count)
+        )
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_list_users_paginates_with_keyset_cursor(client, session_factory, superuser_headers):
+    await _seed_users(session_factory, 5)
+
+    seen: list[str] = []
+    params = {"limit": 2}
+    while True:
+        response = await client.get("/users/", params=params, headers=superuser_headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(user["id"] for user in page)
+        next_cursor = response.headers.get("x-next-cursor")
+        if next_cursor is None:
+            break
+        assert 'rel="next"' in response.headers["link"]
+        params = {"limit": 2, "cursor": next_cursor}
+
+    # Five seeded users plus the superuser, each exactly once.
+    assert len(seen) == 6
+    assert len(set(seen)) == 6
+
+
+@pytest.mark.asyncio
+async def test_list_users_rejects_malformed_cursor(client, superuser_headers):
+    response = await client.get("/users/", params={"cursor": "not-a-cursor"}, headers=superuser_headers)
+    assert response.status_code == 400
+
+
+async def _seed_directory(session_factory):
+    async with session_factory() as session:
+        session.add_all(
+            [
+                models.User(email="ada@example.com", full_name="Ada Lovelace", hashed_password="x"),
+                models.User(email="grace@example.com", full_name="Grace Hopper", hashed_password="x"),
+                models.User(email="alan@example.com", full_name="Alan Turing", hashed_password="x", is_active=False),
+                models.User(email="percent%ok@example.com", full_name="Fifty_Fifty", hashed_password="x"),
+            ]
+        )
+        await session.commit()
+
+
+async def _emails(client, headers, **params):
+    response = await client.get("/users/", params=params, headers=headers)
+    assert response.status_code == 200
+    return [user["email"] for user in response.json()]
+
+
+@pytest.mark.asyncio
+async def test_list_users_filters_and_searches(client, session_factory, superuser_headers):
+    await _seed_directory(session_factory)
+
+    assert await _emails(client, superuser_headers, is_active=False) == ["alan@example.com"]
+    assert await _emails(client, superuser_headers, is_superuser=True, search="admin") != []
+    assert await _emails(client, superuser_headers, search="HOPPER") == ["grace@example.com"]
+    assert await _emails(client, superuser_headers, search="lov", search_mode="prefix") == []
+    assert await _emails(client, superuser_headers, search="al", search_mode="prefix") == ["alan@example.com"]
+    # Short substring terms fall back to a prefix match.
+    assert await _emails(client, superuser_headers, search="a", is_superuser=False) == [
+        "ada@example.com",
+        "alan@example.com",
+    ]
+    # LIKE wildcards in the term are matched literally.
+    assert await _emails(client, superuser_headers, search="t%o") == ["percent%ok@example.com"]
+    assert await _emails(client, superuser_headers, search="y_f") == ["percent%ok@example.com"]
+    assert await _emails(client, superuser_headers, search="t_o") == []
+
+
+@pytest.mark.asyncio
+async def test_list_users_sorts_and_paginates_descending(client, session_factory, superuser_headers):
+    await _seed_directory(session_factory)
+
+    emails: list[str] = []
+    params = {"sort": "-email", "is_superuser": False, "limit": 3}
+    while True:
+        response = await client.get("/users/", params=params, headers=superuser_headers)
+        emails.extend(user["email"] for user in response.json())
+        next_cursor = response.headers.get("x-next-cursor")
+        if next_cursor is None:
+            break
+        params["cursor"] = next_cursor
+
+    assert emails == ["percent%ok@example.com", "grace@example.com", "alan@example.com", "ada@example.com"]
+
+    # A cursor only continues the sort order it was issued for.
+    response = await client.get("/users/", params={"cursor": params["cursor"]}, headers=superuser_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_users_reports_total_count(client, session_factory, superuser_headers):
+    await _seed_directory(session_factory)
+
+    response = await client.get(
+        "/users/", params={"include_total": True, "is_active": True, "limit": 1}, headers=superuser_headers
+    )
+    assert response.headers["x-total-count"] == "4"
+    assert response.headers["x-total-count-exact"] == "true"
+
+    response = await client.get("/users/", params={"include_total": True}, headers=superuser_headers)
+    assert response.headers["x-total-count"] == "5"
+    assert "x-total-count" not in (await client.get("/users/", headers=superuser_headers)).headers
+
+
+def test_search_uses_indexed_expressions():
+    statement = user_service._users_in_order(None, user_service.UserFilters(search="ada"), "email")
+    sql = str(Explain(statement).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "lower(users.email) LIKE" in sql
+    assert "lower(users.full_name) LIKE" in sql
+
+
+@pytest.mark.asyncio
+async def test_list_users_streams_ndjson(client, session_factory, superuser_headers):
+    await _seed_users(session_factory, 3)
+
+    response = await client.get("/users/", params={"format": "ndjson"}, headers=superuser_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 4
+    assert [row["created_at"] for row in rows] == sorted(row["created_at"] for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_user_writes_use_a_single_statement(client, superuser_headers, statement_log):
+    # Resolve the admin principal once so only the write itself hits the database.
+    assert (await client.get("/users/me", headers=superuser_headers)).status_code == 200
+
+    statement_log.clear()
+    created = await client.post(
+        "/users/", json={"email": "single@example.com", "password": "Password123!"}, headers=superuser_headers
+    )
+    assert created.status_code == 201
+    assert len(statement_log) == 1 and statement_log[0].startswith("INSERT")
+    user_id = created.json()["id"]
+
+    statement_log.clear()
+    updated = await client.patch(f"/users/{user_id}", json={"full_name": "Single"}, headers=superuser_headers)
+    assert updated.status_code == 200
+    assert updated.json()["full_name"] == "Single"
+    assert len(statement_log) == 1 and statement_log[0].startswith("UPDATE")
+
+    statement_log.clear()
+    deleted = await client.delete(f"/users/{user_id}", headers=superuser_headers)
+    assert deleted.status_code == 204
+    assert len(statement_log) == 1 and statement_log[0].startswith("DELETE")
+
+    statement_log.clear()
+    missing = await client.delete(f"/users/{user_id}", headers=superuser_headers)
+    assert missing.status_code == 404
+    assert len(statement_log) == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_emails_are_rejected_by_the_unique_index(client, superuser_headers, statement_log):
+    payload = {"email": "taken@example.com", "password": "Password123!"}
+    assert (await client.post("/users/", json=payload, headers=superuser_headers)).status_code == 201
+    other = await client.post(
+        "/users/", json={"email": "other@example.com", "password": "Password123!"}, headers=superuser_headers
+    )
+
+    statement_log.clear()
+    duplicate = await client.post("/users/", json=payload, headers=superuser_headers)
+    assert duplicate.status_code == 400
+    assert duplicate.json()["detail"] == "Email already registered"
+    assert [statement.split()[0] for statement in statement_log] == ["INSERT"]
+
+    renamed = await client.patch(
+        f"/users/{other.json()['id']}", json={"email": "taken@example.com"}, headers=superuser_headers
+    )
+    assert renamed.status_code == 400
+
+    registered = await client.post("/auth/register", json={"email": "taken@example.com", "password": "Password123!"})
+    assert registered.status_code == 400
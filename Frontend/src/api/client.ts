@@ -10,7 +10,7 @@ declare module "axios" {
 import { useAuthStore } from "../auth/store";
 import type { AuthTokens } from "../types";
 
-const apiBaseUrl = import.meta.env.VITE_API_URL ?? "http://localhost:8000";
+export const apiBaseUrl = import.meta.env.VITE_API_URL ?? "http://localhost:8000";
 
 const api = axios.create({
   baseURL: apiBaseUrl,
@@ -19,7 +19,7 @@ const api = axios.create({
 
 let refreshPromise: Promise<AuthTokens> | null = null;
 
-async function refreshTokens(): Promise<AuthTokens> {
+export async function refreshTokens(): Promise<AuthTokens> {
   if (!refreshPromise) {
     const { tokens, setTokens, clear } = useAuthStore.getState();
     if (!tokens?.refresh_token) {
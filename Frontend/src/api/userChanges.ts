@@ -0,0 +1,110 @@
+import { useAuthStore } from "../auth/store";
+import type { User } from "../types";
+import { apiBaseUrl, refreshTokens } from "./client";
+
+export type UserChangeEvent =
+  | { type: "user.created" | "user.updated" | "user.deleted"; id: string; user: User | null }
+  | { type: "users.invalidated" };
+
+type SubscribeOptions = {
+  signal: AbortSignal;
+  onEvent: (event: UserChangeEvent) => void;
+  onDisconnect?: (error: unknown) => void;
+};
+
+const DEFAULT_RETRY_MS = 3000;
+
+function wait(ms: number, signal: AbortSignal): Promise<void> {
+  return new Promise((resolve) => {
+    const timer = setTimeout(resolve, ms);
+    signal.addEventListener("abort", () => {
+      clearTimeout(timer);
+      resolve();
+    });
+  });
+}
+
+// Follows GET /users/changes until `signal` aborts. fetch is used instead of
+// EventSource so the request can carry the bearer token. Reconnects resume from
+// the last event id; `users.invalidated` means the list has to be reloaded.
+export async function subscribeToUserChanges({
+  signal,
+  onEvent,
+  onDisconnect
+}: SubscribeOptions): Promise<void> {
+  let lastEventId: string | null = null;
+  let retryMs = DEFAULT_RETRY_MS;
+
+  while (!signal.aborted) {
+    try {
+      const { tokens } = useAuthStore.getState();
+      const headers: Record<string, string> = { Accept: "text/event-stream" };
+      if (tokens?.access_token) {
+        headers.Authorization = `Bearer ${tokens.access_token}`;
+      }
+      if (lastEventId) {
+        headers["Last-Event-ID"] = lastEventId;
+      }
+
+      const response = await fetch(`${apiBaseUrl}/users/changes`, { headers, signal });
+      if (response.status === 401 && tokens?.refresh_token) {
+        await refreshTokens();
+        continue;
+      }
+      if (response.status === 403) {
+        onDisconnect?.(new Error("Not allowed to follow user changes"));
+        return;
+      }
+      if (!response.ok || !response.body) {
+        throw new Error(`User change stream failed with status ${response.status}`);
+      }
+
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = "";
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) {
+          break;
+        }
+        buffer += value;
+        let boundary = buffer.indexOf("\n\n");
+        while (boundary !== -1) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          boundary = buffer.indexOf("\n\n");
+
+          let type: string | null = null;
+          let data = "";
+          for (const line of block.split("\n")) {
+            const separator = line.indexOf(": ");
+            if (line.startsWith(":") || separator === -1) {
+              continue;
+            }
+            const field = line.slice(0, separator);
+            const fieldValue = line.slice(separator + 2);
+            if (field === "id") {
+              lastEventId = fieldValue;
+            } else if (field === "event") {
+              type = fieldValue;
+            } else if (field === "data") {
+              data = fieldValue;
+            } else if (field === "retry") {
+              retryMs = Number(fieldValue) || DEFAULT_RETRY_MS;
+            }
+          }
+          if (type) {
+            onEvent({ type, ...JSON.parse(data) } as UserChangeEvent);
+          }
+        }
+      }
+      // The server ends streams periodically; pick up where this one stopped.
+      continue;
+    } catch (error) {
+      if (signal.aborted) {
+        return;
+      }
+      onDisconnect?.(error);
+    }
+    await wait(retryMs, signal);
+  }
+}
@@ -17,9 +17,48 @@ export type UpdateUserPayload = {
   is_superuser?: boolean;
 };
 
-export async function fetchUsers(): Promise<User[]> {
-  const response = await api.get<User[]>("/users/");
-  return response.data;
+export type UserSort =
+  | "created_at"
+  | "-created_at"
+  | "updated_at"
+  | "-updated_at"
+  | "email"
+  | "-email";
+
+export type UserListParams = {
+  search?: string;
+  search_mode?: "substring" | "prefix";
+  is_active?: boolean;
+  is_superuser?: boolean;
+  sort?: UserSort;
+  limit?: number;
+  cursor?: string;
+};
+
+export type UserPage = {
+  users: User[];
+  nextCursor: string | null;
+};
+
+const PAGE_SIZE = 1000;
+
+export async function fetchUsersPage(params: UserListParams = {}): Promise<UserPage> {
+  const response = await api.get<User[]>("/users/", { params });
+  return { users: response.data, nextCursor: response.headers["x-next-cursor"] ?? null };
+}
+
+// Follows X-Next-Cursor until the last page, so callers get every matching user.
+export async function fetchUsers(params: UserListParams = {}): Promise<User[]> {
+  const users: User[] = [];
+  let cursor = params.cursor;
+  for (;;) {
+    const page = await fetchUsersPage({ limit: PAGE_SIZE, ...params, cursor });
+    users.push(...page.users);
+    if (!page.nextCursor) {
+      return users;
+    }
+    cursor = page.nextCursor;
+  }
 }
 
 export async function createUser(payload: CreateUserPayload): Promise<User> {
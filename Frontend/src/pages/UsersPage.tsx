@@ -1,6 +1,6 @@
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { isAxiosError } from "axios";
-import { useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { Link } from "react-router-dom";
 
 import {
@@ -11,6 +11,7 @@ import {
   type CreateUserPayload,
   type UpdateUserPayload
 } from "../api/users";
+import { subscribeToUserChanges, type UserChangeEvent } from "../api/userChanges";
 import { useAuth } from "../auth/AuthProvider";
 import type { User } from "../types";
 
@@ -24,6 +25,8 @@ type EditFormState = {
 
 type MutationError = string | null;
 
+type FeedState = "connecting" | "live" | "offline";
+
 const initialCreateState = {
   email: "",
   full_name: "",
@@ -54,14 +57,71 @@ function resolveErrorMessage(error: unknown, fallback: string): string {
   return fallback;
 }
 
+function upsertUser(users: User[] | undefined, user: User): User[] | undefined {
+  if (!users) {
+    return users;
+  }
+  return users.some((existing) => existing.id === user.id)
+    ? users.map((existing) => (existing.id === user.id ? user : existing))
+    : [...users, user];
+}
+
+function removeUser(users: User[] | undefined, id: string): User[] | undefined {
+  return users?.filter((existing) => existing.id !== id);
+}
+
 export function UsersPage() {
   const { logout } = useAuth();
   const queryClient = useQueryClient();
+  const [feed, setFeed] = useState<FeedState>("connecting");
+  const feedRef = useRef<FeedState>("connecting");
+  // While the change feed is live the cached list is kept current from its
+  // events, so it never goes stale and is loaded only when the feed says so.
   const { data: users, isLoading, isError, error } = useQuery({
     queryKey: ["users"],
-    queryFn: fetchUsers
+    queryFn: () => fetchUsers(),
+    enabled: feed !== "connecting",
+    staleTime: feed === "live" ? Infinity : 0
   });
 
+  useEffect(() => {
+    const controller = new AbortController();
+    const updateFeed = (state: FeedState) => {
+      feedRef.current = state;
+      setFeed(state);
+    };
+
+    const applyChange = (change: UserChangeEvent) => {
+      if (feedRef.current !== "live") {
+        updateFeed("live");
+      }
+      if (change.type === "users.invalidated") {
+        void queryClient.invalidateQueries({ queryKey: ["users"] });
+      } else if (change.type === "user.deleted") {
+        queryClient.setQueryData<User[]>(["users"], (current) => removeUser(current, change.id));
+      } else if (change.user) {
+        const user = change.user;
+        queryClient.setQueryData<User[]>(["users"], (current) => upsertUser(current, user));
+      } else {
+        void queryClient.invalidateQueries({ queryKey: ["users"] });
+      }
+    };
+
+    void subscribeToUserChanges({
+      signal: controller.signal,
+      onEvent: applyChange,
+      onDisconnect: () => updateFeed("offline")
+    });
+    return () => controller.abort();
+  }, [queryClient]);
+
+  // Without the feed, fall back to reloading the list after each change.
+  const refreshAfterMutation = () => {
+    if (feedRef.current !== "live") {
+      void queryClient.invalidateQueries({ queryKey: ["users"] });
+    }
+  };
+
   const [createForm, setCreateForm] = useState(initialCreateState);
   const [createError, setCreateError] = useState<MutationError>(null);
   const [editingId, setEditingId] = useState<string | null>(null);
@@ -70,8 +130,9 @@ export function UsersPage() {
 
   const createMutation = useMutation({
     mutationFn: (payload: CreateUserPayload) => createUser(payload),
-    onSuccess: () => {
-      void queryClient.invalidateQueries({ queryKey: ["users"] });
+    onSuccess: (user) => {
+      queryClient.setQueryData<User[]>(["users"], (current) => upsertUser(current, user));
+      refreshAfterMutation();
       setCreateForm(initialCreateState);
       setCreateError(null);
     },
@@ -83,8 +144,9 @@ export function UsersPage() {
   const updateMutation = useMutation({
     mutationFn: ({ id, values }: { id: string; values: UpdateUserPayload }) =>
       updateUser(id, values),
-    onSuccess: () => {
-      void queryClient.invalidateQueries({ queryKey: ["users"] });
+    onSuccess: (user) => {
+      queryClient.setQueryData<User[]>(["users"], (current) => upsertUser(current, user));
+      refreshAfterMutation();
       setEditingId(null);
       setEditForm(initialEditState);
       setEditError(null);
@@ -96,8 +158,9 @@ export function UsersPage() {
 
   const deleteMutation = useMutation({
     mutationFn: deleteUser,
-    onSuccess: () => {
-      void queryClient.invalidateQueries({ queryKey: ["users"] });
+    onSuccess: (_, id) => {
+      queryClient.setQueryData<User[]>(["users"], (current) => removeUser(current, id));
+      refreshAfterMutation();
     }
   });
 